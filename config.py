@@ -33,6 +33,12 @@ BASE_DIR = Path(__file__).resolve().parent
 # Project root directory
 PROJECT_ROOT = BASE_DIR
 
+# Where run data lives: output/, temp/ and the database. This is the project
+# root unless PDF_SCAN_WORK_DIR is set, which keeps a trial run's crawl
+# results and database apart from the real ones (the crawl benchmark in
+# crawlers/csula_pdf_scan/benchmarks/ runs in a scratch folder this way).
+WORK_DIR = Path(os.environ.get("PDF_SCAN_WORK_DIR") or PROJECT_ROOT)
+
 # =============================================================================
 # INSTITUTION SETTINGS
 # =============================================================================
@@ -65,7 +71,7 @@ SITE_ASSIGNMENTS_CSV = DATA_DIR / "site_assignments.csv"
 SITES_CSV = DATA_DIR / "sites.csv"
 
 # Output directories
-OUTPUT_DIR = PROJECT_ROOT / "output"
+OUTPUT_DIR = WORK_DIR / "output"
 OUTPUT_REPORTS_DIR = OUTPUT_DIR / "reports"
 OUTPUT_EMAILS_DIR = OUTPUT_DIR / "emails"
 OUTPUT_BACKUPS_DIR = OUTPUT_DIR / "backups"
@@ -77,7 +83,7 @@ OUTPUT_EMAILS_DIR.mkdir(exist_ok=True)
 OUTPUT_BACKUPS_DIR.mkdir(exist_ok=True)
 
 # Temporary files directory
-TEMP_DIR = PROJECT_ROOT / "temp"
+TEMP_DIR = WORK_DIR / "temp"
 TEMP_DIR.mkdir(exist_ok=True)
 TEMP_PDF_PATH = TEMP_DIR / "temp.pdf"
 TEMP_PROFILE_PATH = TEMP_DIR / "temp_profile.json"
@@ -97,7 +103,12 @@ SPIDER_DIR = CRAWLERS_DIR / "csula_pdf_scan"
 # =============================================================================
 
 # SQLite database path
-DATABASE_PATH = PROJECT_ROOT / "drupal_pdfs.db"
+DATABASE_PATH = WORK_DIR / "drupal_pdfs.db"
+
+# Read-only copy of the database published at the end of each scan.
+# Reporting and email stages read this file instead of DATABASE_PATH, so they
+# never wait on scan write locks or see a half-finished refresh.
+DATABASE_SNAPSHOT_PATH = WORK_DIR / "drupal_pdfs.snapshot.db"
 
 # Database backup directory (optional - for storing database backups)
 DB_BACKUP_DIR = OUTPUT_BACKUPS_DIR / "database"
@@ -154,6 +165,65 @@ AUTOTHROTTLE_TARGET_CONCURRENCY = 1.0
 # Obey robots.txt
 ROBOTSTXT_OBEY = False  # Set to True if you want to respect robots.txt
 
+# Combined request budget per host across all parallel crawl processes
+# (run_all_spiders.py). All campus sites share www.calstatela.edu, so this is
+# the total rate that host sees, however many processes are running.
+CRAWL_HOST_RATE = 8.0     # requests per second
+CRAWL_HOST_BURST = 16     # requests allowed back-to-back after an idle spell
+
+# Per-site crawl durations from previous runs; run_all_spiders.py uses them to
+# hand out sites longest-first so big sites don't become the long tail.
+CRAWL_DURATIONS_PATH = OUTPUT_DIR / "logs" / "crawl_durations.json"
+
+# Per-site crawl telemetry (pages/s, bytes, latency percentiles, status and
+# depth histograms, duplicates, PDFs per page), one folder per crawl run;
+# `python run_all_spiders.py --report` summarizes the latest run.
+CRAWL_TELEMETRY_DIR = OUTPUT_DIR / "logs" / "crawl_telemetry"
+
+# Hosts whose previous crawl took longer than this are crawled as several
+# partition processes, split by top-level path section, that share the host's
+# request budget (see crawlers/csula_pdf_scan/csula_pdf_scan/partitions.py).
+CRAWL_PARTITION_SECONDS = 30 * 60
+CRAWL_MAX_PARTITIONS = 4
+
+# Distributed crawls (run_all_spiders.py --distributed, --join): port of the
+# shared frontier service and its queue database; nodes on other machines
+# reach it at http://<this host>:CRAWL_FRONTIER_PORT (see frontier_service.py).
+CRAWL_FRONTIER_PORT = 8650
+CRAWL_FRONTIER_DB = TEMP_DIR / "crawl_frontier.db"
+
+# Incremental crawling (run_all_spiders.py --incremental): per-page ETag,
+# Last-Modified, content hash, links and sitemap lastmod from earlier crawls.
+# Unchanged pages are revalidated with conditional requests instead of
+# re-downloaded. Run a full crawl (--full) now and then to refresh the cache.
+CRAWL_INCREMENTAL = False
+CRAWL_CACHE_PATH = OUTPUT_DIR / "crawl_cache.db"
+
+# Request fingerprints per crawled host (crawler dupefilter), kept between
+# crawls so memory stays flat on large sites and recrawls know what's new.
+CRAWL_SEEN_DIR = OUTPUT_DIR / "crawl_seen"
+
+# Discovered PDF links are streamed into the discovered_pdf table while the
+# crawl runs; the scanner reads them from there. Set False to stop also
+# exporting each site's scanned_pdfs.txt at the end of a crawl.
+CRAWL_EXPORT_SCAN_FILES = True
+
+# Box share links: what each share holds (file name, downloadable, direct URL)
+# is cached here so the crawler, scanner and status refresh fetch a share page
+# once per TTL. Shares that couldn't be read are retried after the error TTL.
+BOX_CACHE_PATH = OUTPUT_DIR / "box_cache.db"
+BOX_CACHE_TTL = 7 * 24 * 3600        # seconds
+BOX_CACHE_ERROR_TTL = 3600           # seconds
+BOX_RESOLVE_WORKERS = 8              # share pages fetched at once when resolving a batch
+
+# PDF / parent page status checks (scan_refresh.refresh_status). Each distinct
+# URL is checked once, at most LINK_CHECK_PER_HOST at a time per host, and the
+# result is reused for LINK_CHECK_TTL seconds.
+LINK_CHECK_TTL = 24 * 3600           # seconds
+LINK_CHECK_CONCURRENCY = 32          # checks in flight overall
+LINK_CHECK_PER_HOST = 4              # checks in flight per host
+LINK_CHECK_TIMEOUT = 15              # seconds per request
+
 # =============================================================================
 # EMAIL SETTINGS
 # =============================================================================
@@ -217,6 +287,11 @@ MONTHLY_REPORT_TEMPLATE = OUTPUT_REPORTS_DIR / "monthly_report.html"
 EXCEL_REPORT_TIMESTAMP_FORMAT = "%Y-%m-%d_%H-%M-%S"
 EXCEL_REPORT_NAME_FORMAT = "{domain_name}-{timestamp}.xlsx"
 
+# Columnar analytics export (requires the optional pyarrow package).
+# Each scan run is written as a Hive-partitioned Parquet dataset:
+#   ANALYTICS_DIR/run_date=YYYY-MM-DD/site=<domain>/run<id>-0.parquet
+ANALYTICS_DIR = OUTPUT_DIR / "analytics"
+
 # =============================================================================
 # SCAN DOMAIN LIST
 # =============================================================================
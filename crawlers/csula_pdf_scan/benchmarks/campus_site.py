@@ -0,0 +1,608 @@
+"""
+A synthetic campus website for end-to-end crawl benchmarks.
+
+CampusSite builds a deterministic Drupal-like site from a seed and a page
+count. It has top-level sections with nested subsections, a shared main
+menu, breadcrumbs, section menus and cross-links between sections. PDFs are
+linked in all the ways the real sites link them:
+
+  * .pdf files under /sites/default/files/. Some of them are forms that are
+    linked from many pages;
+  * documents without a .pdf extension (/file/<fid>/download and
+    /ld.php?content_id=<fid>), served as application/pdf;
+  * Box share links (https://campus.app.box.com/s/<hash>). The share page
+    holds a downloadable PDF, a PDF with downloads disabled, or a Word file.
+
+The site also has what makes crawling the real sites expensive:
+
+  * every page is served again as /node/<nid> and /index.php/<path>, and
+    some pages have a /print/<nid> view. As on Drupal, the page links of an
+    /index.php/ page keep the prefix, so the whole site can be crawled
+    again under it;
+  * an events calendar whose month and day views link to the previous and
+    next ones forever;
+  * faceted search whose facet links combine without end;
+  * old paths that redirect, broken links and Word files.
+
+sitemap.xml lists only three quarters of the content pages, like the real
+sitemaps.
+
+CampusServer serves the site over HTTPS, acting as an HTTP proxy. Point a
+crawler's https_proxy at it. It answers CONNECT for the campus host and for
+Box with a self-signed certificate, since Scrapy doesn't verify
+certificates. It refuses every other host, so nothing leaves the machine.
+Every request is logged with the kind of URL it asked for, which is how
+crawl_benchmark.py counts wasted requests. ground_truth() lists the content
+pages and the (page, PDF) links a complete crawl should find.
+
+    cd crawlers/csula_pdf_scan
+    python benchmarks/campus_site.py --pages 3000 --port 8660
+    curl -k --proxy http://127.0.0.1:8660 https://campus.test/
+"""
+import argparse
+import hashlib
+import http.server
+import json
+import random
+import ssl
+import tempfile
+import threading
+import time
+from collections import deque, namedtuple
+from datetime import date, datetime, timedelta, timezone
+from html import escape
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+HOST = "campus.test"
+BOX_HOST = "campus.app.box.com"
+
+# (section, share of the pages, PDFs per page on average)
+SECTIONS = [
+    ("about", 1, 0.2),
+    ("academics", 3, 0.3),
+    ("admissions", 2, 0.4),
+    ("ecst", 4, 0.5),
+    ("business", 3, 0.3),
+    ("arts-letters", 2, 0.2),
+    ("library", 3, 0.6),
+    ("student-affairs", 3, 0.5),
+    ("financial-aid", 2, 1.2),
+    ("research", 2, 0.8),
+    ("hr", 2, 1.5),
+    ("accessibility", 1, 0.7),
+    ("events", 2, 0.1),
+    ("news", 3, 0.05),
+]
+# Sections that are sites of their own in drupal_site, next to the whole host.
+SUBSITES = ("ecst", "library", "financial-aid", "accessibility")
+# Deepest subsection level below a section's landing page.
+MAX_DEPTH = 6
+SITEMAP_SHARE = 0.75
+PRINT_SHARE = 0.3
+FORMS = 40
+NEWS_PER_LISTING = 10
+FACETS = ("news", "event", "page", "document", "person", "program")
+CALENDAR_MONTH = (2026, 10)
+
+WORDS = (
+    "academic advising alumni annual application archive assessment athletics budget calendar "
+    "campus career catalog center certificate clinic college committee community computing "
+    "counseling course curriculum dean degree department diversity enrollment equity faculty "
+    "fellowship finance forms gallery graduate grant guide handbook health housing innovation "
+    "internship journal laboratory leadership learning lecture library minor mission office "
+    "orientation outreach parking partnership policy program project procedures registrar "
+    "research resources safety scholarship schedule seminar services staff student studio "
+    "success support sustainability teaching technology testing transfer tutoring wellness workshop"
+).split()
+FILLER = (
+    "the a of to and in for with on by from at as is are be will can may our your their this "
+    "that each all new more students faculty staff campus please contact information available "
+    "during semester year through include provides offers requires help apply review submit "
+    "before after about within across office hours week spring fall summer winter deadline "
+    "meeting event support questions details online located building room open closed"
+).split()
+
+Page = namedtuple(
+    "Page",
+    ["path", "nid", "title", "section", "depth", "parent", "children", "links", "documents",
+     "in_sitemap", "printable", "lastmod"],
+)
+Response = namedtuple("Response", ["status", "content_type", "body", "kind", "location"])
+
+# What each kind of URL is worth to a PDF crawl; the first fetch of a useful
+# kind is needed, everything else (and every repeat) is a wasted request.
+USEFUL_KINDS = ("page", "listing", "sitemap", "document", "box")
+WASTED_KINDS = ("alias", "trap", "redirect", "missing", "binary", "pdf")
+
+
+class CampusSite:
+    """A deterministic synthetic campus site; see the module docstring."""
+
+    def __init__(self, pages=3000, seed=1, host=HOST):
+        self.host = host
+        self.seed = seed
+        self.pages = {}         # path -> Page
+        self.by_nid = {}        # nid -> Page
+        self.redirects = {}     # old path -> path
+        self.pdf_files = set()  # /sites/default/files/... paths
+        self.binaries = set()
+        self.downloads = {}     # fid -> file name
+        self.box_shares = {}    # share hash -> (kind, file name); kind is 'pdf', 'locked' or 'docx'
+        self.news = []
+        self._build(random.Random(seed), max(len(SECTIONS) + 1, pages))
+
+    # -- building ---------------------------------------------------------
+
+    def _slug(self, rng, parent_path):
+        base = "-".join(rng.sample(WORDS, 2))
+        path = f"{parent_path.rstrip('/')}/{base}"
+        n = 2
+        while path in self.pages:
+            path = f"{parent_path.rstrip('/')}/{base}-{n}"
+            n += 1
+        return path
+
+    def _add(self, rng, path, section, parent, depth, in_sitemap=True):
+        nid = 1000 + len(self.pages)
+        title = path.rstrip("/").rsplit("/", 1)[-1].replace("-", " ").title() or "Home"
+        lastmod = date(2026, 1, 1) + timedelta(days=rng.randrange(280))
+        page = Page(path, nid, title, section, depth, parent, [], [], [], in_sitemap,
+                    rng.random() < PRINT_SHARE, lastmod.isoformat())
+        self.pages[path] = page
+        self.by_nid[nid] = page
+        if parent is not None:
+            parent.children.append(page)
+        return page
+
+    def _build(self, rng, pages):
+        home = self._add(rng, "/", None, None, 0)
+        total_share = sum(share for _, share, _ in SECTIONS)
+        for section, share, _ in SECTIONS:
+            budget = max(1, round((pages - 1) * share / total_share))
+            landing = self._add(rng, f"/{section}", section, home, 0)
+            # Mostly breadth-first, with some deep runs like real subsections.
+            frontier = deque([landing])
+            made = 1
+            while frontier and made < budget:
+                parent = frontier.pop() if rng.random() < 0.3 else frontier.popleft()
+                for _ in range(rng.randint(2, 7)):
+                    if made >= budget:
+                        break
+                    child = self._add(rng, self._slug(rng, parent.path), section, parent, parent.depth + 1,
+                                      in_sitemap=rng.random() < SITEMAP_SHARE)
+                    made += 1
+                    if child.depth < MAX_DEPTH:
+                        frontier.append(child)
+        self.news = [page for page in self.pages.values() if page.section == "news" and page.depth > 0]
+
+        rates = {section: rate for section, _, rate in SECTIONS}
+        forms = [f"/sites/default/files/forms/{'-'.join(rng.sample(WORDS, 2))}-form-{n}.pdf" for n in range(FORMS)]
+        everything = list(self.pages.values())
+        for page in everything:
+            rate = rates.get(page.section, 0.2)
+            while rng.random() < rate / (1 + rate):
+                self._add_document(rng, page, forms)
+            for _ in range(rng.randint(0, 4)):
+                self._add_cross_link(rng, page, rng.choice(everything))
+
+    def _add_document(self, rng, page, forms):
+        n = len(page.documents) + 1
+        slug = page.path.rstrip("/").rsplit("/", 1)[-1] or "home"
+        roll = rng.random()
+        if roll < 0.6:
+            href = f"/sites/default/files/{page.section}/{slug}-{n}.pdf"
+            self.pdf_files.add(href)
+        elif roll < 0.72:
+            href = rng.choice(forms)
+            self.pdf_files.add(href)
+        elif roll < 0.86:
+            fid = 50_000 + len(self.downloads)
+            self.downloads[fid] = f"{slug}-{n}.pdf"
+            href = f"/file/{fid}/download" if roll < 0.8 else f"/ld.php?content_id={fid}"
+        elif roll < 0.96:
+            share = hashlib.sha1(f"{self.seed}:box:{len(self.box_shares)}".encode()).hexdigest()[:24]
+            kind = rng.choices(("pdf", "locked", "docx"), (7, 2, 1))[0]
+            self.box_shares[share] = (kind, f"{slug}-{n}.{'docx' if kind == 'docx' else 'pdf'}")
+            href = f"https://{BOX_HOST}/s/{share}"
+        else:
+            href = f"/sites/default/files/{page.section}/{slug}-{n}.docx"
+            self.binaries.add(href)
+        page.documents.append(href)
+
+    def _add_cross_link(self, rng, page, target):
+        roll = rng.random()
+        if roll < 0.08:
+            href = f"/node/{target.nid}"
+        elif roll < 0.11:
+            href = f"/index.php{target.path}"
+        elif roll < 0.13:
+            href = f"{target.path.rstrip('/')}/archived"
+        elif roll < 0.15:
+            href = f"/content/{target.nid}-{target.title.lower().replace(' ', '-')}"
+            self.redirects[href] = target.path
+        else:
+            href = target.path
+        page.links.append((href, target.title))
+
+    # -- ground truth -----------------------------------------------------
+
+    def url(self, href):
+        return href if href.startswith("https://") else f"https://{self.host}{href}"
+
+    def pdf_urls(self, page):
+        """The URLs a crawl should record as PDFs linked from page."""
+        urls = []
+        for href in page.documents:
+            if href.startswith(f"https://{BOX_HOST}/"):
+                if self.box_shares[href.rsplit("/", 1)[1]][0] == "pdf":
+                    urls.append(href)
+            elif href not in self.binaries:
+                urls.append(self.url(href))
+        return urls
+
+    def listing_pages(self):
+        return max(1, -(-len(self.news) // NEWS_PER_LISTING))
+
+    def ground_truth(self):
+        pages = [self.url(path) for path in self.pages]
+        pages += [self.url(f"/news?page={n}") for n in range(1, self.listing_pages())]
+        pdf_links = sorted({(self.url(page.path), pdf) for page in self.pages.values() for pdf in self.pdf_urls(page)})
+        return {
+            "host": self.host,
+            "seed": self.seed,
+            "sites": [self.host] + [f"{self.host}_{section}" for section in SUBSITES],
+            "pages": pages,
+            "sitemap_pages": sum(1 for page in self.pages.values() if page.in_sitemap),
+            "pdf_links": [list(pair) for pair in pdf_links],
+            "pdfs": sorted({pdf for _, pdf in pdf_links}),
+        }
+
+    # -- rendering --------------------------------------------------------
+
+    def _text(self, rng, words):
+        sentence = []
+        for _ in range(words):
+            sentence.append(rng.choice(WORDS) if rng.random() < 0.3 else rng.choice(FILLER))
+        return " ".join(sentence).capitalize() + "."
+
+    def _chrome(self, title, path, article, aside="", prefix=""):
+        menu = "".join(f'<li><a href="{prefix}/{section}">{section.replace("-", " ").title()}</a></li>'
+                       for section, _, _ in SECTIONS)
+        return (
+            '<!DOCTYPE html>\n<html lang="en"><head><meta charset="utf-8">'
+            f"<title>{escape(title)} | Campus</title>"
+            f'<link rel="canonical" href="{self.url(path)}"></head><body>'
+            f'<header><a href="{prefix}/" class="logo">Campus</a><nav class="main-menu"><ul>'
+            f'{menu}<li><a href="/events/calendar">Calendar</a></li><li><a href="/search">Search</a></li>'
+            f"</ul></nav></header>{article}{aside}"
+            f'<footer><a href="{prefix}/about">About</a> <a href="{prefix}/accessibility">Accessibility</a> '
+            '<a href="https://www.example.org/">Partner</a> <a href="mailto:web@campus.test">Webmaster</a>'
+            "</footer></body></html>"
+        )
+
+    def _article(self, page, prefix=""):
+        rng = random.Random(f"{self.seed}:{page.nid}")
+        items = [f'<a href="{escape(prefix + href if href in self.pages else href)}">{escape(text)}</a>'
+                 for href, text in page.links]
+        items += [f'<a href="{escape(href)}">{escape(href.rsplit("/", 1)[-1].split("=")[-1])} (document)</a>'
+                  for href in page.documents]
+        rng.shuffle(items)
+        paragraphs = []
+        for n in range(rng.randint(2, 5)):
+            text = self._text(rng, rng.randint(40, 90))
+            if items:
+                take = items[: rng.randint(1, 3)] if n < 4 else items
+                items = items[len(take):]
+                text += " See " + ", ".join(take) + "."
+            paragraphs.append(f"<p>{text}</p>")
+        paragraphs += [f"<p>See {item}.</p>" for item in items]
+        return f'<article class="node node--page"><h1>{escape(page.title)}</h1>{"".join(paragraphs)}</article>'
+
+    def _render_page(self, page, prefix=""):
+        crumbs, ancestor = [], page.parent
+        while ancestor is not None:
+            crumbs.append(f'<a href="{prefix}{ancestor.path}">{escape(ancestor.title)}</a>')
+            ancestor = ancestor.parent
+        related = page.children + [sibling for sibling in (page.parent.children if page.parent else [])
+                                   if sibling is not page][:10]
+        aside = "".join(f'<li><a href="{prefix}{child.path}">{escape(child.title)}</a></li>' for child in related)
+        extra = f'<a href="/print/{page.nid}" class="print">Print</a>' if page.printable else ""
+        if page.path == "/news":
+            extra += '<a href="/news?page=1">More news</a>'
+        article = (f'<nav class="breadcrumb">{" / ".join(reversed(crumbs))}</nav>'
+                   f'<main id="main-content">{self._article(page, prefix)}{extra}</main>')
+        return self._chrome(page.title, page.path, article, f'<aside class="sidebar"><ul>{aside}</ul></aside>', prefix)
+
+    def _render_print(self, page):
+        return (f'<!DOCTYPE html>\n<html lang="en"><head><meta charset="utf-8"><title>{escape(page.title)}</title>'
+                f'<link rel="canonical" href="{self.url(page.path)}"></head>'
+                f'<body class="print">{self._article(page)}</body></html>')
+
+    def _render_listing(self, n):
+        items = self.news[n * NEWS_PER_LISTING:(n + 1) * NEWS_PER_LISTING]
+        links = "".join(f'<li><a href="{page.path}">{escape(page.title)}</a></li>' for page in items)
+        pager = f'<a href="/news?page={n - 1}">Previous</a>' if n > 1 else '<a href="/news">Previous</a>'
+        if n + 1 < self.listing_pages():
+            pager += f' <a href="/news?page={n + 1}">Next</a>'
+        return self._chrome(f"News, page {n + 1}", f"/news?page={n}",
+                            f'<main id="main-content"><ul class="news">{links}</ul>{pager}</main>')
+
+    def _render_calendar(self, year, month, day=None):
+        """A month (or day) view: links to the neighbouring ones, with no end in either direction."""
+        if day is None:
+            first = date(year, month, 1)
+            previous = first - timedelta(days=1)
+            following = first + timedelta(days=32)
+            days = (following.replace(day=1) - first).days
+            links = [f'<a href="/events/calendar/{previous.year}/{previous.month:02d}">Previous month</a>',
+                     f'<a href="/events/calendar/{following.year}/{following.month:02d}">Next month</a>']
+            links += [f'<a href="/events/calendar/{year}/{month:02d}/{d:02d}">{d}</a>' for d in range(1, days + 1)]
+            title = f"Calendar, {first:%B %Y}"
+        else:
+            today = date(year, month, day)
+            links = [f'<a href="/events/calendar/{year}/{month:02d}">Month</a>']
+            for other in (today - timedelta(days=1), today + timedelta(days=1)):
+                links.append(f'<a href="/events/calendar/{other.year}/{other.month:02d}/{other.day:02d}">{other}</a>')
+            title = f"Calendar, {today}"
+        events = [page for page in self.pages.values() if page.section == "events" and page.depth > 0]
+        rng = random.Random(f"{self.seed}:calendar:{year}:{month}:{day}")
+        links += [f'<a href="{page.path}">{escape(page.title)}</a>' for page in rng.sample(events, min(3, len(events)))]
+        return self._chrome(title, f"/events/calendar/{year}/{month:02d}",
+                            f'<main id="main-content"><h1>{title}</h1>{" ".join(links)}</main>')
+
+    def _render_search(self, query):
+        params = parse_qsl(query)
+        chosen = [value for key, value in params if key.startswith("f[")]
+        page = next((int(value) for key, value in params if key == "page" and value.isdigit()), 0)
+        links = []
+        for facet in FACETS:
+            if f"type:{facet}" not in chosen:
+                more = [("keys", "")] + [(f"f[{n}]", value) for n, value in enumerate(chosen + [f"type:{facet}"])]
+                links.append(f'<a href="/search?{escape(urlencode(more))}">{facet}</a>')
+        base = [(key, value) for key, value in params if key != "page"] or [("keys", "")]
+        links.append(f'<a href="/search?{escape(urlencode(base + [("page", page + 1)]))}">Next</a>')
+        return self._chrome("Search", "/search", f'<main id="main-content"><h1>Search</h1>{" ".join(links)}</main>')
+
+    def _render_sitemap(self):
+        entries = "".join(
+            f"<url><loc>{self.url(page.path)}</loc><lastmod>{page.lastmod}</lastmod></url>"
+            for page in self.pages.values() if page.in_sitemap
+        )
+        return ('<?xml version="1.0" encoding="UTF-8"?>\n'
+                f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>')
+
+    def _render_box(self, share):
+        kind, name = self.box_shares[share]
+        item = {"type": "file", "id": int(share[:8], 16), "name": name,
+                "extension": "docx" if kind == "docx" else "pdf", "canDownload": kind != "locked"}
+        stream = {"/app-api/enduserapp/shared-item": {"itemID": item["id"], "itemType": "file"},
+                  "/app-api/enduserapp/shared-folder": {"items": [item]}}
+        return (f"<!DOCTYPE html>\n<html><head><title>{escape(name)} | Powered by Box</title></head><body>"
+                f'<div id="app"></div><script>Box.postStreamData = {json.dumps(stream, separators=(",", ":"))};</script></body></html>')
+
+    @staticmethod
+    def _pdf_body(name):
+        return (f"%PDF-1.4\n% {name}\n1 0 obj << /Type /Catalog >> endobj\ntrailer << /Root 1 0 R >>\n%%EOF\n").encode()
+
+    # -- serving ----------------------------------------------------------
+
+    def serves(self, host):
+        host = host.lower()
+        return host == self.host or host.endswith("." + self.host) or host == BOX_HOST
+
+    def respond(self, host, target):
+        """Response for one GET of target (path and query) on host."""
+        host = host.lower()
+        parts = urlsplit(target)
+        path, query = parts.path or "/", parts.query
+        if host == BOX_HOST:
+            share = path[3:].rstrip("/") if path.startswith("/s/") else None
+            if share in self.box_shares:
+                return self._html(self._render_box(share), "box")
+            return self._missing()
+
+        if path == "/sitemap.xml":
+            return Response(200, "application/xml", self._render_sitemap().encode(), "sitemap", None)
+        page = self.pages.get(path if path == "/" else path.rstrip("/"))
+        if page is not None:
+            if path == "/news" and query:
+                n = next((int(value) for key, value in parse_qsl(query) if key == "page" and value.isdigit()), 0)
+                if 0 < n < self.listing_pages():
+                    return self._html(self._render_listing(n), "listing")
+                return self._missing()
+            # The same page under a query string is a duplicate of it.
+            return self._html(self._render_page(page), "alias" if query else "page")
+
+        head, _, rest = path.lstrip("/").partition("/")
+        if head == "node" and rest.isdigit() and int(rest) in self.by_nid:
+            return self._html(self._render_page(self.by_nid[int(rest)]), "alias")
+        if head == "print" and rest.isdigit() and int(rest) in self.by_nid:
+            return self._html(self._render_print(self.by_nid[int(rest)]), "alias")
+        if head == "index.php" and (("/" + rest).rstrip("/") or "/") in self.pages:
+            return self._html(self._render_page(self.pages[("/" + rest).rstrip("/") or "/"], "/index.php"), "alias")
+        if path in self.redirects:
+            return Response(301, "text/html", b"", "redirect", self.url(self.redirects[path]))
+        if path in self.pdf_files:
+            return Response(200, "application/pdf", self._pdf_body(path.rsplit("/", 1)[1]), "pdf", None)
+        if path in self.binaries:
+            return Response(200, "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                            b"PK\x03\x04" + bytes(2048), "binary", None)
+        fid = None
+        if head == "file" and rest.endswith("/download") and rest.split("/")[0].isdigit():
+            fid = int(rest.split("/")[0])
+        elif path == "/ld.php":
+            fid = next((int(value) for key, value in parse_qsl(query) if key == "content_id" and value.isdigit()), None)
+        if fid in self.downloads:
+            return Response(200, "application/pdf", self._pdf_body(self.downloads[fid]), "document", None)
+        if path.startswith("/events/calendar"):
+            numbers = [int(part) for part in path.split("/")[3:] if part.isdigit()]
+            year, month = numbers[:2] if len(numbers) >= 2 else CALENDAR_MONTH
+            day = numbers[2] if len(numbers) > 2 else None
+            try:
+                date(year, month, day or 1)
+            except ValueError:
+                return self._missing()
+            return self._html(self._render_calendar(year, month, day), "trap")
+        if path == "/search":
+            return self._html(self._render_search(query), "trap")
+        return self._missing()
+
+    @staticmethod
+    def _html(text, kind):
+        return Response(200, "text/html; charset=utf-8", text.encode(), kind, None)
+
+    @staticmethod
+    def _missing():
+        return Response(404, "text/html; charset=utf-8", b"<html><body><h1>Page not found</h1></body></html>",
+                        "missing", None)
+
+
+def make_certificate(directory, host=HOST):
+    """A self-signed certificate and key for host (and Box) in directory; returns their paths."""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, host)])
+    now = datetime.now(timezone.utc)
+    certificate = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=30))
+        .add_extension(x509.SubjectAlternativeName(
+            [x509.DNSName(host), x509.DNSName(f"*.{host}"), x509.DNSName(BOX_HOST)]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    certfile, keyfile = directory / "campus-cert.pem", directory / "campus-key.pem"
+    certfile.write_bytes(certificate.public_bytes(serialization.Encoding.PEM))
+    keyfile.write_bytes(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                          serialization.NoEncryption()))
+    return certfile, keyfile
+
+
+class _CampusHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def handle(self):
+        try:
+            super().handle()
+        except (ssl.SSLError, ConnectionError, TimeoutError):
+            pass  # a client dropping its connection mid-request
+
+    def do_CONNECT(self):
+        host = self.path.rsplit(":", 1)[0]
+        if not self.server.site.serves(host):
+            self.send_error(403, "Only the synthetic campus is served here")
+            self.close_connection = True
+            return
+        self.send_response(200, "Connection established")
+        self.end_headers()
+        self.wfile.flush()
+        # Everything after this on the connection is TLS to the campus host.
+        self.connection = self.server.tls.wrap_socket(self.connection, server_side=True)
+        self.rfile = self.connection.makefile("rb")
+        self.wfile = self.connection.makefile("wb")
+
+    def do_GET(self, head=False):
+        if self.path.startswith(("http://", "https://")):
+            parts = urlsplit(self.path)
+            host = parts.hostname or ""
+            target = parts.path + (f"?{parts.query}" if parts.query else "")
+        else:
+            host = (self.headers.get("Host") or "").rsplit(":", 1)[0]
+            target = self.path
+        if not self.server.site.serves(host):
+            self.send_error(403, "Only the synthetic campus is served here")
+            return
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        response = self.server.site.respond(host, target)
+        self.server.record(host, target, response)
+        self.send_response(response.status)
+        self.send_header("Content-Type", response.content_type)
+        self.send_header("Content-Length", str(len(response.body)))
+        if response.location:
+            self.send_header("Location", response.location)
+        self.end_headers()
+        if not head:
+            self.wfile.write(response.body)
+
+    def do_HEAD(self):
+        self.do_GET(head=True)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CampusServer(http.server.ThreadingHTTPServer):
+    """
+    Serves a CampusSite to clients that use it as their HTTP(S) proxy.
+    log holds (time, host, target, status, kind) for every request.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, site, certfile, keyfile, address=("127.0.0.1", 0), latency=0.0):
+        super().__init__(address, _CampusHandler)
+        self.site = site
+        self.latency = latency
+        self.tls = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self.tls.load_cert_chain(certfile, keyfile)
+        self.log = []
+        self._log_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def proxy_url(self):
+        return f"http://{self.server_address[0]}:{self.server_address[1]}"
+
+    def record(self, host, target, response):
+        with self._log_lock:
+            self.log.append((time.time(), host, target, response.status, response.kind))
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="campus-site", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, default=3000, help="content pages to generate (default 3000)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8660)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--truth", type=Path, default=None, help="write the ground truth JSON here")
+    args = parser.parse_args()
+
+    site = CampusSite(args.pages, args.seed)
+    truth = site.ground_truth()
+    if args.truth:
+        args.truth.write_text(json.dumps(truth, indent=2), encoding="utf-8")
+    certfile, keyfile = make_certificate(Path(tempfile.gettempdir()) / "campus_site")
+    server = CampusServer(site, certfile, keyfile, ("127.0.0.1", args.port), args.latency)
+    print(f"{len(truth['pages'])} pages, {len(truth['pdfs'])} PDFs in {len(truth['pdf_links'])} links; "
+          f"sites {', '.join(truth['sites'])}")
+    print(f"Proxy for https://{site.host}/ at {server.proxy_url} (Ctrl-C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+
+if __name__ == "__main__":
+    main()
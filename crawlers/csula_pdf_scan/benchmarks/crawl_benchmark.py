@@ -0,0 +1,228 @@
+"""
+End-to-end crawl benchmark against the synthetic campus site (campus_site.py).
+
+Generates the site, serves it on a local proxy and crawls it the way
+production does: run_all_spiders.py over the campus sites registered in a
+scratch database. With --spider it runs 'scrapy crawl site' on its own
+instead, which takes -s NAME=VALUE setting overrides. The crawl runs with
+PDF_SCAN_WORK_DIR set to a scratch folder, so its database, output and temp
+files stay there. Its requests go through the proxy (https_proxy), so it
+never reaches a real host. It then reports:
+
+  * requests and pages per second over the crawl (first to last request);
+  * wasted requests by kind:
+      - aliases (/node/NNN, /index.php/..., print views);
+      - trap pages (calendar, faceted search);
+      - redirects, broken links, Word files and direct PDF downloads;
+      - repeats of a URL already fetched;
+  * content pages reached, and PDFs and (page, PDF) links found, against
+    the site's ground truth. Links recorded from alias pages are counted
+    on their own.
+
+    cd crawlers/csula_pdf_scan
+    python benchmarks/crawl_benchmark.py                      # 1000 pages, run_all_spiders.py
+    python benchmarks/crawl_benchmark.py --pages 3000 --spider -s DOWNLOAD_DELAY=0 -s AUTOTHROTTLE_ENABLED=0
+    python benchmarks/crawl_benchmark.py -- --distributed --nodes 3
+    python benchmarks/crawl_benchmark.py --json results.json  # also save the numbers
+
+The crawl keeps the project's politeness settings (config.CRAWL_HOST_RATE
+and the spider's download delay), so pages per second is what a real crawl
+of such a site would get, about 4 requests a second, so the default run
+takes about ten minutes. --latency adds a fixed server response time. The
+--spider run above drops the delays and takes seconds.
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SPIDER_DIR = BENCH_DIR.parent
+PROJECT_ROOT = SPIDER_DIR.parent.parent
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(SPIDER_DIR))
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from campus_site import USEFUL_KINDS, WASTED_KINDS, CampusServer, CampusSite, make_certificate
+
+DEFAULT_WORK_DIR = Path(tempfile.gettempdir()) / "csula_crawl_benchmark"
+TELEMETRY_RUN = "benchmark"
+
+
+def register_sites(database_path, keys):
+    """The campus sites in drupal_site, where run_all_spiders.py reads them."""
+    from src.core.database import create_site_table
+
+    conn = sqlite3.connect(database_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(create_site_table)
+    conn.executemany("INSERT INTO drupal_site (domain_name) VALUES (?)", [(key,) for key in keys])
+    conn.commit()
+    conn.close()
+
+
+def crawl_command(args, keys):
+    if not args.spider:
+        return [sys.executable, str(SPIDER_DIR / "run_all_spiders.py"), "--full", "--no-partition",
+                *args.runner_args]
+    command = [sys.executable, "-m", "scrapy", "crawl", "site", "-a", "sites=" + ",".join(keys),
+               "-s", f"CRAWL_TELEMETRY_RUN={TELEMETRY_RUN}"]
+    for setting in args.set:
+        command += ["-s", setting]
+    return command
+
+
+def crawl_env(work_dir, proxy_url):
+    env = os.environ.copy()
+    env["PDF_SCAN_WORK_DIR"] = str(work_dir)
+    env["PYTHONPATH"] = str(SPIDER_DIR) + os.pathsep + env.get("PYTHONPATH", "")
+    for name in ("https_proxy", "http_proxy"):
+        env[name] = env[name.upper()] = proxy_url
+    env["no_proxy"] = env["NO_PROXY"] = "127.0.0.1,localhost"
+    return env
+
+
+def found_links(database_path):
+    """Distinct (parent, PDF) pairs the crawl recorded in discovered_pdf."""
+    conn = sqlite3.connect(database_path, timeout=30)
+    try:
+        return set(conn.execute("SELECT DISTINCT parent_uri, pdf_uri FROM discovered_pdf").fetchall())
+    except sqlite3.OperationalError:
+        return set()  # the crawl never got far enough to create the table
+    finally:
+        conn.close()
+
+
+def analyze(log, truth, links):
+    """Benchmark numbers from the server's request log and the crawl's PDF links."""
+    useful, wasted = Counter(), Counter({kind: 0 for kind in WASTED_KINDS + ("repeat",)})
+    seen, fetched_pages = set(), set()
+    for _, host, target, _, kind in sorted(log):
+        if (host, target) in seen:
+            wasted["repeat"] += 1
+            continue
+        seen.add((host, target))
+        if kind in USEFUL_KINDS:
+            useful[kind] += 1
+            if kind in ("page", "listing"):
+                fetched_pages.add(f"https://{host}{target}")
+        else:
+            wasted[kind] += 1
+
+    seconds = (log[-1][0] - log[0][0]) if len(log) > 1 else 0.0
+    html_pages = sum(1 for entry in log if entry[4] not in ("sitemap", "document", "binary", "pdf", "redirect"))
+    truth_pages = set(truth["pages"])
+    truth_links = {tuple(pair) for pair in truth["pdf_links"]}
+    truth_pdfs = set(truth["pdfs"])
+    found_pdfs = {pdf for _, pdf in links}
+    return {
+        "requests": len(log),
+        "crawl_seconds": round(seconds, 1),
+        "requests_per_second": round(len(log) / seconds, 2) if seconds else None,
+        "pages_per_second": round(html_pages / seconds, 2) if seconds else None,
+        "useful": dict(useful),
+        "wasted": dict(wasted),
+        "wasted_total": sum(wasted.values()),
+        "pages_reached": len(fetched_pages & truth_pages),
+        "pages_total": len(truth_pages),
+        "pdfs_found": len(found_pdfs & truth_pdfs),
+        "pdfs_total": len(truth_pdfs),
+        "links_found": len(links & truth_links),
+        "links_total": len(truth_links),
+        # Same PDFs recorded again under /node/NNN, print views, ...
+        "links_from_aliases": sum(1 for parent, pdf in links - truth_links if pdf in truth_pdfs),
+        "unexpected_pdfs": sorted(found_pdfs - truth_pdfs),
+    }
+
+
+def _share(part, whole):
+    return f"{part / whole:.1%}" if whole else "-"
+
+
+def print_report(results, truth, command, wall_seconds):
+    useful, wasted = results["useful"], results["wasted"]
+    print(f"")
+    print(f"Campus site    : {results['pages_total']} pages, {results['pdfs_total']} PDFs in "
+          f"{results['links_total']} links (seed {truth['seed']}), sites {', '.join(truth['sites'])}")
+    print(f"Crawl          : {' '.join(Path(part).name if n < 2 else part for n, part in enumerate(command))}")
+    print(f"Time           : {wall_seconds:.1f} s wall, {results['crawl_seconds']} s from first to last request")
+    print(f"Requests       : {results['requests']}  ({results['requests_per_second']}/s), "
+          f"HTML pages {results['pages_per_second']}/s")
+    print(f"Useful         : {sum(useful.values())}  "
+          f"({', '.join(f'{kind} {useful.get(kind, 0)}' for kind in USEFUL_KINDS)})")
+    print(f"Wasted         : {results['wasted_total']}  ({_share(results['wasted_total'], results['requests'])}: "
+          f"{', '.join(f'{kind} {count}' for kind, count in wasted.items())})")
+    print(f"Pages reached  : {results['pages_reached']} / {results['pages_total']}  "
+          f"({_share(results['pages_reached'], results['pages_total'])})")
+    print(f"PDFs found     : {results['pdfs_found']} / {results['pdfs_total']}  "
+          f"({_share(results['pdfs_found'], results['pdfs_total'])}), links {results['links_found']} / "
+          f"{results['links_total']}  ({_share(results['links_found'], results['links_total'])})")
+    print(f"Extra          : {results['links_from_aliases']} links recorded from alias pages, "
+          f"{len(results['unexpected_pdfs'])} PDFs not in the site")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pages", type=int, default=1000, help="content pages to generate (default 1000)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--spider", action="store_true", help="run 'scrapy crawl site' instead of run_all_spiders.py")
+    parser.add_argument("-s", "--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="Scrapy setting for --spider runs (repeatable)")
+    parser.add_argument("--work-dir", type=Path, default=DEFAULT_WORK_DIR,
+                        help=f"scratch folder, emptied first (default {DEFAULT_WORK_DIR})")
+    parser.add_argument("--json", type=Path, default=None, help="also write the results here")
+    parser.add_argument("runner_args", nargs="*", help="extra run_all_spiders.py arguments, after --")
+    args = parser.parse_args()
+    if args.set and not args.spider:
+        parser.error("-s/--set needs --spider (run_all_spiders.py takes no setting overrides)")
+
+    work_dir = args.work_dir.resolve()
+    shutil.rmtree(work_dir, ignore_errors=True)
+    (work_dir / "output").mkdir(parents=True)
+    # config reads PDF_SCAN_WORK_DIR when first imported.
+    os.environ["PDF_SCAN_WORK_DIR"] = str(work_dir)
+    import config
+    from csula_pdf_scan.telemetry import format_summary, load_run, summarize
+
+    site = CampusSite(args.pages, args.seed)
+    truth = site.ground_truth()
+    (work_dir / "ground_truth.json").write_text(json.dumps(truth, indent=2), encoding="utf-8")
+    register_sites(config.DATABASE_PATH, truth["sites"])
+    certfile, keyfile = make_certificate(work_dir)
+    server = CampusServer(site, certfile, keyfile, latency=args.latency).start()
+
+    command = crawl_command(args, truth["sites"])
+    log_path = work_dir / "crawl.log"
+    print(f"Crawling {len(truth['pages'])} synthetic pages through {server.proxy_url} (log → {log_path})")
+    started = time.monotonic()
+    with open(log_path, "w") as log_file:
+        result = subprocess.run(command, cwd=str(SPIDER_DIR), env=crawl_env(work_dir, server.proxy_url),
+                                stdout=log_file, stderr=subprocess.STDOUT)
+    wall_seconds = time.monotonic() - started
+    server.stop()
+    if result.returncode != 0:
+        print(f"Crawl exited with {result.returncode}; see {log_path}")
+
+    results = analyze(server.log, truth, found_links(config.DATABASE_PATH))
+    print_report(results, truth, command, wall_seconds)
+    reports = load_run()
+    if reports:
+        print(f"")
+        print(format_summary(summarize(reports), reports[0]["run"]))
+    if args.json:
+        results.update(pages=args.pages, seed=args.seed, latency=args.latency, command=command[1:],
+                       wall_seconds=round(wall_seconds, 1), returncode=result.returncode)
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    sys.exit(1 if result.returncode else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Micro-benchmark: link extraction and classification per crawled page.
+
+Compares SiteSpider's previous path (response.css('a::attr(href)') plus
+urlparse-based checks for every link) with the one in csula_pdf_scan/links.py
+(one regex pass, cached joins, precomputed scopes), on the saved pages in
+fixtures/. Both paths must produce the same PDF / Box / followable links.
+
+    cd crawlers/csula_pdf_scan
+    python benchmarks/link_extraction.py            # default 200 rounds
+    python benchmarks/link_extraction.py --rounds 1000
+
+"Cold" builds a new LinkClassifier and clears the join cache for every page,
+like the first page of a crawl. "Warm" keeps them, so it is the best case of
+a page whose links were all seen before (a site's shared menus and footer).
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlparse
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from scrapy.http import HtmlResponse
+
+from csula_pdf_scan import links as fast_links
+from csula_pdf_scan.links import LinkClassifier, extract_links
+from csula_pdf_scan.sites import in_scope, site_target
+
+FIXTURES = BENCH_DIR / "fixtures"
+HOST = "calstatela.edu"
+SITES = [site_target(key) for key in ("calstatela.edu", "calstatela.edu_ecst", "calstatela.edu_accessibility")]
+PAGE_URL = "https://www.calstatela.edu/ecst/page"
+
+
+def legacy_links(response):
+    """SiteSpider.parse/_follow_links before links.py, minus the requests."""
+    links = [response.urljoin(link) for link in response.css('a::attr(href)').getall()]
+
+    def is_http_url(url: str) -> bool:
+        try:
+            parsed = urlparse(url)
+        except Exception:
+            return False
+        return parsed.scheme in ("http", "https", "")
+
+    def is_internal(url: str) -> bool:
+        parsed = urlparse(url)
+        if not parsed.netloc:
+            return True
+        return parsed.netloc.lower().endswith(HOST)
+
+    pdfs, box, follow = [], [], []
+    for absolute_url in links:
+        if not is_http_url(absolute_url):
+            continue
+        if absolute_url.lower().endswith('.pdf'):
+            pdfs.append(absolute_url)
+        elif 'box.com' in absolute_url:
+            box.append(absolute_url)
+        elif is_internal(absolute_url) and [site for site in SITES if in_scope(site, absolute_url)]:
+            follow.append(absolute_url)
+    return pdfs, box, follow
+
+
+def fast_path(response, classifier):
+    pdfs, box, follow = [], [], []
+    sorted_links = {LinkClassifier.PDF: pdfs, LinkClassifier.BOX: box, LinkClassifier.FOLLOW: follow}
+    for url in extract_links(response):
+        kind, _ = classifier.classify(url)
+        if kind is not None:
+            sorted_links[kind].append(url)
+    return pdfs, box, follow
+
+
+def responses(bodies):
+    # A new response per call: Scrapy caches the decoded text and base URL per response.
+    return [HtmlResponse(PAGE_URL, body=body, encoding="utf-8") for body in bodies]
+
+
+def timed(rounds, bodies, run):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for response in responses(bodies):
+            run(response)
+    return (time.perf_counter() - start) / (rounds * len(bodies)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    fixtures = sorted(FIXTURES.glob("*.html"))
+    print(f"{'fixture':<26}{'links':>7}{'legacy ms':>11}{'cold ms':>9}{'warm ms':>9}{'speedup (cold/warm)':>21}")
+    for path in fixtures:
+        body = path.read_bytes()
+        expected = legacy_links(responses([body])[0])
+        got = fast_path(responses([body])[0], LinkClassifier(HOST, SITES))
+        if got != expected:
+            for name, old, new in zip(("pdf", "box", "follow"), expected, got):
+                if old != new:
+                    print(f"  {name}: only legacy {sorted(set(old) - set(new))[:5]}, "
+                          f"only fast {sorted(set(new) - set(old))[:5]}")
+            sys.exit(f"{path.name}: link paths disagree")
+
+        def cold(response):
+            fast_links._join_from_origin.cache_clear()
+            fast_path(response, LinkClassifier(HOST, SITES))
+
+        warm_classifier = LinkClassifier(HOST, SITES)
+        legacy_ms = timed(args.rounds, [body], legacy_links)
+        cold_ms = timed(args.rounds, [body], cold)
+        warm_ms = timed(args.rounds, [body], lambda response: fast_path(response, warm_classifier))
+        print(f"{path.name:<26}{sum(map(len, expected)):>7}{legacy_ms:>11.3f}{cold_ms:>9.3f}"
+              f"{warm_ms:>9.3f}{legacy_ms / cold_ms:>14.1f}x /{legacy_ms / warm_ms:>4.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,31 @@
+"""
+Box.com share links: find out what a share holds, and download it.
+
+The crawler (SiteSpider.parse_box), the scanner and scan_refresh's status
+checks all need the same answer for a share link: its file name, whether the
+owner allows downloads, and the direct download URL. BoxResolver
+
+  * keeps that answer in a persistent SQLite cache (config.BOX_CACHE_PATH)
+    for config.BOX_CACHE_TTL seconds, so each share page is fetched once per
+    TTL instead of at every step. Shares that couldn't be read (error pages,
+    no PDF item) are kept for config.BOX_CACHE_ERROR_TTL, and network errors
+    are not cached at all;
+  * fetches share pages once each, over one pooled requests.Session per
+    process, and resolves batches concurrently (resolve_box_shares);
+  * reads the Box.postStreamData script with regular expressions instead of
+    parsing the whole page;
+  * downloads files into memory. Each scan worker writes the bytes to its own
+    temp file, so parallel workers never share a path.
+"""
 import json
+import os
 import re
+import sqlite3
 import sys
-import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 # Add project root to path for imports
 # box_handler.py is at: CSULA-homegrownPAC/crawlers/csula_pdf_scan/csula_pdf_scan/box_handler.py
@@ -12,62 +36,182 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 import requests
-from bs4 import BeautifulSoup
-import lxml
-from src.data_management.data_import import add_pdf_report_failure
-
-
-def get_box_contents(box_url):
-    page_request = requests.get(box_url)
-    print("CHECKING", box_url)
-    if not page_request.ok:
-        # add_pdf_report_failure(box_url, parent_uri, domain_id, f"Couldn't download {page_request.status_code}")
-        return False, "Can't Access PDF"
-
-    page_request = requests.get(box_url)
-
-    if page_request:
-        page_html = BeautifulSoup(page_request.content, features="lxml")
+from requests.adapters import HTTPAdapter
 
-        page_scripts = page_html.find_all("script")
-        expression = re.compile(r"Box\.postStreamData")
-        items_expression = re.compile(r'"items":\[\{.*.}]')
-        print(page_scripts)
-        for script in page_scripts:
-            if expression.search(script.text):
+import config
 
-                clean_text = script.text.replace("'","")
+BoxShare = namedtuple("BoxShare", ["share_url", "file_name", "downloadable", "download_url", "error"])
 
-                items = items_expression.search(clean_text)
+direct_download_url = "https://sfsu.app.box.com/public/static/{share_hash}.{extension}"
 
-                raw_string_dict = f"{{{items.group()}}}"
+_SHARE_PATTERN = re.compile(r'https:\/\/[a-zA-Z0-9.-]*\.box\.com\/s\/[a-zA-Z0-9]+')
+_SCRIPTS = re.compile(r"<script\b[^>]*>(.*?)</script\s*>", re.IGNORECASE | re.DOTALL)
+_ITEMS = re.compile(r'"items":\[\{.*.}]')
 
+create_box_share = """
+CREATE TABLE IF NOT EXISTS box_share (
+    share_url TEXT PRIMARY KEY,
+    file_name TEXT,
+    downloadable BOOLEAN NOT NULL DEFAULT 0,
+    download_url TEXT,
+    error TEXT,                -- why the share can't be scanned, if it can't
+    resolved_at REAL NOT NULL  -- time.time() of the share page fetch
+);
+"""
 
-                json_dict = json.loads(raw_string_dict)
-                for item in json_dict['items']:
-                    if item['extension'] == "pdf":
-
-                        if item["canDownload"] == False:
-                            print("Box File is not downloadable")
-                            return False, "Box File is not downloadable"
-
-                        print(item)
-                        print(item['name'])
-                        return True, box_url, item['name']
 
+def box_share_pattern_match(url):
+    # Pattern to match the specific domain and extract the hash.
+    match = _SHARE_PATTERN.match(url)
+    return True if match else False
 
 
+def parse_share_page(share_url, page_text):
+    """
+    BoxShare for a share page's HTML. The first PDF item in the page's
+    Box.postStreamData script is the file; a share with no PDF item, or one
+    whose owner disabled downloads, comes back with an error.
+    """
+    for script in _SCRIPTS.findall(page_text):
+        if "Box.postStreamData" not in script:
+            continue
+        items = _ITEMS.search(script.replace("'", ""))
+        if not items:
+            continue
+        try:
+            stream_items = json.loads(f"{{{items.group()}}}")["items"]
+        except (ValueError, KeyError):
+            continue
+        for item in stream_items:
+            if item.get("extension") != "pdf":
+                continue
+            if item.get("canDownload") is False:
+                return BoxShare(share_url, item.get("name"), False, None, "Box File is not downloadable")
+            share_hash = share_url.rstrip("/").split("/")[-1]
+            download_url = direct_download_url.format(share_hash=share_hash, extension="pdf")
+            return BoxShare(share_url, item.get("name"), True, download_url, None)
+    return BoxShare(share_url, None, False, None, "No PDF found in Box share")
+
+
+class BoxShareCache:
+    """share_url -> BoxShare, in SQLite, with per-entry expiry."""
+
+    def __init__(self, path, ttl, error_ttl):
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self.conn = sqlite3.connect(str(path), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(create_box_share)
+        self.conn.commit()
+        self.lock = threading.Lock()
+
+    def get(self, share_url):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT share_url, file_name, downloadable, download_url, error, resolved_at "
+                "FROM box_share WHERE share_url = ?",
+                (share_url,),
+            ).fetchone()
+        if row is None:
+            return None
+        share, resolved_at = BoxShare(row[0], row[1], bool(row[2]), row[3], row[4]), row[5]
+        # Shares that couldn't be read are retried sooner.
+        ttl = self.error_ttl if share.error and share.file_name is None else self.ttl
+        return share if time.time() - resolved_at < ttl else None
+
+    def store(self, share):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO box_share "
+                "(share_url, file_name, downloadable, download_url, error, resolved_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (share.share_url, share.file_name, share.downloadable, share.download_url, share.error, time.time()),
+            )
+            self.conn.commit()
+
+
+class BoxResolver:
+    """Resolves and downloads Box shares over one pooled session, through a BoxShareCache."""
+
+    def __init__(self, cache, workers=8, timeout=30):
+        self.cache = cache
+        self.workers = workers
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(workers, 10))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def resolve(self, share_url):
+        """BoxShare for share_url, from the cache when fresh."""
+        share = self.cache.get(share_url)
+        if share is not None:
+            return share
+        try:
+            page = self.session.get(share_url, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            # Not cached: a network hiccup says nothing about the share.
+            return BoxShare(share_url, None, False, None, f"Can't Access PDF: {str(e)[:100]}")
+        if not page.ok:
+            share = BoxShare(share_url, None, False, None, "Can't Access PDF")
+        else:
+            share = parse_share_page(share_url, page.text)
+        self.cache.store(share)
+        return share
+
+    def resolve_many(self, share_urls):
+        """{share_url: BoxShare} for every distinct URL, fetching uncached ones concurrently."""
+        share_urls = list(dict.fromkeys(share_urls))
+        if len(share_urls) <= 1 or self.workers <= 1:
+            return {url: self.resolve(url) for url in share_urls}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return dict(zip(share_urls, executor.map(self.resolve, share_urls)))
+
+    def download(self, share_url):
+        """(True, pdf_bytes, BoxShare) or (False, error_message, BoxShare)."""
+        share = self.resolve(share_url)
+        if not share.downloadable:
+            return False, share.error, share
+        try:
+            response = self.session.get(share.download_url, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            return False, f"Download failed: {str(e)[:100]}", share
+        if not response.ok:
+            return False, f"Couldn't download {response.status_code}", share
+        return True, response.content, share
+
+
+_resolver = None
+_resolver_pid = None
+
+
+def get_resolver():
+    """This process's BoxResolver (a forked scan worker gets its own session and connection)."""
+    global _resolver, _resolver_pid
+    if _resolver is None or _resolver_pid != os.getpid():
+        cache = BoxShareCache(config.BOX_CACHE_PATH, config.BOX_CACHE_TTL, config.BOX_CACHE_ERROR_TTL)
+        _resolver = BoxResolver(cache, workers=config.BOX_RESOLVE_WORKERS)
+        _resolver_pid = os.getpid()
+    return _resolver
+
+
+def resolve_box_shares(share_urls):
+    """Warm the cache for a batch of share links; returns {share_url: BoxShare}."""
+    return get_resolver().resolve_many(url for url in share_urls if box_share_pattern_match(url))
 
 
-temp_pdf_path = "C:\\Users\\913678186\\IdeaProjects\\csula_pdf_website_scan\\temp\\temp.pdf"
+def get_box_contents(box_url):
+    """(True, box_url, file_name) if the share is a downloadable PDF, else (False, reason)."""
+    share = get_resolver().resolve(box_url)
+    if share.downloadable:
+        return True, box_url, share.file_name
+    return False, share.error
 
-import re
-import requests
 
 def download_from_box(box_link, loc=None, domain_id=None, head=False):
     """
     Given a Box share link, either returns the direct download link (if head is True)
-    or downloads the PDF to a local path (loc) if the file is found.
+    or downloads the PDF into memory.
 
     Parameters:
         box_link (str): The Box share link.
@@ -76,44 +220,17 @@ def download_from_box(box_link, loc=None, domain_id=None, head=False):
         head (bool): If True, simply returns the direct download URL without downloading.
 
     Returns:
-        tuple: (True, download_url or empty string) on success, (False, error_message) on failure.
+        head=True: the download URL (str), or (False, error_message).
+        otherwise: (True, pdf_bytes) on success, (False, error_message) on failure.
+        The caller writes the bytes wherever it needs them (e.g. its own temp file).
     """
     if not box_share_pattern_match(box_link):
         print("Not a valid box share link")
         return False, "Not a valid box share link"
 
-    direct_download_url = "https://sfsu.app.box.com/public/static/{share_hash}.{extension}"
-    share_hash = box_link.split("/")[-1]
-
-    box_contents = get_box_contents(box_link)
-    print(f"Box contents: {box_contents} for link: {box_link}")
-    if box_contents is None:
-        return False, ""
-    if box_contents[0]:
-        print("Found PDF")
-        download_url = direct_download_url.format(share_hash=share_hash, extension="pdf")
-
-        if head:
-            print("Head flag is True. Returning the download link without downloading.")
-            return download_url
-        else:
-            print(f"Downloading PDF from: {download_url}")
-            file_response = requests.get(download_url, stream=True)
-            # Assuming 'loc' is the file path where we want to save the PDF.
-
-            with open(temp_pdf_path, "wb") as f:
-                f.write(file_response.content)
-            print(f"Downloaded PDF saved to: {temp_pdf_path}")
-            return True, ""
-    else:
-        print("Box contents not found or error occurred.")
-        return False, box_contents[1]
-
-def box_share_pattern_match(url):
-    # Pattern to match the specific domain and extract the hash.
-    pattern = r'https:\/\/[a-zA-Z0-9.-]*\.box\.com\/s\/[a-zA-Z0-9]+'
-    match = re.match(pattern, url)
-    return True if match else False
-
-
+    if head:
+        share = get_resolver().resolve(box_link)
+        return share.download_url if share.downloadable else (False, share.error)
 
+    ok, content, _ = get_resolver().download(box_link)
+    return ok, content
@@ -0,0 +1,209 @@
+"""
+Request dupefilter kept on disk, one SQLite hash set per crawled host.
+
+Scrapy's RFPDupeFilter holds every request fingerprint in a Python set, so
+memory grows with the site (the root calstatela.edu crawl never stops
+growing) and the set is lost when the process exits. DiskDupeFilter stores
+fingerprints in <CRAWL_SEEN_DIR>/<host>.db instead:
+
+  * memory stays bounded by SQLite's page cache, whatever the site size.
+    SiteSpider's FrontierGuard (traps.py) keeps its canonical URL keys in
+    the same files (seen_url), through the same per-process SeenSets, so
+    neither holds a set of every URL in memory;
+  * each row records the crawl generation that last requested it, so a
+    fingerprint from an earlier crawl is not a duplicate now, but the
+    request is tagged meta["seen_before"]=True. IncrementalCrawlMiddleware
+    skips its cache lookup for requests tagged False, which it knows are new;
+  * with JOBDIR set, a paused crawl resumes in the same generation and keeps
+    its duplicates filtered.
+
+Hosts are crawled by one process at a time (run_all_spiders.py groups sites
+by host), so per-host files are never written concurrently. The partitions
+of a partitioned host and the nodes of a distributed crawl each get their
+own DISK_DUPEFILTER_DIR.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+from scrapy import signals
+from scrapy.dupefilters import RFPDupeFilter
+from scrapy.utils.job import job_dir
+
+# Project root is three levels up (crawlers/csula_pdf_scan/csula_pdf_scan/).
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../../'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+
+create_seen_request = """
+CREATE TABLE IF NOT EXISTS seen_request (
+    fingerprint INTEGER PRIMARY KEY,   -- first 8 bytes of the request fingerprint
+    generation INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS seen_url (
+    url_key INTEGER PRIMARY KEY,       -- first 8 bytes of a hash of traps.canonical_key()
+    generation INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS crawl_generation (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    generation INTEGER NOT NULL
+);
+"""
+
+
+class HostSeenSet:
+    """Fingerprints requested from, and canonical URLs queued for, one host across crawls."""
+
+    # Writes are committed in batches; a crash only means those requests
+    # aren't marked seen_before on the next crawl.
+    COMMIT_EVERY = 500
+
+    def __init__(self, path, generation=None):
+        self.conn = sqlite3.connect(str(path), timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA cache_size=-8000")  # ~8 MB page cache per host
+        self.conn.executescript(create_seen_request)
+        if generation is None:
+            row = self.conn.execute("SELECT generation FROM crawl_generation WHERE id = 1").fetchone()
+            generation = (row[0] if row else 0) + 1
+        self.conn.execute(
+            "INSERT OR REPLACE INTO crawl_generation (id, generation) VALUES (1, ?)", (generation,)
+        )
+        self.conn.commit()
+        self.generation = generation
+        self._pending = 0
+
+    def add(self, fingerprint):
+        """
+        Record fingerprint for this crawl. Returns 'duplicate' if this crawl
+        already requested it, 'seen_before' if an earlier crawl did, else 'new'.
+        """
+        return self._add("seen_request", "fingerprint", int.from_bytes(fingerprint[:8], "big", signed=True))
+
+    def add_url(self, url_key):
+        """Record a canonical URL key (traps.canonical_key()) for this crawl; returns what add() does."""
+        return self._add("seen_url", "url_key", self._url_key(url_key))
+
+    def has_url(self, url_key):
+        """True if this crawl already recorded url_key, without recording it."""
+        row = self.conn.execute(
+            "SELECT generation FROM seen_url WHERE url_key = ?", (self._url_key(url_key),)
+        ).fetchone()
+        return bool(row) and row[0] == self.generation
+
+    @staticmethod
+    def _url_key(url_key):
+        digest = hashlib.blake2b(url_key.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "big", signed=True)
+
+    def _add(self, table, column, key):
+        row = self.conn.execute(
+            f"SELECT generation FROM {table} WHERE {column} = ?", (key,)
+        ).fetchone()
+        if row and row[0] == self.generation:
+            return "duplicate"
+        self.conn.execute(
+            f"INSERT OR REPLACE INTO {table} ({column}, generation) VALUES (?, ?)",
+            (key, self.generation),
+        )
+        self._pending += 1
+        if self._pending >= self.COMMIT_EVERY:
+            self.conn.commit()
+            self._pending = 0
+        return "seen_before" if row else "new"
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+class SeenSets:
+    """
+    The HostSeenSets of one crawl process, one connection per host file,
+    shared by DiskDupeFilter and SiteSpider's FrontierGuard. Files live in
+    DISK_DUPEFILTER_DIR, or config.CRAWL_SEEN_DIR when that setting is empty.
+    """
+
+    def __init__(self, directory, jobdir=None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.hosts = {}
+        # Generation per host, kept in JOBDIR so a resumed crawl reuses it.
+        self.generations_path = Path(jobdir, "seen_generations.json") if jobdir else None
+        self.generations = {}
+        if self.generations_path and self.generations_path.exists():
+            with open(self.generations_path) as f:
+                self.generations = json.load(f)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """The crawler's SeenSets, created on first use and closed with the spider."""
+        seen_sets = getattr(crawler, "seen_sets", None)
+        if seen_sets is None:
+            settings = crawler.settings
+            seen_sets = cls(settings.get("DISK_DUPEFILTER_DIR") or config.CRAWL_SEEN_DIR, job_dir(settings))
+            crawler.seen_sets = seen_sets
+            crawler.signals.connect(seen_sets.close, signal=signals.spider_closed)
+        return seen_sets
+
+    def for_host(self, host):
+        seen = self.hosts.get(host)
+        if seen is None:
+            file_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in host.lower()) + ".db"
+            seen = HostSeenSet(self.directory / file_name, self.generations.get(host))
+            self.hosts[host] = seen
+            self.generations[host] = seen.generation
+            if self.generations_path:
+                with open(self.generations_path, "w") as f:
+                    json.dump(self.generations, f)
+        return seen
+
+    def close(self, spider=None):
+        for seen in self.hosts.values():
+            seen.close()
+        self.hosts = {}
+
+
+class DiskDupeFilter(RFPDupeFilter):
+    """
+    DUPEFILTER_CLASS that keeps request fingerprints on disk, per host (see
+    SeenSets).
+
+    Requests are grouped by meta["host"] (set by SiteSpider), falling back to
+    the URL's hostname.
+    """
+
+    def __init__(self, seen_sets, debug=False, *, fingerprinter=None, stats=None):
+        super().__init__(None, debug, fingerprinter=fingerprinter)
+        self.seen_sets = seen_sets
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(
+            SeenSets.from_crawler(crawler),
+            crawler.settings.getbool("DUPEFILTER_DEBUG"),
+            fingerprinter=crawler.request_fingerprinter,
+            stats=crawler.stats,
+        )
+
+    def request_seen(self, request):
+        fingerprint = bytes.fromhex(self.request_fingerprint(request))
+        host = request.meta.get("host") or request.url.split("/")[2].split("@")[-1]
+        status = self.seen_sets.for_host(host).add(fingerprint)
+        if status == "duplicate":
+            return True
+        request.meta["seen_before"] = status == "seen_before"
+        if self.stats is not None:
+            self.stats.inc_value(f"dupefilter/{status}")
+        return False
+
+    def close(self, reason):
+        self.seen_sets.close()
@@ -0,0 +1,362 @@
+"""
+The crawler-node side of a distributed crawl (see frontier_service.py).
+
+FrontierScheduler replaces Scrapy's scheduler and dupefilter in a SiteSpider
+node (``-s SCHEDULER=csula_pdf_scan.frontier.FrontierScheduler -s
+FRONTIER_URL=http://...``):
+
+  * requests the spider yields are fingerprinted here and sent to the
+    service in batches; the service drops duplicates, so each URL is fetched
+    by one node once;
+  * the node leases a batch of queued requests whenever its own queue runs
+    dry, and acknowledges them when it goes idle. Each lease brings the PDF
+    links other nodes found since the last one, which go into the spider's
+    yield model (spider.yields) as if found here;
+  * dont_filter requests (sitemaps, Box share pages, retries) never went
+    through the dupefilter and stay on the node that made them. A Box share
+    page has to be parsed where the pages waiting for it are recorded;
+  * the spider stays open until the service says every node is idle and
+    nothing is queued;
+  * every call to the service during the crawl (/enqueue, /lease, /idle)
+    is made by a background thread. The reactor only hands it batches and
+    pops leased requests from a local heap, so a slow or restarting service
+    never stalls the node's downloads.
+
+Only FRONTIER_SEED nodes queue the start requests; the others start empty
+and lease. Other per-node state (trap pattern budgets, page budgets) is not
+shared, so a pattern budget allows up to one budget per node.
+"""
+import heapq
+import itertools
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from scrapy import signals
+from scrapy.core.scheduler import BaseScheduler
+from scrapy.exceptions import DontCloseSpider
+from scrapy.utils.request import request_from_dict
+
+logger = logging.getLogger(__name__)
+
+
+def default_node_name():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _json_safe(meta):
+    """meta without values JSON can't carry (Scrapy adds few, the spider none)."""
+    safe = {}
+    for key, value in meta.items():
+        try:
+            json.dumps(value)
+        except (TypeError, ValueError):
+            continue
+        safe[key] = value
+    return safe
+
+
+def encode_request(request, spider):
+    """A JSON-serializable dict for request; callbacks are stored by name."""
+    data = request.to_dict(spider=spider)
+    data["headers"] = {
+        key.decode("latin-1"): [value.decode("latin-1") for value in values]
+        for key, values in data["headers"].items()
+    }
+    data["body"] = data["body"].decode("latin-1")
+    data["meta"] = _json_safe(data["meta"])
+    return data
+
+
+def decode_request(data, spider):
+    data = dict(data)
+    data["body"] = data["body"].encode("latin-1")
+    data["headers"] = {
+        key.encode("latin-1"): [value.encode("latin-1") for value in values]
+        for key, values in data["headers"].items()
+    }
+    return request_from_dict(data, spider=spider)
+
+
+class FrontierClient:
+    """Calls to a FrontierService; a short outage is retried with backoff."""
+
+    RETRIES = 5
+
+    def __init__(self, url, node=None, timeout=30):
+        self.url = url.rstrip("/")
+        self.node = node or default_node_name()
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(settings.get("FRONTIER_URL"), settings.get("FRONTIER_NODE"))
+
+    def _call(self, path, payload=None):
+        for attempt in range(self.RETRIES):
+            try:
+                if payload is None:
+                    response = self.session.get(self.url + path, timeout=self.timeout)
+                else:
+                    response = self.session.post(
+                        self.url + path, json={"node": self.node, **payload}, timeout=self.timeout
+                    )
+                response.raise_for_status()
+                return response.json()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == self.RETRIES - 1:
+                    raise
+                time.sleep(2 ** attempt)
+
+    def status(self):
+        return self._call("/status")
+
+    def register(self, seed):
+        return self._call("/register", {"seed": bool(seed)})
+
+    def enqueue(self, entries):
+        return self._call("/enqueue", {"requests": entries})
+
+    def lease(self, limit, found_since=0):
+        return self._call("/lease", {"limit": limit, "found_since": found_since})
+
+    def idle(self):
+        return self._call("/idle", {})["finished"]
+
+    def close(self):
+        return self._call("/close", {})
+
+    def store_items(self, rows):
+        return self._call("/items", {"items": rows})
+
+    def store_box_failures(self, rows):
+        return self._call("/box_failures", {"failures": rows})
+
+    def store_aliases(self, rows):
+        return self._call("/aliases", {"aliases": rows})
+
+
+class FrontierScheduler(BaseScheduler):
+    """
+    Scrapy scheduler backed by a shared FrontierService; see the module docstring.
+
+    The reactor thread owns the local heap and the outgoing buffer. A
+    FrontierWorker thread owns the client: it sends the batches in `outbox`,
+    leases into `inbox` whenever the local queue runs low, and reports the
+    node idle when _spider_idle() asks it to.
+    """
+
+    # Requests sent per /enqueue call.
+    FLUSH_SIZE = 100
+    # Least seconds between leases while the local queue is low.
+    LEASE_INTERVAL = 1.0
+    # A busy node still checks in this often, so its leases aren't taken back.
+    HEARTBEAT_SECONDS = 30.0
+
+    def __init__(self, crawler, client, seed=False, lease_size=32):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.fingerprinter = crawler.request_fingerprinter
+        self.client = client
+        self.seed = seed
+        self.lease_size = lease_size
+        self.spider = None
+        self.local = []       # heap of (-priority, order, request)
+        self.order = itertools.count()
+        self.outgoing = []
+        # Handed between the reactor and the worker thread.
+        self.outbox = deque()         # batches of outgoing entries, oldest first
+        self.inbox = queue.Queue()    # (found pairs, leased entries)
+        self.received = 0             # leased entries taken from inbox (reactor)
+        self.idle_at = None           # `received` when the spider went idle (reactor sets, worker clears)
+        self.finished = False
+        self.worker = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.get("FRONTIER_URL"):
+            raise ValueError("FrontierScheduler needs the FRONTIER_URL setting")
+        scheduler = cls(
+            crawler,
+            FrontierClient.from_settings(settings),
+            seed=settings.getbool("FRONTIER_SEED"),
+            lease_size=settings.getint("FRONTIER_LEASE_SIZE") or 2 * settings.getint("CONCURRENT_REQUESTS", 16),
+        )
+        crawler.signals.connect(scheduler._spider_idle, signal=signals.spider_idle)
+        # Connected after the spider's and pipelines' handlers, so the node
+        # leaves only once its findings have been sent.
+        crawler.signals.connect(scheduler._spider_closed, signal=signals.spider_closed)
+        return scheduler
+
+    def open(self, spider):
+        self.spider = spider
+        self.client.register(self.seed)
+        self.worker = FrontierWorker(self)
+        self.worker.start()
+
+    def close(self, reason):
+        # Nothing is downloading any more: the rest is sent from here.
+        if self.worker is not None:
+            self.worker.stop()
+        self._hand_off()
+        while self.outbox:
+            self._send(self.outbox[0])
+            self.outbox.popleft()
+
+    def has_pending_requests(self):
+        return bool(self.local or self.outgoing or self.outbox or not self.inbox.empty())
+
+    def _push(self, request):
+        heapq.heappush(self.local, (-request.priority, next(self.order), request))
+
+    def enqueue_request(self, request):
+        if request.dont_filter:
+            self._push(request)
+            self.stats.inc_value("frontier/local")
+            return True
+        host = request.meta.get("host") or (urlsplit(request.url).hostname or "")
+        self.outgoing.append({
+            "fingerprint": self.fingerprinter.fingerprint(request).hex(),
+            "host": host,
+            "priority": request.priority,
+            "request": encode_request(request, self.spider),
+        })
+        if len(self.outgoing) >= self.FLUSH_SIZE:
+            self._hand_off()
+        return True
+
+    def next_request(self):
+        self._receive()
+        if not self.local:
+            # Running dry: send what is buffered so it can come back leased.
+            self._hand_off()
+            return None
+        return heapq.heappop(self.local)[2]
+
+    def _hand_off(self):
+        """Give the buffered requests to the worker thread."""
+        if self.outgoing:
+            self.outbox.append(self.outgoing)
+            self.outgoing = []
+            if self.worker is not None:
+                self.worker.wake.set()
+
+    def _receive(self):
+        """Move what the worker leased into the local heap."""
+        yields = getattr(self.spider, "yields", None)
+        while True:
+            try:
+                found, entries = self.inbox.get_nowait()
+            except queue.Empty:
+                return
+            if yields is not None:
+                for parent_uri, pdf_uri in found:
+                    yields.record(parent_uri, pdf_uri)
+            for entry in entries:
+                request = decode_request(entry["request"], self.spider)
+                request.meta["seen_before"] = entry["seen_before"]
+                self._push(request)
+            self.received += len(entries)
+
+    def _send(self, batch):
+        """Enqueue one batch with the service (worker thread, or close())."""
+        result = self.client.enqueue(batch)
+        self.stats.inc_value("frontier/sent", len(batch))
+        self.stats.inc_value("frontier/duplicates", result["duplicates"])
+
+    def _spider_idle(self, spider=None):
+        """Stay open while there is work or until the service says every node is idle."""
+        self._receive()
+        if self.local or self.outgoing or self.outbox:
+            self._hand_off()
+            raise DontCloseSpider
+        if self.finished:
+            return
+        # Everything received so far has been processed; the worker leases
+        # once more and, if that brings nothing, reports the node idle.
+        self.idle_at = self.received
+        self.worker.wake.set()
+        raise DontCloseSpider
+
+    def _spider_closed(self, spider=None, reason=None):
+        self.client.close()
+
+
+class FrontierWorker(threading.Thread):
+    """The thread that talks to the FrontierService for a FrontierScheduler."""
+
+    def __init__(self, scheduler):
+        super().__init__(name="frontier-worker", daemon=True)
+        self.scheduler = scheduler
+        self.client = scheduler.client
+        self.wake = threading.Event()
+        self.stopping = threading.Event()
+        self.leased = 0           # entries put into inbox; matches scheduler.received once drained
+        self.found_count = 0
+        self.idle = False         # the service has this node as idle
+        self.last_lease = 0.0
+        self.last_contact = time.monotonic()
+
+    def stop(self):
+        self.stopping.set()
+        self.wake.set()
+        self.join()
+
+    def run(self):
+        while not self.stopping.is_set():
+            try:
+                self._work()
+            except requests.exceptions.RequestException as exc:
+                # The client has already retried; try again on the next round.
+                logger.warning("Frontier service unavailable: %s", exc)
+            self.wake.wait(self.scheduler.LEASE_INTERVAL)
+            self.wake.clear()
+
+    def _work(self):
+        scheduler = self.scheduler
+        while scheduler.outbox:
+            scheduler._send(scheduler.outbox[0])
+            scheduler.outbox.popleft()
+            self.last_contact = time.monotonic()
+
+        idle_at, scheduler.idle_at = scheduler.idle_at, None
+        if idle_at is not None:
+            # Lease first; report idle only if nothing new came back and the
+            # reactor had processed everything leased before.
+            if not self._lease() and idle_at == self.leased:
+                scheduler.finished = self.client.idle()
+                self.idle = True
+            return
+
+        now = time.monotonic()
+        queued = len(scheduler.local) + scheduler.inbox.qsize()
+        if self.idle or self.stopping.is_set():
+            return
+        if (queued < scheduler.lease_size and now - self.last_lease >= scheduler.LEASE_INTERVAL) or \
+                now - self.last_contact >= scheduler.HEARTBEAT_SECONDS:
+            self._lease()
+
+    def _lease(self):
+        """Top the local queue up from the service; returns the number of requests leased."""
+        scheduler = self.scheduler
+        self.last_lease = self.last_contact = time.monotonic()
+        want = max(0, scheduler.lease_size - len(scheduler.local) - scheduler.inbox.qsize())
+        leased = self.client.lease(want, self.found_count)
+        self.found_count = leased["found_count"]
+        entries = leased["requests"]
+        if entries:
+            self.idle = False
+        # Counted before it is visible, so an idle check never sees it drained early.
+        self.leased += len(entries)
+        scheduler.inbox.put((leased["found"], entries))
+        scheduler.stats.inc_value("frontier/leased", len(entries))
+        return len(entries)
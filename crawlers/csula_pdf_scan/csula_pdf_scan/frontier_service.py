@@ -0,0 +1,361 @@
+"""
+Shared frontier for a crawl spread over several processes or machines.
+
+A distributed crawl (run_all_spiders.py --distributed) runs one
+FrontierService and any number of SiteSpider nodes, each with
+FrontierScheduler (frontier.py) as its Scrapy scheduler. The service is a
+small JSON-over-HTTP queue on the standard library's HTTPServer, backed by
+SQLite:
+
+  * nodes send every request they would have scheduled (/enqueue); the
+    service drops duplicates with the same on-disk per-host fingerprint sets
+    DiskDupeFilter uses (dupefilter.py, config.CRAWL_SEEN_DIR), so a URL is
+    fetched once across all nodes and requests known from earlier crawls are
+    still tagged seen_before;
+  * nodes lease batches of queued requests, highest priority first (/lease),
+    and acknowledge everything they leased when they go idle (/idle). The
+    leases of a node that stops reporting for NODE_TIMEOUT seconds go back
+    to the queue;
+  * the crawl is finished when the seeding node has registered, nothing is
+    queued or leased, and every node is idle;
+  * discovered PDF links go straight into discovered_pdf in the service's
+    database (/items), near-duplicate pages into its page_alias table
+    (/aliases), and failed Box links into the frontier database
+    (/box_failures), so nodes on other machines need no copy of the
+    database. run_all_spiders.py records the crawl and exports the scan
+    files from there once the nodes are done;
+  * each lease also returns the (page, PDF) pairs other nodes found since
+    the node's last lease, so every node's yield model (yield_model.py)
+    opens up productive sections as they are found.
+
+Requests are handled one at a time on the serving thread, which owns every
+SQLite connection; a handful of nodes each making a few calls a second is
+well within that.
+"""
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+from csula_pdf_scan.dupefilter import HostSeenSet
+from csula_pdf_scan.pipelines import store_page_aliases, upsert_discovered_pdf
+
+# Project root is three levels up (crawlers/csula_pdf_scan/csula_pdf_scan/).
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../../'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from src.core.database import ensure_discovered_pdf, ensure_page_alias
+
+QUEUED, LEASED, DONE = 0, 1, 2
+
+create_frontier_tables = """
+CREATE TABLE IF NOT EXISTS frontier_request (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    request TEXT NOT NULL,              -- JSON, see frontier.encode_request()
+    priority INTEGER NOT NULL,
+    seen_before INTEGER NOT NULL,
+    state INTEGER NOT NULL DEFAULT 0,   -- 0 queued, 1 leased, 2 done
+    node TEXT,
+    leased_at REAL
+);
+
+CREATE INDEX IF NOT EXISTS idx_frontier_request_queue ON frontier_request(state, priority DESC, id);
+CREATE INDEX IF NOT EXISTS idx_frontier_request_node ON frontier_request(node, state);
+
+CREATE TABLE IF NOT EXISTS frontier_node (
+    node TEXT PRIMARY KEY,
+    seed INTEGER NOT NULL DEFAULT 0,
+    idle INTEGER NOT NULL DEFAULT 0,
+    seen_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS frontier_box_failure (
+    site TEXT NOT NULL,
+    link TEXT NOT NULL,
+    parent TEXT NOT NULL,
+    seen_at TEXT NOT NULL,
+    PRIMARY KEY (site, link, parent)
+);
+"""
+
+
+def _host_file(host):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in host.lower()) + ".db"
+
+
+class FrontierStore:
+    """Queue, dupefilter, node states and PDF sink of one distributed crawl."""
+
+    # Seconds without a call before a node is presumed dead and its leases requeued.
+    NODE_TIMEOUT = 300
+
+    def __init__(self, path, sites, seen_dir, db_path):
+        self.sites = list(sites)
+        # isolation_level=None: transactions are managed explicitly below.
+        self.conn = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(create_frontier_tables)
+        self.sink = sqlite3.connect(str(db_path), timeout=30)
+        self.sink.execute("PRAGMA journal_mode=WAL")
+        ensure_discovered_pdf(self.sink)
+        ensure_page_alias(self.sink)
+        self.seen_dir = Path(seen_dir)
+        self.seen_dir.mkdir(parents=True, exist_ok=True)
+        self.hosts = {}
+        self.found = []         # distinct (parent_uri, pdf_uri) pairs, in arrival order
+        self._found_pairs = set()
+        self.seeded = False
+        self.finished = False
+
+    def _host_set(self, host):
+        seen = self.hosts.get(host)
+        if seen is None:
+            seen = self.hosts[host] = HostSeenSet(self.seen_dir / _host_file(host))
+        return seen
+
+    def _touch(self, node, idle=None, seed=None):
+        self.conn.execute(
+            "INSERT INTO frontier_node (node, seen_at) VALUES (?, ?) "
+            "ON CONFLICT (node) DO UPDATE SET seen_at = excluded.seen_at",
+            (node, time.time()),
+        )
+        if idle is not None:
+            self.conn.execute("UPDATE frontier_node SET idle = ? WHERE node = ?", (int(idle), node))
+        if seed is not None:
+            self.conn.execute("UPDATE frontier_node SET seed = ? WHERE node = ?", (int(seed), node))
+
+    def _expire_nodes(self):
+        """Forget nodes that stopped reporting and requeue what they had leased."""
+        stale = [row[0] for row in self.conn.execute(
+            "SELECT node FROM frontier_node WHERE seen_at < ?", (time.time() - self.NODE_TIMEOUT,)
+        )]
+        for node in stale:
+            self._release(node)
+            self.conn.execute("DELETE FROM frontier_node WHERE node = ?", (node,))
+
+    def _release(self, node):
+        self.conn.execute(
+            "UPDATE frontier_request SET state = ?, node = NULL, leased_at = NULL WHERE node = ? AND state = ?",
+            (QUEUED, node, LEASED),
+        )
+
+    def register(self, node, seed):
+        self.conn.execute("BEGIN IMMEDIATE")
+        self._touch(node, idle=False, seed=seed)
+        self.conn.execute("COMMIT")
+        if seed:
+            self.seeded = True
+        return {"sites": self.sites, "finished": self.finished}
+
+    def enqueue(self, node, entries):
+        """Queue the entries not requested before in this crawl; an empty list is a heartbeat."""
+        rows, duplicates = [], 0
+        for entry in entries:
+            status = self._host_set(entry["host"]).add(bytes.fromhex(entry["fingerprint"]))
+            if status == "duplicate":
+                duplicates += 1
+                continue
+            rows.append((json.dumps(entry["request"]), int(entry["priority"]), status == "seen_before"))
+        self.conn.execute("BEGIN IMMEDIATE")
+        self._touch(node)
+        self.conn.executemany(
+            "INSERT INTO frontier_request (request, priority, seen_before) VALUES (?, ?, ?)", rows
+        )
+        self.conn.execute("COMMIT")
+        return {"added": len(rows), "duplicates": duplicates}
+
+    def lease(self, node, limit, found_since=0):
+        """
+        Up to `limit` queued requests, highest priority first, now leased to
+        node, and the PDF pairs found since the node's previous lease.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        self._expire_nodes()
+        self._touch(node, idle=False)
+        rows = self.conn.execute(
+            "SELECT id, request, seen_before FROM frontier_request WHERE state = ? "
+            "ORDER BY priority DESC, id LIMIT ?",
+            (QUEUED, max(0, int(limit))),
+        ).fetchall()
+        now = time.time()
+        self.conn.executemany(
+            "UPDATE frontier_request SET state = ?, node = ?, leased_at = ? WHERE id = ?",
+            [(LEASED, node, now, row[0]) for row in rows],
+        )
+        self.conn.execute("COMMIT")
+        return {
+            "requests": [{"request": json.loads(row[1]), "seen_before": bool(row[2])} for row in rows],
+            "found": self.found[found_since:],
+            "found_count": len(self.found),
+            "finished": self.finished,
+        }
+
+    def idle(self, node):
+        """node has processed everything it leased; True once the whole crawl is done."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.execute(
+            "UPDATE frontier_request SET state = ? WHERE node = ? AND state = ?", (DONE, node, LEASED)
+        )
+        self._touch(node, idle=True)
+        self._expire_nodes()
+        counts = self._counts()
+        busy = self.conn.execute("SELECT COUNT(*) FROM frontier_node WHERE idle = 0").fetchone()[0]
+        self.conn.execute("COMMIT")
+        if self.seeded and not busy and not counts["queued"] and not counts["leased"]:
+            self.finished = True
+        return {"finished": self.finished}
+
+    def close(self, node):
+        """A node is shutting down: anything it still held goes back to the queue."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        self._release(node)
+        self.conn.execute("DELETE FROM frontier_node WHERE node = ?", (node,))
+        self.conn.execute("COMMIT")
+        return {"finished": self.finished}
+
+    def store_items(self, rows):
+        """(site, pdf_uri, parent_uri, seen_at) rows into discovered_pdf."""
+        self.sink.executemany(upsert_discovered_pdf, [(s, pdf, parent, at, at) for s, pdf, parent, at in rows])
+        self.sink.commit()
+        for _, pdf_uri, parent_uri, _ in rows:
+            if (parent_uri, pdf_uri) not in self._found_pairs:
+                self._found_pairs.add((parent_uri, pdf_uri))
+                self.found.append((parent_uri, pdf_uri))
+        return {"stored": len(rows)}
+
+    def store_aliases(self, rows):
+        """(host, alias_uri, canonical_uri, distance, seen_at) rows into page_alias."""
+        store_page_aliases(self.sink, rows)
+        return {"stored": len(rows)}
+
+    def store_box_failures(self, rows):
+        """(site, link, parent, seen_at) rows; the first report of each link and page is kept."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO frontier_box_failure (site, link, parent, seen_at) VALUES (?, ?, ?, ?)", rows
+        )
+        self.conn.execute("COMMIT")
+        return {"stored": len(rows)}
+
+    def _counts(self):
+        counts = dict.fromkeys(("queued", "leased", "done"), 0)
+        names = {QUEUED: "queued", LEASED: "leased", DONE: "done"}
+        for state, count in self.conn.execute("SELECT state, COUNT(*) FROM frontier_request GROUP BY state"):
+            counts[names[state]] = count
+        return counts
+
+    def status(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        self._expire_nodes()
+        nodes = {node: bool(idle) for node, idle in self.conn.execute("SELECT node, idle FROM frontier_node")}
+        counts = self._counts()
+        self.conn.execute("COMMIT")
+        return {"sites": self.sites, "finished": self.finished, "nodes": nodes, **counts}
+
+    def close_store(self):
+        for seen in self.hosts.values():
+            seen.close()
+        self.hosts = {}
+        self.sink.close()
+        self.conn.close()
+
+
+def read_box_failures(path):
+    """(site, link, parent, seen_at) rows a finished distributed crawl collected."""
+    conn = sqlite3.connect(str(path), timeout=30)
+    try:
+        return conn.execute("SELECT site, link, parent, seen_at FROM frontier_box_failure ORDER BY rowid").fetchall()
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        conn.close()
+
+
+class _FrontierHandler(BaseHTTPRequestHandler):
+    """JSON in, JSON out; every call names the calling node."""
+
+    def _reply(self, code, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/status":
+            self._reply(200, self.server.store.status())
+        else:
+            self._reply(404, {"error": f"unknown path {self.path}"})
+
+    def do_POST(self):
+        store = self.server.store
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            data = json.loads(self.rfile.read(length) or b"{}")
+            node = data.get("node", "")
+            routes = {
+                "/register": lambda: store.register(node, bool(data.get("seed"))),
+                "/enqueue": lambda: store.enqueue(node, data["requests"]),
+                "/lease": lambda: store.lease(node, data["limit"], data.get("found_since", 0)),
+                "/idle": lambda: store.idle(node),
+                "/close": lambda: store.close(node),
+                "/items": lambda: store.store_items(data["items"]),
+                "/box_failures": lambda: store.store_box_failures(data["failures"]),
+                "/aliases": lambda: store.store_aliases(data["aliases"]),
+            }
+            if self.path not in routes:
+                self._reply(404, {"error": f"unknown path {self.path}"})
+                return
+            self._reply(200, routes[self.path]())
+        except (ValueError, KeyError, TypeError) as e:
+            self._reply(400, {"error": f"{type(e).__name__}: {e}"})
+
+    def log_message(self, format, *args):
+        pass  # one line per lease would drown the runner's output
+
+
+class FrontierService:
+    """
+    A FrontierStore served over HTTP from a background thread.
+
+    The store is opened on the serving thread (SQLite connections stay on the
+    thread that made them), so start() waits until it is ready.
+    """
+
+    def __init__(self, address, path, sites, seen_dir=None, db_path=None):
+        self.path = Path(path)
+        self.sites = sites
+        self.seen_dir = seen_dir or config.CRAWL_SEEN_DIR
+        self.db_path = db_path or config.DATABASE_PATH
+        self.server = HTTPServer(address, _FrontierHandler)
+        self.thread = None
+        self._ready = threading.Event()
+
+    @property
+    def port(self):
+        return self.server.server_address[1]
+
+    def start(self):
+        self.thread = threading.Thread(target=self._serve, name="frontier-service", daemon=True)
+        self.thread.start()
+        self._ready.wait()
+
+    def _serve(self):
+        self.server.store = FrontierStore(self.path, self.sites, self.seen_dir, self.db_path)
+        self._ready.set()
+        try:
+            self.server.serve_forever(poll_interval=0.5)
+        finally:
+            self.server.store.close_store()
+
+    def stop(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
@@ -0,0 +1,131 @@
+"""
+Per-host request budget shared by every crawl process.
+
+run_all_spiders.py starts several SiteSpider processes, and each one
+autothrottles on its own, so without coordination three processes crawling
+www.calstatela.edu subpaths can triple the load on that host. This module
+keeps one token bucket per host in a small SQLite file that all processes
+share; HostBudgetMiddleware takes a token before every download, so the
+combined request rate to a host stays at HOST_BUDGET_RATE (with bursts of
+up to HOST_BUDGET_BURST) no matter how many processes are running.
+"""
+import asyncio
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+create_host_bucket = """
+CREATE TABLE IF NOT EXISTS host_bucket (
+    host TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def budget_host(url):
+    """Bucket key for a URL: the hostname without a leading 'www.'."""
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class HostTokenBucket:
+    """
+    Token buckets keyed by host, stored in SQLite so separate processes draw
+    from the same budget.
+
+    acquire() always takes a token and lets the balance go negative; the
+    returned delay is how long the caller must wait before its token is
+    actually "earned". Requests are therefore spaced at 1/rate seconds once
+    the burst is spent, in the order they asked.
+    """
+
+    def __init__(self, path, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        # isolation_level=None: transactions are managed explicitly below.
+        # check_same_thread=False: HostBudgetMiddleware calls acquire() from
+        # its one executor thread, never from two threads at once.
+        self.conn = sqlite3.connect(str(path), timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(create_host_bucket)
+
+    def acquire(self, host):
+        """Take one token for host; return the seconds to wait before sending."""
+        now = time.time()
+        cursor = self.conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            row = cursor.execute(
+                "SELECT tokens, updated_at FROM host_bucket WHERE host = ?", (host,)
+            ).fetchone()
+            if row is None:
+                tokens = self.burst
+            else:
+                tokens = min(self.burst, row[0] + (now - row[1]) * self.rate)
+            tokens -= 1
+            cursor.execute(
+                "INSERT OR REPLACE INTO host_bucket (host, tokens, updated_at) VALUES (?, ?, ?)",
+                (host, tokens, now),
+            )
+            cursor.execute("COMMIT")
+        except Exception:
+            cursor.execute("ROLLBACK")
+            raise
+        return max(0.0, -tokens / self.rate)
+
+    def close(self):
+        self.conn.close()
+
+
+class HostBudgetMiddleware:
+    """
+    Downloader middleware that waits for a host token before each request.
+
+    Enabled when HOST_BUDGET_DB is set (run_all_spiders.py passes it with -s);
+    a plain 'scrapy crawl' without it behaves exactly as before. Requests
+    waiting for a token still count against CONCURRENT_REQUESTS, so the
+    engine stops scheduling new work while the host budget is exhausted.
+
+    Tokens are taken on a single worker thread: the shared file's write
+    lock can be held by another process for a while, and waiting for it on
+    the reactor thread would stall every download in this one.
+    """
+
+    def __init__(self, bucket, stats=None):
+        self.bucket = bucket
+        self.stats = stats
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="host-budget")
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        path = crawler.settings.get("HOST_BUDGET_DB")
+        if not path:
+            raise NotConfigured("HOST_BUDGET_DB not set")
+        bucket = HostTokenBucket(
+            path,
+            rate=crawler.settings.getfloat("HOST_BUDGET_RATE", 8.0),
+            burst=crawler.settings.getfloat("HOST_BUDGET_BURST", 16.0),
+        )
+        middleware = cls(bucket, crawler.stats)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def spider_closed(self, spider):
+        self.executor.shutdown(wait=True)
+        self.bucket.close()
+
+    async def process_request(self, request, spider=None):
+        delay = await asyncio.get_running_loop().run_in_executor(
+            self.executor, self.bucket.acquire, budget_host(request.url)
+        )
+        if delay > 0:
+            if self.stats is not None:
+                self.stats.inc_value("host_budget/delayed")
+                self.stats.inc_value("host_budget/wait_seconds", delay)
+            await asyncio.sleep(delay)
+        return None
@@ -18,3 +18,18 @@ class CslaPdfScanItem(scrapy.Item):
     # define the fields for your item here like:
     # name = scrapy.Field()
     pass
+
+
+class DiscoveredPdfItem(scrapy.Item):
+    pdf_uri = scrapy.Field()     # Absolute URL of the PDF
+    parent_uri = scrapy.Field()  # Page the PDF was linked from (or served under)
+    site = scrapy.Field()        # Site output folder name, e.g. calstatela-edu_ecst
+    seen_at = scrapy.Field()     # Local time the link was found ('%Y-%m-%d %H:%M:%S.%f')
+
+
+class PageAliasItem(scrapy.Item):
+    alias_uri = scrapy.Field()      # URL serving the same content as canonical_uri (/node/NNN, ...)
+    canonical_uri = scrapy.Field()  # URL kept for the page; its links are the ones followed
+    host = scrapy.Field()           # Host both URLs are on
+    distance = scrapy.Field()       # SimHash bits that differ between the two pages (0 = same text)
+    seen_at = scrapy.Field()        # Local time the alias was found ('%Y-%m-%d %H:%M:%S.%f')
@@ -0,0 +1,149 @@
+"""
+Lightweight link extraction and classification for the crawler hot path.
+
+Building a Selector (a full lxml tree) for every page, then running three
+urlparse()-based checks per link, was most of the CPU a crawl spent per
+response. Here:
+
+  * extract_hrefs() pulls every <a href> out of the page text in one
+    compiled regex pass. Comments, <script>, <style> and <template> blocks are
+    matched and skipped in the same pass, so it returns what
+    response.css('a::attr(href)') did.
+  * Plain root-relative hrefs (/ecst/forms) are joined by concatenation;
+    other absolute and protocol-relative hrefs (most footer links) go through
+    an LRU-cached urljoin keyed on the page's origin, so the same menu on
+    every page is resolved once.
+  * LinkClassifier precomputes a host's subsite scopes and sorts each link
+    into PDF / Box / followable with one precompiled match instead of
+    urlparse(), caching the answer per URL.
+
+benchmarks/link_extraction.py times this against the Selector path on the
+saved pages in benchmarks/fixtures/.
+"""
+import html
+import re
+from functools import lru_cache
+from urllib.parse import urljoin, urlsplit
+
+from scrapy.utils.response import get_base_url
+
+# One alternation: skipped blocks (no groups set) or an <a> with its href in
+# group 2, 3 or 4 (double-quoted, single-quoted, unquoted).
+_LINK_TOKENS = re.compile(
+    r"""<!--.*?-->"""
+    r"""|<(script|style|template)\b.*?</\1\s*>"""
+    r"""|<a\s[^>]*?\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""",
+    re.IGNORECASE | re.DOTALL,
+)
+
+# Hrefs that resolve the same way from any page on a host: absolute URLs
+# (any scheme), protocol-relative and root-relative paths.
+_ORIGIN_RELATIVE = re.compile(r"[a-zA-Z][a-zA-Z0-9+.-]*:|/")
+
+# Root-relative hrefs that urljoin would return unchanged: no dot segments,
+# no empty query or fragment to drop.
+def _plain_rooted(href):
+    return (href[1:2] != "/" and "/." not in href and "?#" not in href
+            and not href.endswith(("?", "#")))
+
+
+# netloc and path of an absolute http(s) URL.
+_HTTP_URL = re.compile(r"https?://([^/?#]*)([^?#]*)", re.IGNORECASE)
+
+# Box shared links: box.com itself or any subdomain (app.box.com, calstatela.box.com).
+BOX_HOST = re.compile(r"(?:^|\.)box\.com(?::\d+)?$")
+
+
+@lru_cache(maxsize=100_000)
+def _join_from_origin(origin, href):
+    return urljoin(origin, href)
+
+
+def _origin(base_url):
+    """scheme://netloc of base_url."""
+    scheme, netloc = urlsplit(base_url)[:2]
+    return f"{scheme}://{netloc}"
+
+
+def extract_hrefs(text, base_url):
+    """Absolute URLs of every <a href> in text, in document order."""
+    origin = _origin(base_url)
+    links = []
+    for match in _LINK_TOKENS.finditer(text):
+        href = match.group(2)
+        if href is None:
+            href = match.group(3)
+            if href is None:
+                href = match.group(4)
+                if href is None:
+                    continue  # comment, script, style or template
+        if "&" in href:
+            href = html.unescape(href)
+        href = href.strip()
+        if not href:
+            continue
+        if href[0] == "/" and _plain_rooted(href):
+            links.append(origin + href)
+        elif _ORIGIN_RELATIVE.match(href):
+            links.append(_join_from_origin(origin, href))
+        else:
+            links.append(urljoin(base_url, href))
+    return links
+
+
+def extract_links(response):
+    """extract_hrefs() for a TextResponse, honouring its <base href>."""
+    return extract_hrefs(response.text, get_base_url(response))
+
+
+class LinkClassifier:
+    """
+    Sorts the links found on one host's pages, for SiteSpider.
+
+    classify(url) returns (kind, owners): kind is 'pdf', 'box', 'follow' or
+    None (skip), owners the subsites whose scope contains the URL (only
+    computed for followable links). owners_of(url) gives the owning subsites of
+    any URL on the host.
+    """
+
+    PDF, BOX, FOLLOW = "pdf", "box", "follow"
+
+    def __init__(self, host, sites, cache_size=50_000):
+        self.host = host.lower()
+        self._subdomain_suffix = "." + self.host
+        self.scopes = [(site.scope_path, site) for site in sites]
+        self._owners_by_path = {}
+        self.classify = lru_cache(maxsize=cache_size)(self._classify)
+
+    def is_internal(self, netloc):
+        netloc = netloc.lower()
+        return not netloc or netloc == self.host or netloc.endswith(self._subdomain_suffix)
+
+    def owners_of_path(self, path):
+        owners = self._owners_by_path.get(path)
+        if owners is None:
+            owners = [site for scope, site in self.scopes if not scope or path.startswith(scope)]
+            if len(self._owners_by_path) < 200_000:
+                self._owners_by_path[path] = owners
+        return owners
+
+    def owners_of(self, url):
+        match = _HTTP_URL.match(url)
+        return self.owners_of_path(match.group(2) if match else urlsplit(url).path)
+
+    def _classify(self, url):
+        lowered = url.lower()
+        if not lowered.startswith(("http://", "https://")):
+            return None, None  # mailto:, tel:, javascript:, ...
+        if lowered.endswith(".pdf"):
+            return self.PDF, None
+        netloc, path = _HTTP_URL.match(url).groups()
+        if "@" in netloc:
+            netloc = netloc.rsplit("@", 1)[1]
+        if BOX_HOST.search(netloc.lower()):
+            return self.BOX, None
+        if self.is_internal(netloc):
+            owners = self.owners_of_path(path)
+            if owners:
+                return self.FOLLOW, owners
+        return None, None
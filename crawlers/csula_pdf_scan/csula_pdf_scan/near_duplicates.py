@@ -0,0 +1,147 @@
+"""
+Near-duplicate page detection for SiteSpider.
+
+Drupal serves every node under several URLs: its path alias, /node/NNN,
+/index.php/<alias> (whose own links then keep the /index.php/ prefix) and
+print views. A crawl used to follow all of them, and reports dropped the
+extra parents afterwards (filters.check_for_node()). Here each fetched page's
+main content block is fingerprinted with SimHash, so a page whose content was
+already crawled under another URL is caught before its links are expanded:
+
+  * main_content() takes the page's <main> element (the whole <body> if
+    there is none), and within it the <article> span if there is one. The
+    print view of a node therefore compares equal to its full page. Menus,
+    headers and footers are left out.
+  * simhash() is a 64-bit SimHash over the content's word 3-shingles. Pages
+    with the same text get the same fingerprint; small edits (a date, a
+    "Print" link) flip a few bits.
+  * NearDuplicates keeps one fingerprint per distinct page per group. A new
+    page within `max_distance` bits of a known one (3 of 64, as in Manku et
+    al.'s web-scale near-duplicate work) is a duplicate. The index is banded
+    so that a lookup touches only the pages sharing a 16-bit band.
+    SiteSpider groups pages by host and owning subsites, so a page is only
+    ever pruned in favour of one that is attributed to the same subsites.
+
+The URL kept for a group of duplicates is the cleanest one (alias_rank()):
+a plain path beats a query string, which beats /node/NNN, /index.php/ and
+print URLs. If /node/123 happens to be fetched before /about/history, the
+latter takes over as canonical and /node/123 is recorded as its alias.
+"""
+import hashlib
+import html
+import re
+from collections import Counter
+from urllib.parse import urlsplit
+
+_MAIN = re.compile(r"<main\b[^>]*>(.*?)</main\s*>", re.IGNORECASE | re.DOTALL)
+_BODY = re.compile(r"<body\b[^>]*>(.*)</body\s*>", re.IGNORECASE | re.DOTALL)
+_ARTICLE = re.compile(r"<article\b[^>]*>(.*)</article\s*>", re.IGNORECASE | re.DOTALL)
+_SKIPPED = re.compile(r"<!--.*?-->|<(script|style|template)\b.*?</\1\s*>", re.IGNORECASE | re.DOTALL)
+_TAG = re.compile(r"<[^>]*>")
+_WORD = re.compile(r"\w+")
+
+# Drupal's other URLs for a node (mirrors filters.check_for_node(), plus print views).
+_ALIAS_PATH = re.compile(r"/(?:node/\d+|index\.php(?:/|$)|print/)", re.IGNORECASE)
+
+BITS = 64
+BANDS = 4
+_BAND_BITS = BITS // BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+
+def main_content(text):
+    """The words of a page's main content block, lower-cased."""
+    match = _MAIN.search(text) or _BODY.search(text)
+    block = match.group(1) if match else text
+    article = _ARTICLE.search(block)
+    if article:
+        block = article.group(1)
+    block = _TAG.sub(" ", _SKIPPED.sub(" ", block))
+    return _WORD.findall(html.unescape(block).lower())
+
+
+def simhash(words, shingle=3):
+    """64-bit SimHash of a word list, over its `shingle`-word shingles."""
+    if len(words) < shingle:
+        features = Counter([" ".join(words)])
+    else:
+        features = Counter(" ".join(words[i:i + shingle]) for i in range(len(words) - shingle + 1))
+    weights = [0] * BITS
+    for feature, count in features.items():
+        value = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "big")
+        for bit in range(BITS):
+            if value >> bit & 1:
+                weights[bit] += count
+            else:
+                weights[bit] -= count
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def distance(a, b):
+    """Bits that differ between two fingerprints."""
+    return bin(a ^ b).count("1")
+
+
+def alias_rank(url):
+    """Sort key for the URLs of one page: the lowest is kept as canonical."""
+    parts = urlsplit(url)
+    return bool(_ALIAS_PATH.search(parts.path)), bool(parts.query), len(url), url
+
+
+class NearDuplicates:
+    """SimHash index of the pages crawled so far, per group; see the module docstring."""
+
+    def __init__(self, max_distance=3, min_words=30):
+        if max_distance >= BANDS:
+            raise ValueError(f"max_distance must be below {BANDS} for a {BANDS}-band index")
+        self.max_distance = max_distance
+        self.min_words = min_words
+        self.pages = {}   # group -> [[fingerprint, canonical url], ...]
+        self.bands = {}   # group -> {(band, value): [page index, ...]}
+
+    def fingerprint(self, text):
+        """SimHash of a page's main content, or None if it is too short to compare safely."""
+        words = main_content(text)
+        if len(words) < self.min_words:
+            return None
+        return simhash(words)
+
+    def match(self, group, url, fingerprint):
+        """
+        Check a fetched page against the pages seen in group (any hashable
+        key; SiteSpider uses the host and the page's owning subsites).
+
+        Returns None if the page is new (it is added), else
+        (canonical_url, alias_url, distance). When url is the alias, the page
+        is a duplicate and its links need not be expanded. When url is
+        cleaner than the URL seen first, url becomes the canonical one and
+        the earlier URL is returned as the alias.
+        """
+        pages = self.pages.setdefault(group, [])
+        bands = self.bands.setdefault(group, {})
+        keys = [(band, fingerprint >> (band * _BAND_BITS) & _BAND_MASK) for band in range(BANDS)]
+
+        best = None
+        for key in keys:
+            for index in bands.get(key, ()):
+                bits = distance(fingerprint, pages[index][0])
+                if bits <= self.max_distance and (best is None or bits < best[1]):
+                    best = (index, bits)
+        if best is None:
+            for key in keys:
+                bands.setdefault(key, []).append(len(pages))
+            pages.append([fingerprint, url])
+            return None
+
+        index, bits = best
+        canonical = pages[index][1]
+        if canonical == url:
+            return None  # the same URL again (a retry or an incremental replay)
+        if alias_rank(url) < alias_rank(canonical):
+            pages[index][1] = url
+            return url, canonical, bits
+        return canonical, url, bits
@@ -0,0 +1,204 @@
+"""
+Incremental crawling: remember what each page looked like last time.
+
+For every HTML page SiteSpider fetches, PageCache stores the ETag,
+Last-Modified, a hash of the body, the absolute links found on it, and the
+page's sitemap <lastmod> (when it was seeded from sitemap.xml). On the next
+run, IncrementalCrawlMiddleware
+
+  * skips the download entirely when the sitemap lastmod is unchanged, and
+  * otherwise sends If-None-Match / If-Modified-Since,
+
+handing the spider a 304 response in both cases. The spider then replays the
+stored links instead of re-parsing, so unchanged pages cost one cheap request
+(or none) while their children are still visited and their PDFs still
+reported.
+"""
+import json
+import sqlite3
+
+from scrapy import signals
+from scrapy.http import HtmlResponse
+
+create_page_cache = """
+CREATE TABLE IF NOT EXISTS page_cache (
+    url TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,             -- 'html' or 'pdf' (served as application/pdf)
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT,
+    links TEXT,                     -- JSON list of absolute hrefs
+    sitemap_lastmod TEXT,
+    fetched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+
+class CachedPage:
+    __slots__ = ("url", "kind", "etag", "last_modified", "content_hash", "links", "sitemap_lastmod")
+
+    def __init__(self, url, kind, etag, last_modified, content_hash, links, sitemap_lastmod):
+        self.url = url
+        self.kind = kind
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_hash = content_hash
+        self.links = json.loads(links) if links else []
+        self.sitemap_lastmod = sitemap_lastmod
+
+
+class PageCache:
+    """
+    SQLite-backed per-URL crawl state, shared by all crawl processes.
+
+    Writes are buffered in memory and flushed FLUSH_EVERY at a time in one
+    short BEGIN IMMEDIATE transaction, so no process holds the file's write
+    lock between flushes. A crash loses at most the buffered entries, which
+    only means those pages are fetched in full next time.
+    """
+
+    FLUSH_EVERY = 200
+
+    _upsert = (
+        "INSERT INTO page_cache "
+        "(url, kind, etag, last_modified, content_hash, links, sitemap_lastmod, fetched_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP) "
+        "ON CONFLICT(url) DO UPDATE SET "
+        "kind = excluded.kind, etag = excluded.etag, last_modified = excluded.last_modified, "
+        "content_hash = excluded.content_hash, links = excluded.links, "
+        "sitemap_lastmod = COALESCE(excluded.sitemap_lastmod, page_cache.sitemap_lastmod), "
+        "fetched_at = excluded.fetched_at"
+    )
+    _touch = (
+        "UPDATE page_cache SET fetched_at = CURRENT_TIMESTAMP, "
+        "sitemap_lastmod = COALESCE(?, sitemap_lastmod) WHERE url = ?"
+    )
+
+    def __init__(self, path):
+        # Autocommit: reads never leave a transaction open; flush() opens its own.
+        self.conn = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(create_page_cache)
+        self._stores = {}   # url -> upsert parameters
+        self._touches = {}  # url -> sitemap lastmod (or None)
+
+    def get(self, url):
+        pending = self._stores.get(url)
+        if pending is not None:
+            return CachedPage(*pending)
+        row = self.conn.execute(
+            "SELECT url, kind, etag, last_modified, content_hash, links, sitemap_lastmod "
+            "FROM page_cache WHERE url = ?",
+            (url,),
+        ).fetchone()
+        return CachedPage(*row) if row else None
+
+    def store(self, url, kind, etag=None, last_modified=None, content_hash=None, links=None,
+              sitemap_lastmod=None):
+        # A page reached through a link rather than the sitemap keeps the
+        # sitemap lastmod it was last seen with.
+        self._touches.pop(url, None)
+        self._stores[url] = (url, kind, etag, last_modified, content_hash, json.dumps(links or []), sitemap_lastmod)
+        self._written()
+
+    def touch(self, url, sitemap_lastmod=None):
+        """Record that url was confirmed unchanged (optionally with its new sitemap lastmod)."""
+        pending = self._stores.get(url)
+        if pending is not None:
+            if sitemap_lastmod:
+                self._stores[url] = pending[:6] + (sitemap_lastmod,)
+        else:
+            self._touches[url] = sitemap_lastmod or self._touches.get(url)
+        self._written()
+
+    def _written(self):
+        if len(self._stores) + len(self._touches) >= self.FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered entries in one short transaction."""
+        if not self._stores and not self._touches:
+            return
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            self.conn.executemany(self._upsert, self._stores.values())
+            self.conn.executemany(self._touch, ((lastmod, url) for url, lastmod in self._touches.items()))
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        self._stores = {}
+        self._touches = {}
+
+    def close(self):
+        self.flush()
+        self.conn.close()
+
+
+class IncrementalCrawlMiddleware:
+    """
+    Downloader middleware that turns repeat visits into conditional requests.
+
+    Active only for spiders with a ``page_cache`` attribute (SiteSpider run
+    with ``-a incremental=1``). Requests may carry ``meta["sitemap_lastmod"]``;
+    when it matches the stored value the download is skipped and a synthetic
+    304 is returned, flagged with ``meta["page_cache_hit"]``.
+    """
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.stats = crawler.stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        middleware = cls(crawler)
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def _cache(self):
+        return getattr(self.crawler.spider, "page_cache", None)
+
+    @staticmethod
+    def _allow_304(request):
+        """Let a 304 through HttpErrorMiddleware to the spider callback."""
+        allowed = list(request.meta.get("handle_httpstatus_list", []))
+        if 304 not in allowed:
+            request.meta["handle_httpstatus_list"] = allowed + [304]
+
+    def process_request(self, request, spider=None):
+        cache = self._cache()
+        if cache is None:
+            return None
+        # DiskDupeFilter tags requests no earlier crawl has made; nothing cached.
+        if request.meta.get("seen_before") is False:
+            self.stats.inc_value("page_cache/new_url")
+            return None
+
+        cached = cache.get(request.url)
+        if cached is None:
+            return None
+
+        sitemap_lastmod = request.meta.get("sitemap_lastmod")
+        if sitemap_lastmod and sitemap_lastmod == cached.sitemap_lastmod:
+            self.stats.inc_value("page_cache/sitemap_skipped")
+            request.meta["page_cache_hit"] = True
+            self._allow_304(request)
+            return HtmlResponse(request.url, status=304, body=b"", request=request)
+
+        if cached.etag:
+            request.headers.setdefault("If-None-Match", cached.etag)
+        if cached.last_modified:
+            request.headers.setdefault("If-Modified-Since", cached.last_modified)
+        if cached.etag or cached.last_modified:
+            self._allow_304(request)
+        return None
+
+    def process_response(self, request, response, spider=None):
+        if response.status == 304 and not request.meta.get("page_cache_hit"):
+            self.stats.inc_value("page_cache/not_modified")
+        return response
+
+    def spider_closed(self, spider):
+        cache = getattr(spider, "page_cache", None)
+        if cache is not None:
+            cache.close()
@@ -0,0 +1,257 @@
+"""
+Crawling one large host in several processes at once.
+
+A single SiteSpider process crawls a host no faster than one Scrapy process
+can parse, and the root calstatela.edu crawl dwarfs every other site.
+run_all_spiders.py therefore splits hosts whose previous crawls took longer
+than config.CRAWL_PARTITION_SECONDS into partitions by top-level path
+section (/ecst, /admissions, /sites, ...):
+
+  * plan_partitions() weighs each section by the pages earlier crawls fetched
+    under it (the incremental page cache), or by its sitemap.xml entries, plus
+    the pages that linked PDFs, and deals the sections out longest-first so
+    every partition gets about the same amount of work. Sections nobody has
+    seen yet are assigned by a stable hash; the host root belongs to
+    partition 0.
+  * Each partition is an ordinary SiteSpider process (``-a partition_plan=...
+    -a partition=N``). It seeds its own sections (their sitemap entries and
+    the shortest URL seen under each) and only fetches URLs it owns.
+  * A link into another partition's section is handed off through a small
+    SQLite file (PartitionCoordinator) instead of being dropped; its owner
+    picks it up within seconds. Each URL is handed off once. A partition
+    closes only when every partition is idle and nothing is waiting to be
+    picked up, so the whole host is still covered.
+  * All partitions draw from the same per-host token bucket (host_budget.py),
+    so the host sees the same request rate as with one process.
+
+Partitions store their PDF links in discovered_pdf as usual, but don't
+record a discovery_crawl or export scan files (complete_crawl = False).
+run_all_spiders.py does that once, for the merged result, when all of a
+host's partitions have finished: discovered_pdf's primary key already
+deduplicates links found by more than one partition.
+"""
+import json
+import re
+import sqlite3
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+
+# netloc and path of an absolute http(s) URL.
+_HTTP_URL = re.compile(r"https?://([^/?#]*)([^?#]*)", re.IGNORECASE)
+
+create_partition_tables = """
+CREATE TABLE IF NOT EXISTS partition_handoff (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL UNIQUE,
+    partition INTEGER NOT NULL,     -- owner
+    depth INTEGER NOT NULL,
+    referrer TEXT,
+    taken INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE INDEX IF NOT EXISTS idx_partition_handoff_inbox ON partition_handoff(partition, taken);
+
+CREATE TABLE IF NOT EXISTS partition_state (
+    partition INTEGER PRIMARY KEY,
+    idle INTEGER NOT NULL,
+    closed INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+def top_prefix(url):
+    """First path segment of url ('' for the host root), e.g. 'ecst' for /ecst/forms."""
+    match = _HTTP_URL.match(url)
+    path = match.group(2) if match else ""
+    return path.lstrip("/").split("/", 1)[0]
+
+
+def _hashed_partition(prefix, count):
+    return zlib.crc32(prefix.encode("utf-8")) % count if prefix else 0
+
+
+class HostPartition:
+    """Which partition of a host owns a URL, from a plan written by plan_partitions()."""
+
+    def __init__(self, plan, index):
+        self.host = plan["host"]
+        self.count = plan["count"]
+        self.index = index
+        self.prefixes = plan["prefixes"]
+        self.seeds = plan.get("seeds", {})
+        self.handoff_db = plan["handoff_db"]
+        if not 0 <= index < self.count:
+            raise ValueError(f"partition {index} out of range for {self.count} partitions of {self.host}")
+
+    @classmethod
+    def load(cls, plan_path, index):
+        with open(plan_path, encoding="utf-8") as file:
+            return cls(json.load(file), int(index))
+
+    def owner_of(self, url):
+        prefix = top_prefix(url)
+        owner = self.prefixes.get(prefix)
+        return _hashed_partition(prefix, self.count) if owner is None else owner
+
+    def owns(self, url):
+        return self.owner_of(url) == self.index
+
+    def own_seeds(self):
+        """Seed URLs (one per section seen before) for this partition's sections."""
+        return [url for prefix, url in sorted(self.seeds.items()) if self.prefixes.get(prefix) == self.index]
+
+
+def section_weights(host, page_cache_path=None, db_path=None, fetch_sitemap=None):
+    """
+    (weights, seeds) for a host's top-level sections: pages fetched under each
+    by earlier crawls (page cache) or, when the cache has none,
+    fetch_sitemap(host)'s URLs, plus pages that linked PDFs (discovered_pdf).
+    seeds holds the shortest URL seen in each section.
+    """
+    host = host.lower()
+
+    def on_host(url):
+        match = _HTTP_URL.match(url or "")
+        if not match:
+            return False
+        netloc = match.group(1).lower().rsplit("@", 1)[-1]
+        return netloc == host or netloc.endswith("." + host)
+
+    def read(path, query):
+        if not path or not Path(path).exists():
+            return []
+        conn = sqlite3.connect(str(path), timeout=30)
+        try:
+            return [row[0] for row in conn.execute(query)]
+        except sqlite3.OperationalError:
+            return []  # table not created yet
+        finally:
+            conn.close()
+
+    pages = [url for url in read(page_cache_path, "SELECT url FROM page_cache WHERE kind = 'html'") if on_host(url)]
+    if not pages and fetch_sitemap is not None:
+        pages = [url for url in fetch_sitemap(host) if on_host(url)]
+    pages += [url for url in read(db_path, "SELECT DISTINCT parent_uri FROM discovered_pdf") if on_host(url)]
+
+    weights, seeds = Counter(), {}
+    for url in pages:
+        prefix = top_prefix(url)
+        weights[prefix] += 1
+        if prefix and (prefix not in seeds or len(url) < len(seeds[prefix])):
+            seeds[prefix] = url
+    return weights, seeds
+
+
+def plan_partitions(host, count, weights, seeds, handoff_db):
+    """
+    Deal a host's sections out to `count` partitions, heaviest first, each to
+    the partition with the least weight so far. The host root ('') always
+    goes to partition 0, which also crawls the start URLs.
+    """
+    loads = [0] * count
+    prefixes = {"": 0}
+    loads[0] += weights.get("", 0)
+    for prefix, weight in sorted(weights.items(), key=lambda item: (-item[1], item[0])):
+        if not prefix:
+            continue
+        target = min(range(count), key=lambda i: (loads[i], i))
+        prefixes[prefix] = target
+        loads[target] += weight
+    return {
+        "host": host,
+        "count": count,
+        "prefixes": prefixes,
+        "seeds": seeds,
+        "loads": loads,
+        "handoff_db": str(handoff_db),
+    }
+
+
+class PartitionCoordinator:
+    """
+    Hand-offs and idle state shared by the partitions of one host, in SQLite.
+
+    hand_off() buffers links owned by other partitions; flush() writes them
+    (INSERT OR IGNORE, so a URL is handed off once). take() returns this
+    partition's new links and marks it busy. idle() marks it idle and says
+    whether the whole host is done: every partition idle or closed, nothing
+    waiting for a partition that is still open.
+
+    A partition that hasn't reported for STALE_SECONDS (crashed, killed) is
+    treated as closed so the others don't wait for it forever.
+    """
+
+    STALE_SECONDS = 600
+
+    def __init__(self, path, index, count):
+        self.index = index
+        self.count = count
+        self.pending = []
+        self.handed_off = set()
+        # isolation_level=None: transactions are managed explicitly below.
+        self.conn = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(create_partition_tables)
+        self._set_state(idle=0)
+
+    def _set_state(self, idle, closed=0):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO partition_state (partition, idle, closed, updated_at) VALUES (?, ?, ?, ?)",
+            (self.index, idle, closed, time.time()),
+        )
+
+    def hand_off(self, url, owner, depth, referrer):
+        if url not in self.handed_off:
+            self.handed_off.add(url)
+            self.pending.append((url, owner, depth, referrer))
+
+    def flush(self):
+        """Write buffered hand-offs; returns how many were new."""
+        if not self.pending:
+            return 0
+        before = self.conn.total_changes
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO partition_handoff (url, partition, depth, referrer) VALUES (?, ?, ?, ?)",
+            self.pending,
+        )
+        self.conn.execute("COMMIT")
+        self.pending = []
+        return self.conn.total_changes - before
+
+    def take(self, limit=1000):
+        """(url, depth, referrer) links handed to this partition since the last take()."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        rows = self.conn.execute(
+            "SELECT id, url, depth, referrer FROM partition_handoff "
+            "WHERE partition = ? AND taken = 0 ORDER BY id LIMIT ?",
+            (self.index, limit),
+        ).fetchall()
+        self.conn.executemany("UPDATE partition_handoff SET taken = 1 WHERE id = ?", [(row[0],) for row in rows])
+        self._set_state(idle=0)
+        self.conn.execute("COMMIT")
+        return [row[1:] for row in rows]
+
+    def idle(self):
+        """Mark this partition idle; True once every partition is done."""
+        self.flush()
+        self.conn.execute("BEGIN IMMEDIATE")
+        self._set_state(idle=1)
+        stale_before = time.time() - self.STALE_SECONDS
+        states = self.conn.execute("SELECT partition, idle, closed, updated_at FROM partition_state").fetchall()
+        finished = {p for p, idle, closed, updated_at in states if closed or updated_at < stale_before}
+        idle = {p for p, idle, closed, updated_at in states if idle} | finished
+        waiting = self.conn.execute(
+            "SELECT DISTINCT partition FROM partition_handoff WHERE taken = 0"
+        ).fetchall()
+        self.conn.execute("COMMIT")
+        busy = [p for p in range(self.count) if p not in idle]
+        return not busy and all(p in finished for (p,) in waiting)
+
+    def close(self):
+        self.flush()
+        self._set_state(idle=1, closed=1)
+        self.conn.close()
@@ -3,11 +3,225 @@
 # Don't forget to add your pipeline to the ITEM_PIPELINES setting
 # See: https://docs.scrapy.org/en/latest/topics/item-pipeline.html
 
+import os
+import sqlite3
+import sys
+import time
+from datetime import datetime
 
-# useful for handling different item types with a single interface
-from itemadapter import ItemAdapter
+from scrapy import signals
+
+from csula_pdf_scan.frontier import FrontierClient
+from csula_pdf_scan.items import DiscoveredPdfItem, PageAliasItem
+
+# Project root is three levels up (crawlers/csula_pdf_scan/csula_pdf_scan/).
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../../'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from src.core.database import ensure_discovered_pdf, ensure_page_alias
+
+SEEN_AT_FORMAT = '%Y-%m-%d %H:%M:%S.%f'
+
+upsert_discovered_pdf = """
+INSERT INTO discovered_pdf (site, pdf_uri, parent_uri, first_seen_at, last_seen_at)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (site, pdf_uri, parent_uri)
+DO UPDATE SET last_seen_at = MAX(last_seen_at, excluded.last_seen_at)
+"""
+
+upsert_page_alias = """
+INSERT INTO page_alias (alias_uri, canonical_uri, host, distance, first_seen_at, last_seen_at)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (alias_uri)
+DO UPDATE SET canonical_uri = excluded.canonical_uri, host = excluded.host, distance = excluded.distance,
+              last_seen_at = MAX(last_seen_at, excluded.last_seen_at)
+"""
+
+
+def seen_at_now():
+    return datetime.now().strftime(SEEN_AT_FORMAT)
+
+
+def store_page_aliases(conn, rows):
+    """
+    (host, alias_uri, canonical_uri, distance, seen_at) rows into page_alias.
+    A URL that becomes an alias hands its own aliases to the new canonical
+    URL, and a URL that becomes canonical stops being an alias.
+    """
+    for host, alias_uri, canonical_uri, distance, seen_at in rows:
+        conn.execute("UPDATE page_alias SET canonical_uri = ? WHERE canonical_uri = ?", (canonical_uri, alias_uri))
+        conn.execute("DELETE FROM page_alias WHERE alias_uri = ?", (canonical_uri,))
+        conn.execute(upsert_page_alias, (alias_uri, canonical_uri, host, distance, seen_at, seen_at))
+    conn.commit()
+
+
+def export_scan_file(conn, folder, started_at, output_folder):
+    """Write scanned_pdfs.txt for one site from the discovered_pdf rows seen since started_at."""
+    rows = conn.execute(
+        "SELECT pdf_uri, parent_uri, last_seen_at FROM discovered_pdf "
+        "WHERE site = ? AND last_seen_at >= ? ORDER BY rowid",
+        (folder, started_at),
+    ).fetchall()
+
+    os.makedirs(output_folder, exist_ok=True)
+    with open(os.path.join(output_folder, 'scanned_pdfs.txt'), 'w', encoding='utf-8') as file:
+        for pdf_uri, parent_uri, seen_at in rows:
+            # Same "PDF PARENT YYYY-MM-DD HH:MM:SS" lines the spiders used to write.
+            file.write(f"{pdf_uri} {parent_uri} {seen_at[:19]}\n")
+    return len(rows)
+
+
+def record_merged_crawl(sites, started_at, finished_at, reason, budget_truncated=()):
+    """
+    Record one discovery_crawl per site for a crawl that ran as several
+    partition processes (see partitions.py), and export each site's
+    scanned_pdfs.txt from everything the partitions found since started_at.
+    A finished crawl is recorded as 'budget' for the sites whose keys are in
+    budget_truncated (cut short by a page or time budget in any process).
+    Returns {site folder: PDF links}.
+    """
+    conn = sqlite3.connect(config.DATABASE_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    ensure_discovered_pdf(conn)
+    found = {}
+    for site in sites:
+        folder = os.path.basename(site.output_folder)
+        conn.execute(
+            "INSERT INTO discovery_crawl (site, started_at, finished_at, finish_reason) VALUES (?, ?, ?, ?)",
+            (folder, started_at, finished_at,
+             "budget" if reason == "finished" and site.key in budget_truncated else reason),
+        )
+        conn.commit()
+        if config.CRAWL_EXPORT_SCAN_FILES:
+            found[folder] = export_scan_file(conn, folder, started_at, site.output_folder)
+    conn.close()
+    return found
 
 
 class CslaPdfScanPipeline:
-    def process_item(self, item, spider):
+    """
+    Streams DiscoveredPdfItems into the discovered_pdf table, and
+    PageAliasItems (near-duplicate pages, see near_duplicates.py) into
+    page_alias.
+
+    Items are buffered and written in one transaction every BATCH_SIZE items
+    or FLUSH_SECONDS, whichever comes first, so a killed crawl loses at most
+    the last few seconds of findings. Each crawled site gets a discovery_crawl
+    row, closed with the spider's finish reason for that site ('budget' for
+    a site SiteSpider cut short); only crawls that end with 'finished' count
+    as complete (see sql/get_discovered_pdfs.sql).
+
+    When config.CRAWL_EXPORT_SCAN_FILES is set, each site's scanned_pdfs.txt
+    is written from the rows this crawl saw, in the usual
+    "PDF PARENT TIMESTAMP" format.
+
+    Spiders that only re-check part of a site (VerifySpider) set
+    ``complete_crawl = False``: their links are stored the same way, but no
+    discovery_crawl is recorded and no scan file is exported, so the last
+    full crawl stays the reference for each site. Partition processes do the
+    same; run_all_spiders.py records their merged crawl with
+    record_merged_crawl().
+
+    Nodes of a distributed crawl (FRONTIER_URL set, see frontier.py) open no
+    database: each batch goes to the frontier service, which stores it in
+    its own discovered_pdf and page_alias tables.
+    """
+
+    BATCH_SIZE = 100
+    FLUSH_SECONDS = 5.0
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.conn = None
+        self.sink = None
+        self.pending = []
+        self.pending_aliases = []
+        self.last_flush = time.monotonic()
+        self.crawls = {}  # site folder -> (discovery_crawl id, started_at, site)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        pipeline = cls(crawler)
+        crawler.signals.connect(pipeline.spider_closed, signal=signals.spider_closed)
+        return pipeline
+
+    def open_spider(self, spider=None):
+        # Newer Scrapy no longer passes the spider; older versions require it.
+        spider = spider or self.crawler.spider
+        if self.crawler.settings.get("FRONTIER_URL"):
+            self.sink = FrontierClient.from_settings(self.crawler.settings)
+            return
+        self.conn = sqlite3.connect(config.DATABASE_PATH, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        ensure_discovered_pdf(self.conn)
+        ensure_page_alias(self.conn)
+
+        if not getattr(spider, "complete_crawl", True):
+            return
+        started_at = seen_at_now()
+        for site in getattr(spider, "sites", {}).values():
+            folder = os.path.basename(site.output_folder)
+            cursor = self.conn.execute(
+                "INSERT INTO discovery_crawl (site, started_at) VALUES (?, ?)",
+                (folder, started_at),
+            )
+            self.crawls[folder] = (cursor.lastrowid, started_at, site)
+        self.conn.commit()
+
+    def process_item(self, item, spider=None):
+        if isinstance(item, PageAliasItem):
+            self.pending_aliases.append(
+                (item["host"], item["alias_uri"], item["canonical_uri"], item["distance"], item["seen_at"])
+            )
+        elif isinstance(item, DiscoveredPdfItem):
+            self.pending.append((item["site"], item["pdf_uri"], item["parent_uri"], item["seen_at"], item["seen_at"]))
+        else:
+            return item
+
+        pending = len(self.pending) + len(self.pending_aliases)
+        if pending >= self.BATCH_SIZE or time.monotonic() - self.last_flush >= self.FLUSH_SECONDS:
+            self._flush()
         return item
+
+    def _flush(self):
+        if self.pending and self.sink is not None:
+            self.sink.store_items([row[:4] for row in self.pending])
+            self.pending = []
+        elif self.pending:
+            self.conn.executemany(upsert_discovered_pdf, self.pending)
+            self.conn.commit()
+            self.pending = []
+        if self.pending_aliases and self.sink is not None:
+            self.sink.store_aliases(self.pending_aliases)
+            self.pending_aliases = []
+        elif self.pending_aliases:
+            store_page_aliases(self.conn, self.pending_aliases)
+            self.pending_aliases = []
+        self.last_flush = time.monotonic()
+
+    def spider_closed(self, spider, reason):
+        if self.sink is not None:
+            self._flush()
+            return
+        if self.conn is None:
+            return
+        self._flush()
+
+        finished_at = seen_at_now()
+        finish_reason = getattr(spider, "finish_reason", None)
+        for crawl_id, _, site in self.crawls.values():
+            self.conn.execute(
+                "UPDATE discovery_crawl SET finished_at = ?, finish_reason = ? WHERE id = ?",
+                (finished_at, finish_reason(site, reason) if finish_reason else reason, crawl_id),
+            )
+        self.conn.commit()
+
+        if config.CRAWL_EXPORT_SCAN_FILES:
+            for folder, (_, started_at, site) in self.crawls.items():
+                export_scan_file(self.conn, folder, started_at, site.output_folder)
+                spider.logger.info("PDF LINKS for %s saved to %s", folder, site.output_folder)
+
+        self.conn.close()
+        self.conn = None
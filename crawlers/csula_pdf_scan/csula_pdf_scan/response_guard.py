@@ -0,0 +1,97 @@
+"""
+Keep the crawler from downloading bodies it has no use for.
+
+SiteSpider follows every in-scope link, and only HTML pages (plus sitemap
+XML) are worth reading: PDFs just need their URL recorded, and Word files,
+archives, images and video need nothing at all. ResponseGuardMiddleware
+
+  * drops requests whose URL ends in a known binary extension before they
+    are sent,
+  * caps the body size per expected type (download_maxsize/warnsize), and
+  * looks at the Content-Type as soon as the headers arrive and stops the
+    download of anything that isn't HTML/XML. The headers-only response
+    still reaches the spider (flagged 'download_stopped'), so a PDF served
+    from an extensionless URL such as ld.php is recorded without fetching
+    its body; the scanner downloads it once, later.
+"""
+import posixpath
+from urllib.parse import urlparse
+
+from scrapy import signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured, StopDownload
+from scrapy.linkextractors import IGNORED_EXTENSIONS
+
+# Scrapy's list of non-HTML extensions, minus pdf: a .pdf URL that does get
+# requested (e.g. via a redirect) still needs its headers checked and recorded.
+SKIPPED_EXTENSIONS = frozenset("." + ext for ext in IGNORED_EXTENSIONS if ext != "pdf")
+
+# Content types whose bodies the spider parses.
+PARSED_TYPES = ("text/html", "application/xhtml+xml", "application/xml", "text/xml", "text/plain")
+
+
+def url_extension(url):
+    """Lower-cased extension of the URL path ('' if none), e.g. '.docx'."""
+    return posixpath.splitext(urlparse(url).path)[1].lower()
+
+
+def content_type(headers):
+    """Media type from a Content-Type header, without parameters ('' if missing)."""
+    value = headers.get(b"Content-Type") or b""
+    return value.decode("latin-1").split(";", 1)[0].strip().lower()
+
+
+class ResponseGuardMiddleware:
+    """
+    Downloader middleware that skips, caps and stops non-HTML downloads.
+
+    Settings:
+        RESPONSE_GUARD_ENABLED   -- turn the guard off entirely.
+        RESPONSE_GUARD_MAXSIZE   -- {"html": bytes, "xml": bytes}, per expected type.
+        RESPONSE_GUARD_WARNSIZE  -- same keys, log a warning above this size.
+    """
+
+    def __init__(self, stats, maxsize, warnsize):
+        self.stats = stats
+        self.maxsize = maxsize
+        self.warnsize = warnsize
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool("RESPONSE_GUARD_ENABLED", True):
+            raise NotConfigured("RESPONSE_GUARD_ENABLED is off")
+        middleware = cls(
+            crawler.stats,
+            maxsize=settings.getdict("RESPONSE_GUARD_MAXSIZE"),
+            warnsize=settings.getdict("RESPONSE_GUARD_WARNSIZE"),
+        )
+        crawler.signals.connect(middleware.headers_received, signal=signals.headers_received)
+        return middleware
+
+    def process_request(self, request, spider=None):
+        extension = url_extension(request.url)
+        if extension in SKIPPED_EXTENSIONS:
+            self.stats.inc_value("response_guard/skipped_extension")
+            self.stats.inc_value(f"response_guard/skipped_extension/{extension.lstrip('.')}")
+            raise IgnoreRequest(f"Not crawling {extension} file: {request.url}")
+
+        expected = "xml" if extension == ".xml" else "html"
+        if expected in self.maxsize:
+            request.meta.setdefault("download_maxsize", int(self.maxsize[expected]))
+        if expected in self.warnsize:
+            request.meta.setdefault("download_warnsize", int(self.warnsize[expected]))
+        return None
+
+    def headers_received(self, headers, body_length, request, spider=None, **kwargs):
+        media_type = content_type(headers)
+        if not media_type or media_type.startswith(PARSED_TYPES):
+            return
+
+        if media_type == "application/pdf":
+            self.stats.inc_value("response_guard/pdf_from_headers")
+        else:
+            self.stats.inc_value("response_guard/stopped_non_html")
+        if body_length and body_length > 0:
+            # Unknown lengths (chunked responses) are reported as -1.
+            self.stats.inc_value("response_guard/bytes_avoided", body_length)
+        raise StopDownload(fail=False)
@@ -50,21 +50,78 @@ TELNETCONSOLE_ENABLED = False
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
-#DOWNLOADER_MIDDLEWARES = {
+DOWNLOADER_MIDDLEWARES = {
 #    "csula_pdf_scan.middlewares.CslaPdfScanDownloaderMiddleware": 543,
-#}
+    # Skips binary file links and stops non-HTML downloads after the headers
+    "csula_pdf_scan.response_guard.ResponseGuardMiddleware": 540,
+    # Conditional requests / sitemap-lastmod skips for incremental crawls;
+    # a no-op unless the spider runs with -a incremental=1.
+    "csula_pdf_scan.page_cache.IncrementalCrawlMiddleware": 550,
+    # Shared per-host token bucket; inactive unless HOST_BUDGET_DB is set
+    # (run_all_spiders.py sets it so all crawl processes share one budget).
+    "csula_pdf_scan.host_budget.HostBudgetMiddleware": 560,
+}
+HOST_BUDGET_DB = None
+HOST_BUDGET_RATE = 8.0    # combined requests/second per host, across processes
+HOST_BUDGET_BURST = 16.0
+
+# ResponseGuardMiddleware: body size caps by expected type (sitemaps can be large)
+RESPONSE_GUARD_ENABLED = True
+RESPONSE_GUARD_MAXSIZE = {"html": 10 * 1024 * 1024, "xml": 50 * 1024 * 1024}
+RESPONSE_GUARD_WARNSIZE = {"html": 2 * 1024 * 1024, "xml": 10 * 1024 * 1024}
+
+# Crawler-trap screening in SiteSpider (traps.py): visits per URL shape per
+# host (digits -> {n}, query values dropped), and the most query parameters a
+# followed link may carry.
+TRAP_PATTERN_BUDGET = 200
+TRAP_MAX_QUERY_PARAMS = 8
+
+# Yield-guided frontier in SiteSpider (yield_model.py): follow links to
+# FRONTIER_BASE_DEPTH everywhere, and up to FRONTIER_MAX_DEPTH under path
+# prefixes whose pages have linked at least FRONTIER_MIN_YIELD PDFs. Per-site
+# request cap and crawl wall-time cap in seconds; 0 = unlimited. A site cut
+# short by either is recorded with finish reason 'budget', not 'finished'.
+FRONTIER_BASE_DEPTH = 3
+FRONTIER_MAX_DEPTH = 6
+FRONTIER_MIN_YIELD = 1
+SITE_PAGE_BUDGET = 0
+SITE_TIME_BUDGET = 0
+
+# Near-duplicate pruning in SiteSpider (near_duplicates.py): a page whose main
+# content is within NEAR_DUPLICATE_DISTANCE bits (SimHash, 64 bits, at most 3)
+# of a page already crawled on the host for the same subsites is recorded in
+# page_alias; its PDF and Box links are recorded but its other links are not
+# followed. Pages under NEAR_DUPLICATE_MIN_WORDS words are never compared.
+NEAR_DUPLICATE_ENABLED = True
+NEAR_DUPLICATE_DISTANCE = 3
+NEAR_DUPLICATE_MIN_WORDS = 30
+
+# On-disk, per-host request dupefilter (dupefilter.py), which also holds
+# FrontierGuard's canonical URL keys; files go to
+# DISK_DUPEFILTER_DIR, or config.CRAWL_SEEN_DIR when it is empty.
+DUPEFILTER_CLASS = "csula_pdf_scan.dupefilter.DiskDupeFilter"
+DISK_DUPEFILTER_DIR = None
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
-#EXTENSIONS = {
+EXTENSIONS = {
 #    "scrapy.extensions.telnet.TelnetConsole": None,
-#}
+    # Per-site pages/s, bytes, latency percentiles, status and depth
+    # histograms, duplicates and PDFs per page (telemetry.py); one JSON file
+    # per process under CRAWL_TELEMETRY_DIR (config.CRAWL_TELEMETRY_DIR when
+    # empty), grouped by CRAWL_TELEMETRY_RUN.
+    "csula_pdf_scan.telemetry.CrawlTelemetry": 500,
+}
+CRAWL_TELEMETRY_ENABLED = True
+CRAWL_TELEMETRY_DIR = None
+CRAWL_TELEMETRY_RUN = None
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
-#ITEM_PIPELINES = {
-#    "csula_pdf_scan.pipelines.CslaPdfScanPipeline": 300,
-#}
+# Streams discovered PDF links into the discovered_pdf table as they are found
+ITEM_PIPELINES = {
+    "csula_pdf_scan.pipelines.CslaPdfScanPipeline": 300,
+}
 
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
@@ -0,0 +1,606 @@
+import hashlib
+import json
+import os
+import re
+import time
+from collections import Counter
+from datetime import datetime
+from urllib.parse import urlparse
+
+import scrapy
+from scrapy import signals
+from scrapy.exceptions import DontCloseSpider
+from scrapy.http import TextResponse
+
+from csula_pdf_scan.box_handler import BoxShare, box_share_pattern_match, get_resolver, parse_share_page
+from csula_pdf_scan.dupefilter import SeenSets
+from csula_pdf_scan.frontier import FrontierClient
+from csula_pdf_scan.items import DiscoveredPdfItem, PageAliasItem
+from csula_pdf_scan.links import LinkClassifier, extract_links
+from csula_pdf_scan.near_duplicates import NearDuplicates
+from csula_pdf_scan.page_cache import PageCache
+from csula_pdf_scan.partitions import HostPartition, PartitionCoordinator
+from csula_pdf_scan.pipelines import seen_at_now
+from csula_pdf_scan.sites import load_sites, group_by_host
+from csula_pdf_scan.traps import FrontierGuard
+from csula_pdf_scan.yield_model import PrefixYield
+
+# Importable once csula_pdf_scan.sites has put the project root on sys.path.
+import config
+
+
+class SiteSpider(scrapy.Spider):
+    """
+    One data-driven spider for every site.
+
+    Sites come from the drupal_site table (or data/sites.csv); pass a subset
+    with ``scrapy crawl site -a sites=calstatela.edu_ecst,calstatela.edu_uas``.
+
+    Sites are grouped by host and each host is crawled once: its sitemap.xml
+    is fetched once, start URLs of every subsite are seeded, and links are
+    followed if they fall under any subsite's scope_path. Each fetched page is
+    attributed to every subsite whose scope contains it, so a PDF linked from
+    /ecst/... lands in calstatela.edu_ecst's scanned_pdfs.txt (and in the
+    whole-host site's, if one is being crawled) without fetching the page
+    twice. Requests use the most specific owning subsite as their download
+    slot, so subsites still get their own delay/concurrency slot.
+    Each PDF link is yielded as a DiscoveredPdfItem (one per owning site) and
+    streamed into the discovered_pdf table by CslaPdfScanPipeline, which also
+    exports the usual per-site scanned_pdfs.txt when the crawl ends.
+
+    With ``-a stats_path=...`` the spider also writes per-site crawl timings
+    (seconds from first to last response, pages fetched) as JSON, which
+    run_all_spiders.py uses to balance the next run.
+
+    Followed links are canonicalized and screened for crawler traps by
+    FrontierGuard (see traps.py): each URL shape gets TRAP_PATTERN_BUDGET
+    visits per host, and the patterns that ran out are reported per site in
+    the crawl stats (traps/throttled/<site>/<pattern>).
+
+    The frontier is steered by PDF yield (see yield_model.py): links under
+    path prefixes whose pages linked PDFs in earlier crawls (or already in
+    this one) get a higher request priority. Links are followed to
+    FRONTIER_BASE_DEPTH everywhere and up to FRONTIER_MAX_DEPTH under
+    sections with at least FRONTIER_MIN_YIELD PDFs. SITE_PAGE_BUDGET caps
+    the requests per site and SITE_TIME_BUDGET the crawl's wall time;
+    0 disables either. A site that had links refused by either budget
+    closes its discovery_crawl with reason 'budget' rather than 'finished',
+    so a truncated crawl never becomes the reference crawl.
+
+    Links are read from each page with the regex extractor in links.py and
+    sorted into PDF / Box / followable by a per-host LinkClassifier whose
+    scope checks are precomputed and cached per URL.
+
+    Pages whose main content repeats a page already crawled on the host for
+    the same subsites (Drupal's /node/NNN, /index.php/... and print views;
+    see near_duplicates.py) are yielded as PageAliasItems for the page_alias
+    table. Their PDF and Box links are still recorded (the fingerprint only
+    covers visible text, so two such pages can link different PDFs), but
+    their other links are not followed.
+    A page is never pruned in favour of one owned by other subsites, so each
+    subsite keeps the PDF links of its own pages.
+    NEAR_DUPLICATE_ENABLED turns this off.
+
+    With ``-a incremental=1`` pages are fetched conditionally against
+    config.CRAWL_CACHE_PATH (see page_cache.py): unchanged pages come back as
+    304 and their stored links are replayed instead of re-parsed, and sitemap
+    entries whose <lastmod> hasn't moved are not fetched at all.
+
+    With ``-a partition_plan=<plan.json> -a partition=N`` the spider crawls
+    only partition N of one host's top-level sections and hands links into
+    other sections to their partitions (see partitions.py);
+    run_all_spiders.py starts one such process per partition for its
+    largest hosts and records the merged crawl when they have all finished.
+
+    With ``-s FRONTIER_URL=http://...`` (and FrontierScheduler as SCHEDULER)
+    the spider is one node of a distributed crawl: requests are shared
+    through a frontier service, PDF links and failed Box links are sent to
+    it, and only a FRONTIER_SEED node queues the start requests (see
+    frontier.py and frontier_service.py).
+    """
+
+    name = "site"
+    custom_settings = {
+        # Depth is enforced per section by the frontier (FRONTIER_*_DEPTH)
+        'DEPTH_LIMIT': 0,
+        'CONCURRENT_REQUESTS': 16,
+        'DOWNLOAD_DELAY': 0.25,
+    }
+
+    # Seconds between checks for links handed over by other partitions.
+    PARTITION_POLL_SECONDS = 10
+
+    def __init__(self, sites=None, stats_path=None, incremental=None, partition_plan=None, partition=None,
+                 *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats_path = stats_path
+        if str(incremental or "").lower() in ("1", "true", "yes"):
+            self.page_cache = PageCache(config.CRAWL_CACHE_PATH)
+        else:
+            self.page_cache = None
+        keys = [key.strip() for key in sites.split(",") if key.strip()] if sites else None
+        self.sites = {site.key: site for site in load_sites(keys)}
+        self.hosts = group_by_host(self.sites.values())
+        self.allowed_domains = sorted(self.hosts)
+        # Scope checks and link sorting per host, precomputed (see links.py)
+        self.link_classifiers = {host: LinkClassifier(host, sites) for host, sites in self.hosts.items()}
+        self.failed_box_links = {key: [] for key in self.sites}
+        self.partition = None
+        if partition_plan:
+            self.partition = HostPartition.load(partition_plan, partition or 0)
+            if list(self.hosts) != [self.partition.host]:
+                raise ValueError(f"A partitioned crawl covers one host ({self.partition.host}), got {self.allowed_domains}")
+            # The merged crawl is recorded by run_all_spiders.py once every partition is done.
+            self.complete_crawl = False
+        self.site_timings = {key: {"first": None, "last": None, "pages": 0} for key in self.sites}
+
+    @classmethod
+    def from_crawler(cls, crawler, *args, **kwargs):
+        spider = super().from_crawler(crawler, *args, **kwargs)
+        spider.frontier = FrontierGuard(
+            SeenSets.from_crawler(crawler).for_host,
+            pattern_budget=crawler.settings.getint("TRAP_PATTERN_BUDGET", 200),
+            max_query_params=crawler.settings.getint("TRAP_MAX_QUERY_PARAMS", 8),
+        )
+        settings = crawler.settings
+        spider.base_depth = settings.getint("FRONTIER_BASE_DEPTH", 3)
+        spider.max_depth = settings.getint("FRONTIER_MAX_DEPTH", 6)
+        spider.min_yield = settings.getint("FRONTIER_MIN_YIELD", 1)
+        spider.page_budget = settings.getint("SITE_PAGE_BUDGET", 0)
+        spider.time_budget = settings.getfloat("SITE_TIME_BUDGET", 0)
+        spider.yields = PrefixYield.load(config.DATABASE_PATH, spider.hosts)
+        spider.near_duplicates = None
+        if settings.getbool("NEAR_DUPLICATE_ENABLED", True):
+            spider.near_duplicates = NearDuplicates(
+                max_distance=settings.getint("NEAR_DUPLICATE_DISTANCE", 3),
+                min_words=settings.getint("NEAR_DUPLICATE_MIN_WORDS", 30),
+            )
+        spider.requested = Counter()
+        spider.budget_truncated = set()
+        spider.crawl_started = time.monotonic()
+        spider.box_shares = get_resolver().cache
+        spider.box_waiting = {}
+        spider.coordinator = None
+        spider.shared_frontier = None
+        if settings.get("FRONTIER_URL"):
+            spider.shared_frontier = FrontierClient.from_settings(settings)
+            spider.frontier_seed = settings.getbool("FRONTIER_SEED")
+            # run_all_spiders.py records the crawl once every node is done.
+            spider.complete_crawl = False
+        if spider.partition is not None:
+            spider.coordinator = PartitionCoordinator(
+                spider.partition.handoff_db, spider.partition.index, spider.partition.count
+            )
+            spider.last_poll = time.monotonic()
+            crawler.signals.connect(spider._partition_idle, signal=signals.spider_idle)
+        return spider
+
+    def _owners(self, host, url):
+        """Subsites of host whose scope_path contains url."""
+        return self.link_classifiers[host].owners_of(url)
+
+    def _record_response(self, owners):
+        now = time.monotonic()
+        for site in owners:
+            timing = self.site_timings[site.key]
+            if timing["first"] is None:
+                timing["first"] = now
+            timing["last"] = now
+            timing["pages"] += 1
+
+    def _discovered(self, sites, pdf_uri, parent_uri):
+        """One DiscoveredPdfItem per site, for CslaPdfScanPipeline."""
+        self.yields.record(parent_uri, pdf_uri)
+        seen_at = seen_at_now()
+        for site in sites:
+            yield DiscoveredPdfItem(
+                pdf_uri=pdf_uri,
+                parent_uri=parent_uri,
+                site=os.path.basename(site.output_folder),
+                seen_at=seen_at,
+            )
+
+    def _request(self, url, host, callback=None, **kwargs):
+        """
+        Build a request tagged with its host group. On-host URLs use the most
+        specific subsite that owns them as download slot (the host itself if
+        none does); off-host URLs (Box) keep Scrapy's per-hostname slot.
+        """
+        meta = kwargs.pop("meta", {})
+        meta["host"] = host
+        if (urlparse(url).hostname or "").lower().endswith(host.lower()):
+            meta["download_slot"] = self._slot_key(host, url)
+        return scrapy.Request(url, callback=callback or self.parse, meta=meta, **kwargs)
+
+    def _slot_key(self, host, url):
+        """Key of the most specific subsite owning url, or the host if none does."""
+        owners = self._owners(host, url)
+        return max(owners, key=lambda site: len(site.scope_path)).key if owners else host
+
+    async def start(self):
+        """Scrapy >= 2.13 entry point; older versions call start_requests() directly."""
+        for request in self.start_requests():
+            yield request
+
+    def start_requests(self):
+        """Tries sitemap.xml first to seed all pages; also queues start_urls as fallback."""
+        if self.shared_frontier is not None and not self.frontier_seed:
+            return  # this node only takes requests from the shared frontier
+        for host, sites in self.hosts.items():
+            self.logger.info("Queueing %s: %s", host, ", ".join(site.key for site in sites))
+            yield self._request(
+                f"https://{host}/sitemap.xml",
+                host,
+                callback=self._parse_sitemap,
+                errback=self._sitemap_error,
+                dont_filter=True,
+            )
+            # Start URLs go through the dupe filter: subsites' start pages are
+            # often linked from each other, and a filtered-out duplicate (or a
+            # redirect to one) would otherwise be fetched and reported twice.
+            for site in sites:
+                for url in site.start_urls:
+                    if self._partition_owns(url):
+                        yield self._seed(host, url)
+            if self.partition is not None:
+                # One known page per section this partition owns.
+                for url in self.partition.own_seeds():
+                    if self._owners(host, url):
+                        yield self._seed(host, url)
+
+    def _seed(self, host, url):
+        url = self.frontier.mark(url, host)
+        self.requested[self._slot_key(host, url)] += 1
+        return self._request(url, host, priority=self.yields.priority(url, 0))
+
+    def _partition_owns(self, url):
+        """False if this is a partition process and another partition owns url."""
+        return self.partition is None or self.partition.owns(url)
+
+    @staticmethod
+    def _sitemap_entries(text):
+        """(loc, lastmod) pairs from a sitemap; lastmod is None when absent."""
+        blocks = re.findall(r'<url>(.*?)</url>', text, re.DOTALL)
+        if not blocks:
+            # Sitemap index or unusual markup: plain <loc> entries, no lastmod.
+            return [(loc.strip(), None) for loc in re.findall(r'<loc>(.*?)</loc>', text, re.DOTALL)]
+        entries = []
+        for block in blocks:
+            loc = re.search(r'<loc>(.*?)</loc>', block, re.DOTALL)
+            if loc:
+                lastmod = re.search(r'<lastmod>(.*?)</lastmod>', block, re.DOTALL)
+                entries.append((loc.group(1).strip(), lastmod.group(1).strip() if lastmod else None))
+        return entries
+
+    def _parse_sitemap(self, response):
+        """
+        Seed requests from the <loc> entries in sitemap.xml that some subsite
+        owns. Each carries its <lastmod> so an incremental crawl can skip
+        pages that haven't changed since they were last fetched.
+        """
+        host = response.meta["host"]
+        for url, lastmod in self._sitemap_entries(response.text):
+            if url and self._owners(host, url) and self._partition_owns(url):
+                meta = {"sitemap_lastmod": lastmod} if lastmod else {}
+                url = self.frontier.mark(url, host)
+                self.requested[self._slot_key(host, url)] += 1
+                yield self._request(url, host, meta=meta, priority=self.yields.priority(url, 1))
+
+    def _sitemap_error(self, failure):
+        """Sitemap not available; start_urls already queued in start_requests."""
+        self.logger.debug("sitemap.xml not accessible for %s, relying on start_urls",
+                          failure.request.meta.get("host"))
+
+    def parse(self, response):
+        """
+        Main parser that extracts PDF links and follows internal links.
+        In incremental mode a 304 (or an unchanged body) replays the links
+        stored for this page on its last full fetch.
+        """
+        host = response.meta["host"]
+        owners = self._owners(host, response.url)
+        self._record_response(owners)
+
+        if self.partition is not None and time.monotonic() - self.last_poll >= self.PARTITION_POLL_SECONDS:
+            self._schedule_handed_off()
+
+        cached = self.page_cache.get(response.url) if self.page_cache is not None else None
+        if response.status == 304:
+            if cached is None:
+                self.logger.warning("304 for %s but no cached copy; skipping", response.url)
+                return
+            self.page_cache.touch(response.url, response.meta.get("sitemap_lastmod"))
+            kind, links = cached.kind, cached.links
+        else:
+            # Capture PDFs served with application/pdf content type (e.g. ld.php
+            # downloads); ResponseGuardMiddleware stops these after the headers.
+            content_type = response.headers.get('Content-Type', b'').decode('utf-8', errors='ignore').lower()
+            if 'application/pdf' in content_type:
+                kind = 'pdf'
+            elif isinstance(response, TextResponse) and 'download_stopped' not in response.flags:
+                kind = 'html'
+            else:
+                # Word files, images, archives, ...: nothing to record or follow.
+                self.crawler.stats.inc_value("site/non_html_responses")
+                return
+            links = None
+
+        if kind == 'pdf':
+            referring_page = response.meta.get('referrer', response.url)
+            yield from self._discovered(self._owners(host, referring_page), response.url, referring_page)
+            self.logger.info('Found PDF (Content-Type): %s', response.url)
+            if self.page_cache is not None and response.status != 304:
+                self._store_page(response, 'pdf')
+            return
+
+        if self.near_duplicates is not None and response.status != 304:
+            duplicate = self._near_duplicate(host, owners, response)
+            if duplicate is not None:
+                yield duplicate
+                if duplicate["alias_uri"] == response.url:
+                    # Already downloaded: keep its PDFs, skip its pages.
+                    yield from self._follow_links(host, response.url, owners, extract_links(response),
+                                                  follow=False)
+                    return
+
+        if links is None:
+            content_hash = hashlib.sha1(response.body).hexdigest()
+            if cached is not None and cached.content_hash == content_hash:
+                self.crawler.stats.inc_value("page_cache/unchanged")
+                links = cached.links
+            else:
+                links = extract_links(response)
+            if self.page_cache is not None:
+                self._store_page(response, 'html', content_hash, links)
+
+        yield from self._follow_links(host, response.url, owners, links, response.meta.get("depth", 0))
+
+    def _near_duplicate(self, host, owners, response):
+        """A PageAliasItem if the page repeats one already crawled on host for the same owners, else None."""
+        fingerprint = self.near_duplicates.fingerprint(response.text)
+        if fingerprint is None:
+            return None
+        group = (host, frozenset(site.key for site in owners))
+        match = self.near_duplicates.match(group, response.url, fingerprint)
+        if match is None:
+            return None
+        canonical_uri, alias_uri, distance = match
+        stats = self.crawler.stats
+        stats.inc_value("near_duplicates/found")
+        if alias_uri == response.url:
+            stats.inc_value("near_duplicates/pruned")
+            self.logger.debug("Near-duplicate of %s (%d bits): %s", canonical_uri, distance, alias_uri)
+        return PageAliasItem(alias_uri=alias_uri, canonical_uri=canonical_uri, host=host, distance=distance,
+                             seen_at=seen_at_now())
+
+    def _store_page(self, response, kind, content_hash=None, links=None):
+        headers = response.headers
+        self.page_cache.store(
+            response.url,
+            kind,
+            etag=(headers.get('ETag') or b'').decode('latin-1') or None,
+            last_modified=(headers.get('Last-Modified') or b'').decode('latin-1') or None,
+            content_hash=content_hash,
+            links=links,
+            sitemap_lastmod=response.meta.get("sitemap_lastmod"),
+        )
+
+    def _within_budget(self, host, url, depth):
+        """
+        Depth and page/time budget checks for a link at `depth` (the depth the
+        new request would have). Returns the reason it is refused, or None.
+        """
+        if self.time_budget and time.monotonic() - self.crawl_started > self.time_budget:
+            return "time_budget"
+        if depth > self.base_depth and (depth > self.max_depth or self.yields.yield_for(url) < self.min_yield):
+            return "depth_limited"
+        if self.page_budget and self.requested[self._slot_key(host, url)] >= self.page_budget:
+            return "page_budget"
+        return None
+
+    def finish_reason(self, site, reason):
+        """
+        Finish reason to record for site's discovery_crawl: 'budget' instead
+        of 'finished' when the page or time budget refused any of its links.
+        """
+        if reason == "finished" and site.key in self.budget_truncated:
+            return "budget"
+        return reason
+
+    def _follow_links(self, host, page_url, owners, links, depth=0, follow=True):
+        """
+        Record PDF links found on page_url and yield requests for the rest
+        (only the PDF and Box links with follow=False).
+        """
+        classify = self.link_classifiers[host].classify
+        for absolute_url in links:
+            kind, _ = classify(absolute_url)
+            if kind is None:
+                continue
+
+            if kind == LinkClassifier.PDF:
+                yield from self._discovered(owners, absolute_url, page_url)
+                self.logger.info('Found PDF: %s (from %s)', absolute_url, page_url)
+
+            elif kind == LinkClassifier.BOX:
+                yield from self._box_link(host, absolute_url, page_url, owners)
+
+            elif not follow:
+                continue
+
+            elif self.partition is not None and not self.partition.owns(absolute_url):
+                # Another partition's section: its owner fetches it.
+                self.coordinator.hand_off(absolute_url, self.partition.owner_of(absolute_url), depth + 1, page_url)
+                self.crawler.stats.inc_value("partition/handed_off")
+
+            else:
+                request = self._follow(host, absolute_url, depth + 1, page_url)
+                if request is not None:
+                    yield request
+
+    def _follow(self, host, absolute_url, depth, referrer):
+        """
+        Request for an internal link at `depth` that falls under a subsite's
+        scope, or None if it is a duplicate, a query/path cycle or over budget.
+        """
+        slot = self._slot_key(host, absolute_url)
+        if self.frontier.is_duplicate(absolute_url, host):
+            self.crawler.stats.inc_value("traps/duplicate")
+            # Per-slot duplicate count for the crawl telemetry (telemetry.py).
+            self.crawler.stats.inc_value(f"telemetry/duplicates/{slot}")
+            return None
+        # Budget checks come before admit() records the link, so a link
+        # refused here at depth 5 can still be admitted later from a
+        # shallower page.
+        refused = self._within_budget(host, absolute_url, depth)
+        if refused:
+            self.crawler.stats.inc_value(f"frontier/{refused}")
+            if refused != "depth_limited":
+                # A page never fetched: these sites were cut short (see finish_reason()).
+                self.budget_truncated.update(site.key for site in self._owners(host, absolute_url))
+            return None
+        url, reason = self.frontier.admit(absolute_url, slot, host)
+        if reason:
+            self.crawler.stats.inc_value(f"traps/{reason}")
+            return None
+        if depth > self.base_depth:
+            self.crawler.stats.inc_value("frontier/deep_requests")
+        self.requested[slot] += 1
+        return self._request(url, host, meta={'referrer': referrer}, priority=self.yields.priority(url, depth))
+
+    def _schedule_handed_off(self):
+        """
+        Schedule the links other partitions handed to this one. They go
+        straight to the engine (not through a callback's output) so they
+        keep the depth of the page that linked them. Returns how many.
+        """
+        self.last_poll = time.monotonic()
+        self.coordinator.flush()
+        host = self.partition.host
+        scheduled = 0
+        for url, depth, referrer in self.coordinator.take():
+            self.crawler.stats.inc_value("partition/received")
+            request = self._follow(host, url, depth, referrer)
+            if request is not None:
+                request.meta["depth"] = depth
+                self.crawler.engine.crawl(request)
+                scheduled += 1
+        return scheduled
+
+    def _partition_idle(self, spider=None):
+        """Keep the spider open until every partition of the host is done."""
+        if self._schedule_handed_off() or not self.coordinator.idle():
+            raise DontCloseSpider
+
+    def _box_link(self, host, share_url, page_url, owners):
+        """
+        A Box.com link on page_url. Shares resolved recently (by any crawl or
+        scan, see box_handler.py) are answered from the cache; otherwise the
+        share page is fetched once and every page linking it waits for that
+        answer.
+        """
+        if not box_share_pattern_match(share_url):
+            # Folders, vanity URLs, login pages: nothing the scanner can download.
+            for site in owners:
+                self.failed_box_links[site.key].append((share_url, page_url))
+            return
+        share = self.box_shares.get(share_url)
+        if share is not None:
+            self.crawler.stats.inc_value("box/cached")
+            yield from self._box_result(share, [(owners, page_url)])
+            return
+        waiting = self.box_waiting.setdefault(share_url, [])
+        waiting.append((owners, page_url))
+        if len(waiting) == 1:
+            # dont_filter: Box isn't in allowed_domains, and each share is requested once anyway.
+            yield self._request(
+                share_url,
+                host,
+                callback=self.parse_box,
+                errback=self._box_failed,
+                meta={'box_link': share_url},
+                dont_filter=True,
+            )
+
+    def parse_box(self, response):
+        """Read a Box share page (regex only), cache the answer and record the waiting links."""
+        share_url = response.meta['box_link']
+        if isinstance(response, TextResponse):
+            share = parse_share_page(share_url, response.text)
+        else:
+            share = BoxShare(share_url, None, False, None, "No PDF found in Box share")
+        self.box_shares.store(share)
+        self.logger.info('Handling a Box.com link: %s', share_url)
+        yield from self._box_result(share, self.box_waiting.pop(share_url, []))
+
+    def _box_failed(self, failure):
+        """Share page unreachable: not cached (the scanner retries it), links recorded as failed."""
+        share_url = failure.request.meta['box_link']
+        for owners, page_url in self.box_waiting.pop(share_url, []):
+            for site in owners:
+                self.failed_box_links[site.key].append((share_url, page_url))
+
+    def _box_result(self, share, waiting):
+        """DiscoveredPdfItems for a downloadable PDF share, else failed_box_links entries."""
+        for owners, page_url in waiting:
+            if share.downloadable:
+                yield from self._discovered(owners, share.share_url, page_url)
+            else:
+                # If no PDF was found, record this Box link as "failed" for reference
+                for site in owners:
+                    self.failed_box_links[site.key].append((share.share_url, page_url))
+
+    def _write_failed_box_links(self):
+        box_file = 'failed_box_links.txt' if self.partition is None else f'failed_box_links.part{self.partition.index}.txt'
+        for site in self.sites.values():
+            os.makedirs(site.output_folder, exist_ok=True)
+            failed_box_path = os.path.join(site.output_folder, box_file)
+
+            with open(failed_box_path, 'w', encoding='utf-8') as file:
+                for pdf_link, ref_url in self.failed_box_links[site.key]:
+                    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    file.write(f"{pdf_link} {ref_url} {timestamp}\n")
+
+    def _send_failed_box_links(self):
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        self.shared_frontier.store_box_failures([
+            (os.path.basename(self.sites[key].output_folder), pdf_link, ref_url, timestamp)
+            for key, links in self.failed_box_links.items()
+            for pdf_link, ref_url in links
+        ])
+
+    def closed(self, reason):
+        """
+        Called automatically when the spider finishes.
+        Writes each site's failed Box links to <output_folder>/failed_box_links.txt
+        (failed_box_links.part<N>.txt for a partition, merged by
+        run_all_spiders.py; sent to the frontier service by a distributed
+        crawl node; discovered PDFs are already in the database, see
+        CslaPdfScanPipeline).
+        """
+        if self.coordinator is not None:
+            self.coordinator.close()
+        if self.shared_frontier is not None:
+            self._send_failed_box_links()
+        else:
+            self._write_failed_box_links()
+
+        traps = {site_key: dict(patterns) for site_key, patterns in self.frontier.throttled.items()}
+        for site_key, patterns in traps.items():
+            for pattern, count in patterns.items():
+                self.crawler.stats.set_value(f"traps/throttled/{site_key}/{pattern}", count)
+            self.logger.info("Throttled URL patterns for %s: %s", site_key,
+                             ", ".join(f"{pattern} ({count})" for pattern, count in patterns.items()))
+
+        if self.stats_path:
+            timings = {
+                key: {
+                    "duration_seconds": round((t["last"] - t["first"]) if t["first"] is not None else 0.0, 1),
+                    "pages": t["pages"],
+                }
+                for key, t in self.site_timings.items()
+            }
+            os.makedirs(os.path.dirname(os.path.abspath(self.stats_path)), exist_ok=True)
+            with open(self.stats_path, 'w', encoding='utf-8') as file:
+                json.dump({"reason": reason, "sites": timings, "throttled_patterns": traps,
+                           "budget_truncated": sorted(self.budget_truncated)}, file, indent=2)
@@ -0,0 +1,180 @@
+import hashlib
+import json
+import os
+from collections import Counter, defaultdict
+from urllib.parse import urlparse
+
+from scrapy.http import TextResponse
+
+from csula_pdf_scan.links import extract_links
+from csula_pdf_scan.sites import normalize_site_key
+from csula_pdf_scan.spiders.site_spider import SiteSpider
+from csula_pdf_scan.traps import canonical_key
+
+
+class VerifySpider(SiteSpider):
+    """
+    Re-checks only the pages that linked PDFs last time.
+
+    Seeds one request per distinct parent_uri in drupal_pdf_files (rows not
+    marked removed) for the selected sites and follows nothing. Pages are
+    fetched conditionally against config.CRAWL_CACHE_PATH, so an unchanged
+    page costs a 304 and its stored links are reused; changed pages are read
+    with the regex extractor in links.py rather than a full selector.
+
+    For every parent page that could be verified:
+
+      * each PDF link on it is yielded as a DiscoveredPdfItem, so known PDFs
+        get a fresh last_seen_at and PDFs not in drupal_pdf_files yet are
+        picked up by the next scan like any crawled link;
+      * known PDFs no longer linked from it are marked removed, the same
+        decision mark_pdfs_as_removed() makes after a full crawl. A page
+        that now returns 404/410 links nothing.
+
+    Parents that fail, time out, redirect to another host, answer with
+    something other than HTML or come back without a single link are left
+    untouched: only a page we actually read can show a PDF is gone. Pass
+    ``-a mark_removed=0`` to report without marking.
+
+    With ``-a stats_path=...`` a JSON summary (counts plus the removed and new
+    pairs) is written when the spider closes.
+    """
+
+    name = "verify"
+    # Re-checks part of each site; the last full crawl stays the reference.
+    complete_crawl = False
+    custom_settings = {
+        # Independent pages, no link following: spread wide. Per-host
+        # politeness still comes from HostBudgetMiddleware when enabled.
+        'CONCURRENT_REQUESTS': 64,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': 16,
+        'DOWNLOAD_DELAY': 0,
+        'AUTOTHROTTLE_ENABLED': False,
+        'RETRY_TIMES': 1,
+    }
+
+    def __init__(self, sites=None, stats_path=None, mark_removed=None, *args, **kwargs):
+        super().__init__(sites, stats_path, "1", *args, **kwargs)
+        self.mark_removed = str(mark_removed or "1").lower() in ("1", "true", "yes")
+        # parent_uri -> {pdf_uri: {site keys}}, from drupal_pdf_files
+        self.known = defaultdict(lambda: defaultdict(set))
+        # parent_uri -> canonical keys of the PDF links found on it
+        self.found = {}
+        self.new_pairs = []
+        self.outcomes = Counter()
+
+    def _load_known(self):
+        from src.data_management.data_import import get_known_pdf_parents
+
+        for domain_name, parent_uri, pdf_uri in get_known_pdf_parents():
+            key = normalize_site_key(domain_name)
+            if key in self.sites and parent_uri:
+                self.known[parent_uri][pdf_uri].add(key)
+
+    def start_requests(self):
+        self._load_known()
+        self.logger.info("Verifying %d parent pages across %d sites", len(self.known), len(self.sites))
+        for parent_uri, pdfs in self.known.items():
+            site_keys = {key for keys in pdfs.values() for key in keys}
+            host = self.sites[min(site_keys)].allowed_domain
+            yield self._request(
+                parent_uri,
+                host,
+                callback=self.parse,
+                errback=self._parent_failed,
+                meta={"parent_uri": parent_uri, "handle_httpstatus_list": [404, 410]},
+            )
+
+    def _parent_failed(self, failure):
+        self.outcomes["failed"] += 1
+        self.logger.debug("Could not verify %s: %s", failure.request.meta.get("parent_uri"), failure.value)
+
+    def parse(self, response):
+        parent_uri = response.meta["parent_uri"]
+        self._record_response(self._owners(response.meta["host"], parent_uri))
+
+        if response.status in (404, 410):
+            self.outcomes["gone"] += 1
+            self.found[parent_uri] = set()
+            return
+
+        if urlparse(response.url).hostname != urlparse(parent_uri).hostname:
+            # Login walls and retired sections often redirect elsewhere.
+            self.outcomes["redirected_off_host"] += 1
+            return
+
+        if response.status == 304:
+            cached = self.page_cache.get(response.url)
+            if cached is None:
+                self.outcomes["unverified"] += 1
+                return
+            self.page_cache.touch(response.url)
+            self.outcomes["not_modified"] += 1
+            links = cached.links
+        elif isinstance(response, TextResponse) and 'download_stopped' not in response.flags:
+            links = extract_links(response)
+            self._store_page(response, 'html', hashlib.sha1(response.body).hexdigest(), links)
+            self.outcomes["fetched"] += 1
+        else:
+            self.outcomes["unverified"] += 1
+            return
+
+        if not links:
+            # An error or placeholder page; don't let it remove anything.
+            self.outcomes["unverified"] += 1
+            return
+
+        # Every link counts for presence: known PDFs include extensionless
+        # downloads (ld.php?id=5) found through their Content-Type.
+        link_keys = {canonical_key(url): url for url in links}
+        self.found[parent_uri] = set(link_keys)
+
+        known = self.known[parent_uri]
+        known_keys = {canonical_key(pdf_uri): pdf_uri for pdf_uri in known}
+        sites = [self.sites[key] for key in sorted({key for keys in known.values() for key in keys})]
+        for key, pdf_uri in sorted(known_keys.items()):
+            if key in link_keys:
+                yield from self._discovered(sites, pdf_uri, parent_uri)
+        for key, url in sorted(link_keys.items()):
+            if key not in known_keys and urlparse(url).path.lower().endswith('.pdf'):
+                self.new_pairs.append((url, parent_uri))
+                self.crawler.stats.inc_value("verify/new_pdfs")
+                yield from self._discovered(sites, url, parent_uri)
+
+    def _unlinked(self):
+        """Known (pdf_uri, parent_uri) pairs whose verified parent no longer links the PDF."""
+        return [
+            (pdf_uri, parent_uri)
+            for parent_uri, found in self.found.items()
+            for pdf_uri in self.known[parent_uri]
+            if canonical_key(pdf_uri) not in found
+        ]
+
+    def closed(self, reason):
+        removed = self._unlinked()
+        if removed and self.mark_removed:
+            from src.data_management.data_import import mark_pdf_pairs_as_removed
+
+            changed = mark_pdf_pairs_as_removed(removed)
+            self.logger.info("Marked %d PDF links as removed", changed)
+
+        self.outcomes["verified"] = len(self.found)
+        self.outcomes["requested"] = len(self.known)
+        for outcome, count in self.outcomes.items():
+            self.crawler.stats.set_value(f"verify/parents/{outcome}", count)
+        self.crawler.stats.set_value("verify/removed_pdfs", len(removed))
+        self.logger.info(
+            "Verified %d of %d parent pages: %d PDF links gone, %d new",
+            len(self.found), len(self.known), len(removed), len(self.new_pairs),
+        )
+
+        if self.stats_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.stats_path)), exist_ok=True)
+            with open(self.stats_path, 'w', encoding='utf-8') as file:
+                json.dump({
+                    "reason": reason,
+                    "parents": dict(self.outcomes),
+                    "marked_removed": self.mark_removed,
+                    "removed": removed,
+                    "new": self.new_pairs,
+                }, file, indent=2)
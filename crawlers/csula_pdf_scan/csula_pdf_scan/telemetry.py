@@ -0,0 +1,296 @@
+"""
+Per-site crawl telemetry.
+
+CrawlTelemetry is a Scrapy extension (enabled in settings.py for every
+spider) that tracks, for each site (the most specific subsite that owns a
+page, as SiteSpider's download slots; the host group when none does):
+
+  * pages fetched (every response downloaded, redirects included), bytes
+    downloaded and pages per second;
+  * response times (Scrapy's download_latency) in a histogram of
+    half-octave buckets, so percentiles can be read back after merging;
+  * HTTP status counts and the depth histogram of fetched pages;
+  * duplicate links dropped by the spider's frontier and by the dupefilter;
+  * distinct PDF links found, and on how many pages.
+
+When the spider closes it writes one JSON file to
+<CRAWL_TELEMETRY_DIR>/<run>/<spider>-<pid>.json. run_all_spiders.py gives
+every process of one run the same CRAWL_TELEMETRY_RUN, so partitions and
+distributed nodes of a host are merged in the summary that
+``python run_all_spiders.py --report`` prints (load_run / summarize /
+format_summary below). Rows that look slow or misconfigured are flagged.
+"""
+import bisect
+import json
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+# Project root is three levels up (crawlers/csula_pdf_scan/csula_pdf_scan/).
+project_root = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../../'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+
+RUN_FORMAT = "%Y%m%d-%H%M%S"
+
+# Upper edges (seconds) of the latency buckets: 25 ms doubling every two
+# buckets up to ~36 s; anything slower lands in a last, open bucket.
+LATENCY_EDGES = [round(0.025 * 2 ** (i / 2), 3) for i in range(22)]
+
+# Flags in the summary.
+SLOW_P90_SECONDS = 3.0
+SLOW_PAGES_PER_SECOND = 0.2
+ERROR_SHARE = 0.2          # 4xx/5xx share of responses
+REDIRECT_SHARE = 0.5       # 3xx share: often a site moved or a scope that no longer matches
+NO_PDF_MIN_PAGES = 50      # a site this big with no PDF at all is worth a look
+
+
+def new_row():
+    return {
+        "pages": 0,
+        "bytes": 0,
+        "first": None,
+        "last": None,
+        "statuses": Counter(),
+        "depths": Counter(),
+        "latency": Counter(),   # bucket index -> responses
+        "duplicates": 0,
+        "pdfs": 0,
+        "pdf_pages": 0,
+    }
+
+
+def merge_row(into, row):
+    """Add row (as read from JSON) into `into`."""
+    for key in ("pages", "bytes", "duplicates", "pdfs", "pdf_pages"):
+        into[key] += row[key]
+    for key in ("statuses", "depths", "latency"):
+        into[key].update({int(k): v for k, v in row[key].items()})
+    if row["first"] is not None:
+        into["first"] = row["first"] if into["first"] is None else min(into["first"], row["first"])
+        into["last"] = row["last"] if into["last"] is None else max(into["last"], row["last"])
+    return into
+
+
+def latency_percentile(latency, fraction):
+    """Upper edge of the bucket holding the given fraction of responses (None if empty)."""
+    total = sum(latency.values())
+    if not total:
+        return None
+    needed = fraction * total
+    seen = 0
+    for bucket in sorted(latency):
+        seen += latency[bucket]
+        if seen >= needed:
+            return LATENCY_EDGES[bucket] if bucket < len(LATENCY_EDGES) else float("inf")
+    return float("inf")
+
+
+class CrawlTelemetry:
+    """Scrapy extension; see the module docstring."""
+
+    def __init__(self, crawler, directory, run):
+        self.crawler = crawler
+        self.directory = Path(directory)
+        self.run = run
+        self.rows = {}
+        self.pdf_pairs = {}     # row -> {(pdf_uri, parent_uri)}
+        self.pdf_parents = {}   # row -> {parent_uri}
+        self.started_at = datetime.now()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        if not settings.getbool("CRAWL_TELEMETRY_ENABLED", True):
+            raise NotConfigured
+        extension = cls(
+            crawler,
+            settings.get("CRAWL_TELEMETRY_DIR") or config.CRAWL_TELEMETRY_DIR,
+            settings.get("CRAWL_TELEMETRY_RUN") or datetime.now().strftime(RUN_FORMAT),
+        )
+        # response_downloaded, not response_received: RedirectMiddleware turns
+        # 3xx responses into new requests before the engine sees them.
+        crawler.signals.connect(extension.response_downloaded, signal=signals.response_downloaded)
+        crawler.signals.connect(extension.request_dropped, signal=signals.request_dropped)
+        crawler.signals.connect(extension.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(extension.spider_closed, signal=signals.spider_closed)
+        return extension
+
+    def _row_key(self, request):
+        """The owning subsite (SiteSpider's download slot), else the host group or hostname."""
+        meta = request.meta
+        slot = meta.get("download_slot")
+        if slot is not None and slot in getattr(self.crawler.spider, "sites", ()):
+            return slot
+        return meta.get("host") or request.url.split("/")[2].split("@")[-1]
+
+    def _row(self, key):
+        row = self.rows.get(key)
+        if row is None:
+            row = self.rows[key] = new_row()
+        return row
+
+    def response_downloaded(self, response, request, spider):
+        row = self._row(self._row_key(request))
+        now = time.time()
+        if row["first"] is None:
+            row["first"] = now
+        row["last"] = now
+        row["pages"] += 1
+        row["bytes"] += len(response.body)
+        row["statuses"][response.status] += 1
+        row["depths"][request.meta.get("depth", 0)] += 1
+        latency = request.meta.get("download_latency")
+        if latency is not None:
+            row["latency"][bisect.bisect_left(LATENCY_EDGES, latency)] += 1
+
+    def request_dropped(self, request, spider):
+        self._row(self._row_key(request))["duplicates"] += 1
+
+    def item_scraped(self, item, response, spider):
+        pdf_uri, parent_uri = item.get("pdf_uri"), item.get("parent_uri")
+        if not pdf_uri:
+            return
+        # One item per owning site: count each link on a page once.
+        key = self._row_key(response.request) if response.request is not None else parent_uri
+        pairs = self.pdf_pairs.setdefault(key, set())
+        if (pdf_uri, parent_uri) not in pairs:
+            pairs.add((pdf_uri, parent_uri))
+            self.pdf_parents.setdefault(key, set()).add(parent_uri)
+            row = self._row(key)
+            row["pdfs"] = len(pairs)
+            row["pdf_pages"] = len(self.pdf_parents[key])
+
+    def spider_closed(self, spider, reason):
+        stats = self.crawler.stats.get_stats()
+        # Links SiteSpider's frontier dropped as duplicates, per slot.
+        prefix = "telemetry/duplicates/"
+        for key, value in stats.items():
+            if key.startswith(prefix):
+                self._row(key[len(prefix):])["duplicates"] += value
+
+        run_dir = self.directory / self.run
+        run_dir.mkdir(parents=True, exist_ok=True)
+        report = {
+            "run": self.run,
+            "spider": spider.name,
+            "pid": os.getpid(),
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "reason": reason,
+            "sites": self.rows,
+            "stats": {
+                key: value for key, value in stats.items()
+                if isinstance(value, (int, float)) and not key.startswith(prefix)
+                and key.startswith(("downloader/", "dupefilter/", "frontier/", "traps/", "page_cache/",
+                                    "near_duplicates/", "response_guard/", "partition/", "item_scraped_count"))
+            },
+        }
+        with open(run_dir / f"{spider.name}-{os.getpid()}.json", "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2, sort_keys=True)
+        spider.logger.info("Crawl telemetry written to %s", run_dir)
+
+
+def list_runs(directory=None):
+    directory = Path(directory or config.CRAWL_TELEMETRY_DIR)
+    if not directory.exists():
+        return []
+    return sorted(path.name for path in directory.iterdir() if path.is_dir())
+
+
+def load_run(run=None, directory=None):
+    """The reports of one run (the latest when run is None), as a list of dicts."""
+    directory = Path(directory or config.CRAWL_TELEMETRY_DIR)
+    if run is None:
+        runs = list_runs(directory)
+        if not runs:
+            return []
+        run = runs[-1]
+    reports = []
+    for path in sorted((directory / run).glob("*.json")):
+        with open(path, encoding="utf-8") as file:
+            reports.append(json.load(file))
+    return reports
+
+
+def summarize(reports):
+    """{slot: summary dict} over every process of a run, slowest crawl first."""
+    rows = {}
+    for report in reports:
+        for key, row in report["sites"].items():
+            merge_row(rows.setdefault(key, new_row()), row)
+
+    summary = {}
+    for key, row in rows.items():
+        seconds = (row["last"] - row["first"]) if row["first"] is not None else 0.0
+        pages = row["pages"]
+        groups = Counter()
+        for status, count in row["statuses"].items():
+            groups[f"{status // 100}xx"] += count
+        p90 = latency_percentile(row["latency"], 0.9)
+        flags = []
+        if pages and ((p90 or 0) > SLOW_P90_SECONDS or (seconds > 60 and pages / seconds < SLOW_PAGES_PER_SECOND)):
+            flags.append("slow")
+        if pages and (groups["4xx"] + groups["5xx"]) / pages > ERROR_SHARE:
+            flags.append("errors")
+        if pages and groups["3xx"] / pages > REDIRECT_SHARE:
+            flags.append("redirects")
+        if pages >= NO_PDF_MIN_PAGES and not row["pdfs"]:
+            flags.append("no-pdfs")
+        summary[key] = {
+            "pages": pages,
+            "seconds": round(seconds, 1),
+            "pages_per_second": round(pages / seconds, 2) if seconds else None,
+            "megabytes": round(row["bytes"] / 1e6, 1),
+            "p50": latency_percentile(row["latency"], 0.5),
+            "p90": p90,
+            "p99": latency_percentile(row["latency"], 0.99),
+            "statuses": dict(sorted(row["statuses"].items())),
+            "status_groups": dict(sorted(groups.items())),
+            "depths": dict(sorted(row["depths"].items())),
+            "duplicates": row["duplicates"],
+            "pdfs": row["pdfs"],
+            "pdf_pages": row["pdf_pages"],
+            "pdfs_per_page": round(row["pdfs"] / pages, 2) if pages else 0.0,
+            "flags": flags,
+        }
+    return dict(sorted(summary.items(), key=lambda item: (-item[1]["seconds"], item[0])))
+
+
+def _seconds(value):
+    if value is None:
+        return "-"
+    return ">36s" if value == float("inf") else f"{value:.2f}"
+
+
+def format_summary(summary, run=None):
+    """A fixed-width table of summarize()'s output, one line per site."""
+    lines = []
+    if run:
+        lines.append(f"Crawl telemetry, run {run}")
+    lines.append(f"{'site':<44}{'pages':>7}{'min':>7}{'pg/s':>7}{'MB':>8}{'p50':>7}{'p90':>7}{'p99':>7}"
+                 f"{'2xx':>7}{'3xx':>6}{'4xx':>6}{'5xx':>6}{'dups':>7}{'maxd':>5}{'pdfs':>6}{'pdf/pg':>7}  flags")
+    for key, row in summary.items():
+        groups = row["status_groups"]
+        max_depth = max(row["depths"], default=0)
+        lines.append(
+            f"{key[:43]:<44}{row['pages']:>7}{row['seconds'] / 60:>7.1f}"
+            f"{row['pages_per_second'] if row['pages_per_second'] is not None else '-':>7}"
+            f"{row['megabytes']:>8}{_seconds(row['p50']):>7}{_seconds(row['p90']):>7}{_seconds(row['p99']):>7}"
+            f"{groups.get('2xx', 0):>7}{groups.get('3xx', 0):>6}{groups.get('4xx', 0):>6}{groups.get('5xx', 0):>6}"
+            f"{row['duplicates']:>7}{max_depth:>5}{row['pdfs']:>6}{row['pdfs_per_page']:>7}  {' '.join(row['flags'])}"
+        )
+    flagged = sum(1 for row in summary.values() if row["flags"])
+    lines.append(f"{len(summary)} sites, {flagged} flagged "
+                 f"(slow: p90 > {SLOW_P90_SECONDS:g}s or < {SLOW_PAGES_PER_SECOND:g} pages/s; "
+                 f"errors: > {ERROR_SHARE:.0%} 4xx/5xx; redirects: > {REDIRECT_SHARE:.0%} 3xx; "
+                 f"no-pdfs: {NO_PDF_MIN_PAGES}+ pages without one)")
+    return "\n".join(lines)
@@ -0,0 +1,167 @@
+"""
+URL canonicalization and crawler-trap detection for SiteSpider.
+
+Drupal sites generate near-endless URL spaces: calendars that page forever
+(/events/2031/07), views whose ?page=, ?sort= and facet parameters combine
+freely, and search results. DEPTH_LIMIT alone lets a few of these eat most of
+a crawl, so FrontierGuard screens every followed link:
+
+  * canonicalize_url() removes what never changes the page: fragments,
+    tracking parameters and sort orders. The cleaned URL is the one requested.
+  * canonical_key() also folds case, 'www.', default ports, trailing slashes
+    and parameter order. Links with the same key are queued once; the keys
+    are kept in the per-host SQLite files of dupefilter.SeenSets, not in
+    memory. Scrapy's own dupefilter still sees the real URL, so redirects
+    between the variants (/a -> /a/) still go through.
+  * url_pattern() turns a URL into its shape: digit runs become {n} and query
+    values are dropped (/events/{n}/{n}?page). Each pattern gets a visit
+    budget per host. Links beyond it are throttled and counted per site.
+  * Links whose query repeats a parameter or facet value, or whose path
+    repeats the same segments over and over, are treated as cycles and
+    dropped.
+"""
+import re
+from collections import Counter, defaultdict
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "_ga", "_gl",
+    "_hsenc", "_hsmi", "hsctatracking", "igshid", "yclid",
+})
+TRACKING_PREFIXES = ("utm_",)
+
+# Re-orderings of the same listing (Drupal views use sort_by/sort_order/order).
+SORT_PARAMS = frozenset({"sort", "sort_by", "sort_order", "order", "orderby", "dir", "direction"})
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+_DIGITS = re.compile(r"\d+")
+# f[0]=type:news, f[1]=year:2024 -> base key 'f'
+_INDEXED_KEY = re.compile(r"\[\d*\]$")
+
+
+def _kept_params(query):
+    """Query parameters minus tracking and sort parameters, in their original order."""
+    params = []
+    for key, value in parse_qsl(query, keep_blank_values=True):
+        name = key.lower()
+        if name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES) or name in SORT_PARAMS:
+            continue
+        params.append((key, value))
+    return params
+
+
+def canonicalize_url(url):
+    """The URL to request: no fragment, tracking parameters or sort order."""
+    parsed = urlparse(url)
+    query = parsed.query
+    if query:
+        kept = _kept_params(query)
+        # Re-encode only when something was removed, so other URLs are requested verbatim.
+        if len(kept) != len(parse_qsl(query, keep_blank_values=True)):
+            query = urlencode(kept)
+    return urlunparse(parsed._replace(query=query, fragment=""))
+
+
+def canonical_key(url):
+    """
+    Identity used to decide whether two links are the same page: the
+    canonicalized URL with case, 'www.', default port, trailing slash and
+    parameter order normalized.
+    """
+    parsed = urlparse(canonicalize_url(url))
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    netloc = host
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{parsed.port}"
+    path = parsed.path.rstrip("/") or "/"
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return urlunparse((scheme, netloc, path, "", query, ""))
+
+
+def url_pattern(url):
+    """
+    Shape of a URL within its host: digit runs in the path become {n} and only
+    the sorted parameter names of the query are kept, e.g.
+    /events/2024/05/calendar?month=5&page=3 -> /events/{n}/{n}/calendar?month&page
+    """
+    parsed = urlparse(canonicalize_url(url))
+    path = _DIGITS.sub("{n}", parsed.path.rstrip("/") or "/")
+    keys = sorted({key for key, _ in parse_qsl(parsed.query, keep_blank_values=True)})
+    return path + ("?" + "&".join(keys) if keys else "")
+
+
+def has_query_cycle(url, max_params=8):
+    """
+    True for queries that loop back on themselves: the same value twice under
+    one parameter or facet list (page=2&page=2, f[0]=x&f[2]=x), or more than
+    max_params parameters (facets stacked on facets).
+    """
+    params = parse_qsl(urlparse(url).query, keep_blank_values=True)
+    if len(params) > max_params:
+        return True
+    values = Counter((_INDEXED_KEY.sub("", key), value) for key, value in params)
+    return any(count > 1 for count in values.values())
+
+
+def has_path_cycle(url, repeats=3):
+    """True if a run of path segments repeats `repeats` times in a row (/a/b/a/b/a/b)."""
+    segments = [segment for segment in urlparse(url).path.split("/") if segment]
+    for size in range(1, len(segments) // repeats + 1):
+        for start in range(len(segments) - size * repeats + 1):
+            block = segments[start:start + size]
+            if all(segments[start + i * size:start + (i + 1) * size] == block for i in range(1, repeats)):
+                return True
+    return False
+
+
+class FrontierGuard:
+    """
+    Decides which discovered links SiteSpider queues.
+
+    admit() returns (url_to_request, None) for links worth fetching, or
+    (None, reason) with reason 'duplicate', 'cycle' or 'throttled'.
+    throttled counts distinct throttled URLs per site key and pattern, for the
+    crawl stats.
+
+    `seen` maps a host group to its dupefilter.HostSeenSet, which records the
+    canonical keys of the links screened so far; only the per-pattern
+    counters are held in memory.
+    """
+
+    def __init__(self, seen, pattern_budget=200, max_query_params=8):
+        self.seen = seen
+        self.pattern_budget = pattern_budget
+        self.max_query_params = max_query_params
+        self.pattern_visits = Counter()
+        self.throttled = defaultdict(Counter)
+
+    def mark(self, url, host):
+        """Record a URL queued without screening (start URLs, sitemap entries)."""
+        url = canonicalize_url(url)
+        self.seen(host).add_url(canonical_key(url))
+        self.pattern_visits[(urlparse(url).hostname, url_pattern(url))] += 1
+        return url
+
+    def is_duplicate(self, url, host):
+        """True if a link with url's canonical key was already screened, without screening url."""
+        return self.seen(host).has_url(canonical_key(url))
+
+    def admit(self, url, site_key, host):
+        url = canonicalize_url(url)
+        if self.seen(host).add_url(canonical_key(url)) == "duplicate":
+            return None, "duplicate"
+        if has_query_cycle(url, self.max_query_params) or has_path_cycle(url):
+            return None, "cycle"
+
+        pattern = url_pattern(url)
+        slot = (urlparse(url).hostname, pattern)
+        if self.pattern_visits[slot] >= self.pattern_budget:
+            self.throttled[site_key][pattern] += 1
+            return None, "throttled"
+
+        self.pattern_visits[slot] += 1
+        return url, None
@@ -1,33 +1,63 @@
+import json
+import math
 import os
+import re
+import socket
+import statistics
 import sys
+import time
 import threading
 import subprocess
+from datetime import datetime
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Add project root to path to import config
 PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
 
 import config
-from scrapy.utils.project import get_project_settings
-from scrapy import spiderloader
+from csula_pdf_scan.frontier import FrontierClient
+from csula_pdf_scan.frontier_service import FrontierService, read_box_failures
+from csula_pdf_scan.partitions import plan_partitions, section_weights
+from csula_pdf_scan.pipelines import record_merged_crawl, seen_at_now
+from csula_pdf_scan.sites import load_sites, group_by_host
+from csula_pdf_scan.telemetry import RUN_FORMAT, format_summary, list_runs, load_run, summarize
 
 # ---------------------------------------------------------------------------
-# How many spiders to crawl simultaneously.
+# How many crawl processes to run simultaneously.
 #
-# All CSULA spiders target subpaths of calstatela.edu, so they all hit the
-# same server. Each Scrapy spider already fires 16 concurrent requests
-# internally, so 3 parallel spiders = ~48 simultaneous requests to the
-# university server — fast enough to be meaningfully quicker than sequential,
-# conservative enough to avoid rate-limiting or triggering DDoS protection.
+# Sites are grouped by host (a host's subsites are crawled together, once)
+# and the groups are split across this many SiteSpider processes,
+# longest-first, so every process finishes at about the same time. Politeness no longer depends
+# on this number: all processes draw from one per-host token bucket
+# (config.CRAWL_HOST_RATE), so www.calstatela.edu sees the same combined
+# request rate whether 1 or 5 processes are running. More processes mainly
+# help when sites live on different hosts, or when pages are slow to respond.
 #
-# Increase to 4-5 only if the university server handles it without 429s.
+# A host whose last crawl took longer than config.CRAWL_PARTITION_SECONDS is
+# itself split into partitions by path section (see partitions.py); each
+# partition is its own process, run alongside the others under the same host
+# budget, so the root site no longer sets the length of the whole crawl.
+#
+# --distributed instead runs --nodes processes that share one frontier
+# service (frontier_service.py) and take requests from it as they go;
+# --join adds the processes of another machine to such a crawl.
 # ---------------------------------------------------------------------------
 MAX_CONCURRENT_SPIDERS = 3
 
+# Assumed crawl time for a site with no recorded duration yet, used only when
+# no site has history at all (otherwise the median of known sites is used).
+DEFAULT_SITE_SECONDS = 300.0
+
 COMPLETED_FILE = config.TEMP_DIR / "completed_spiders.txt"
+HOST_BUDGET_DB = config.TEMP_DIR / "host_budget.db"
+CRAWL_STATS_DIR = config.TEMP_DIR / "crawl_stats"
+PARTITIONS_DIR = config.TEMP_DIR / "crawl_partitions"
 SPIDER_DIR = Path(__file__).resolve().parent   # crawlers/csula_pdf_scan/
+# Every process this runner starts writes its telemetry under the same run.
+TELEMETRY_RUN = datetime.now().strftime(RUN_FORMAT)
 
 # Thread-safe lock for writing to COMPLETED_FILE and printing progress.
 _lock = threading.Lock()
@@ -40,10 +70,189 @@ def load_completed():
         return {line.strip() for line in f if line.strip()}
 
 
-def mark_completed(spider_name):
+def mark_completed(site_keys):
     with _lock:
         with open(COMPLETED_FILE, "a") as f:
-            f.write(spider_name + "\n")
+            for key in site_keys:
+                f.write(key + "\n")
+
+
+def load_durations():
+    """Per-site crawl seconds from previous runs ({site_key: seconds})."""
+    path = config.CRAWL_DURATIONS_PATH
+    if not path.exists():
+        return {}
+    try:
+        with open(path) as f:
+            return {key: float(value["duration_seconds"]) for key, value in json.load(f).items()}
+    except (ValueError, KeyError, TypeError):
+        return {}
+
+
+def save_durations(stats_paths):
+    """Merge per-process timing files from this run into CRAWL_DURATIONS_PATH."""
+    path = config.CRAWL_DURATIONS_PATH
+    durations = {}
+    if path.exists():
+        try:
+            with open(path) as f:
+                durations = json.load(f)
+        except ValueError:
+            durations = {}
+
+    this_run = {}
+    for stats_path in stats_paths:
+        if not stats_path.exists():
+            continue
+        with open(stats_path) as f:
+            run = json.load(f)
+        # A site that fetched nothing (e.g. unreachable) tells us nothing about its cost.
+        for key, value in run["sites"].items():
+            if not value["pages"]:
+                continue
+            if key in this_run:
+                # Crawled in partitions: keep the cost of crawling it in one process.
+                this_run[key] = {
+                    "duration_seconds": round(this_run[key]["duration_seconds"] + value["duration_seconds"], 1),
+                    "pages": this_run[key]["pages"] + value["pages"],
+                }
+            else:
+                this_run[key] = value
+    durations.update(this_run)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(durations, f, indent=2, sort_keys=True)
+
+
+def plan_processes(groups, durations, processes):
+    """
+    Split host groups (lists of site keys sharing a host) across `processes`
+    crawl processes, longest expected crawl first, each group going to the
+    process with the least total work so far (LPT scheduling).
+
+    A host's subsites are crawled together in one pass, so a group is costed
+    at its slowest member's previous duration; sites without history are
+    costed at the median of known durations. A host is never split across
+    processes, since that would fetch its shared pages twice.
+
+    Returns a list of (estimated_seconds, [site_keys]) with empty processes dropped.
+    """
+    keys = [key for group in groups for key in group]
+    known = [durations[key] for key in keys if key in durations]
+    fallback = statistics.median(known) if known else DEFAULT_SITE_SECONDS
+    costs = [max(durations.get(key, fallback) for key in group) for group in groups]
+
+    processes = [[0.0, []] for _ in range(max(1, processes))]
+    for cost, group in sorted(zip(costs, groups), key=lambda cg: (-cg[0], cg[1])):
+        target = min(processes, key=lambda p: p[0])
+        target[0] += cost
+        target[1].extend(group)
+
+    return [(load, keys) for load, keys in processes if keys]
+
+
+def split_large_groups(groups, durations, processes):
+    """
+    Pick the host groups to crawl in partitions: those whose previous crawl
+    took longer than config.CRAWL_PARTITION_SECONDS get one partition per
+    CRAWL_PARTITION_SECONDS of it, up to CRAWL_MAX_PARTITIONS and
+    `processes` (less one when there are other hosts). Returns ([(group, partitions, estimated_seconds)], other groups).
+    """
+    partitioned, rest = [], []
+    # Leave a process for the other hosts, if there are any.
+    most = processes if len(groups) == 1 else processes - 1
+    for group in groups:
+        cost = max((durations[key] for key in group if key in durations), default=0.0)
+        count = min(most, config.CRAWL_MAX_PARTITIONS, math.ceil(cost / config.CRAWL_PARTITION_SECONDS))
+        if count >= 2:
+            partitioned.append((group, count, cost))
+        else:
+            rest.append(group)
+    return partitioned, rest
+
+
+def _fetch_sitemap_urls(host):
+    """<loc> URLs of https://<host>/sitemap.xml, or [] if it can't be read."""
+    import requests
+
+    try:
+        response = requests.get(f"https://{host}/sitemap.xml", timeout=30)
+    except requests.exceptions.RequestException:
+        return []
+    if not response.ok:
+        return []
+    return [loc.strip() for loc in re.findall(r'<loc>(.*?)</loc>', response.text, re.DOTALL)]
+
+
+def write_partition_plan(host, count):
+    """
+    Split host into `count` partitions by top-level section (weighted by the
+    page cache, or the live sitemap when the cache has nothing for the host)
+    and write the plan for the partition processes. Returns the plan path.
+    """
+    weights, seeds = section_weights(host, config.CRAWL_CACHE_PATH, config.DATABASE_PATH, _fetch_sitemap_urls)
+
+    PARTITIONS_DIR.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9_.-]", "_", host)
+    handoff_db = PARTITIONS_DIR / f"{slug}.db"
+    for suffix in ("", "-wal", "-shm"):
+        # A new crawl starts with no hand-offs.
+        Path(str(handoff_db) + suffix).unlink(missing_ok=True)
+
+    plan = plan_partitions(host, count, weights, seeds, handoff_db)
+    plan_path = PARTITIONS_DIR / f"{slug}.json"
+    with open(plan_path, "w") as f:
+        json.dump(plan, f, indent=2, sort_keys=True)
+    return plan_path, plan
+
+
+def budget_truncated(results):
+    """Keys of the sites any of the processes in results cut short by a page or time budget."""
+    keys = set()
+    for _, _, stats_path in results:
+        if stats_path.exists():
+            with open(stats_path) as f:
+                keys.update(json.load(f).get("budget_truncated", []))
+    return keys
+
+
+def merge_partitioned_crawl(sites, started_at, results):
+    """
+    Record the crawl of a partitioned host once its partitions have all
+    exited: one discovery_crawl per site (finished only if every partition
+    finished), merged scanned_pdfs.txt and failed_box_links.txt.
+    Returns the finish reason.
+    """
+    reasons = []
+    for _, returncode, stats_path in results:
+        reason = "failed"
+        if returncode == 0 and stats_path.exists():
+            with open(stats_path) as f:
+                reason = json.load(f)["reason"]
+        reasons.append(reason)
+    reason = "finished" if all(r == "finished" for r in reasons) else next(r for r in reasons if r != "finished")
+
+    found = record_merged_crawl(sites, started_at, seen_at_now(), reason, budget_truncated(results))
+
+    for site in sites:
+        parts = sorted(Path(site.output_folder).glob("failed_box_links.part*.txt"))
+        if not parts:
+            continue
+        lines = {}
+        for part in parts:
+            with open(part, encoding="utf-8") as f:
+                for line in f:
+                    # "LINK PARENT TIMESTAMP": one line per link and page.
+                    lines.setdefault(tuple(line.split()[:2]), line)
+            part.unlink()
+        with open(Path(site.output_folder) / "failed_box_links.txt", "w", encoding="utf-8") as f:
+            f.writelines(lines.values())
+
+    with _lock:
+        print(f"[MERGE] {sites[0].allowed_domain}: {len(results)} partitions, {reason}, "
+              f"{sum(found.values())} PDF links across {len(sites)} sites")
+    return reason
 
 
 def _find_scrapy():
@@ -58,20 +267,31 @@ def _find_scrapy():
     return "scrapy"  # fall back to system PATH
 
 
-def _run_spider(spider_name, scrapy_cmd):
+def _run_process(process_name, site_keys, scrapy_cmd, stats_path, incremental=False, partition=None,
+                 frontier=None):
     """
-    Run a single spider as a 'scrapy crawl <name>' subprocess.
+    Run one SiteSpider process ('scrapy crawl site -a sites=...') over a group
+    of site keys, sharing the per-host budget in HOST_BUDGET_DB.
 
-    Output is redirected to temp/<spider_name>.log so that parallel spider
+    Output is redirected to temp/<process_name>.log so that parallel crawl
     logs don't interleave in the terminal. Progress messages (start / done /
-    fail) are printed to stdout with a thread-safe lock.
+    fail) are printed to stdout with a thread-safe lock. Sites are marked
+    completed only when the whole process exits cleanly.
+
+    partition is (plan_path, index) for one partition of a partitioned host.
+    Its sites are marked completed by merge_partitioned_crawl() instead, once
+    every partition has finished. Each partition keeps its own dupefilter
+    files, since partitions of one host run at the same time.
 
-    Returns (spider_name, returncode).
+    frontier is (service URL, node name, seed) for one node of a distributed
+    crawl; run_distributed() marks its sites completed.
+
+    Returns (process_name, site_keys, returncode).
     """
-    log_path = config.TEMP_DIR / f"{spider_name}.log"
+    log_path = config.TEMP_DIR / f"{process_name}.log"
 
     with _lock:
-        print(f"[START] {spider_name}")
+        print(f"[START] {process_name}: {len(site_keys)} sites")
         print(f"        log → {log_path}")
 
     # 'scrapy crawl' reads scrapy.cfg and tries to import the settings module
@@ -80,9 +300,36 @@ def _run_spider(spider_name, scrapy_cmd):
     env = os.environ.copy()
     env["PYTHONPATH"] = str(SPIDER_DIR) + os.pathsep + env.get("PYTHONPATH", "")
 
+    command = [
+        scrapy_cmd, "crawl", "site",
+        "-a", "sites=" + ",".join(site_keys),
+        "-a", f"stats_path={stats_path}",
+        "-a", f"incremental={1 if incremental else 0}",
+        "-s", f"HOST_BUDGET_DB={HOST_BUDGET_DB}",
+        "-s", f"HOST_BUDGET_RATE={config.CRAWL_HOST_RATE}",
+        "-s", f"HOST_BUDGET_BURST={config.CRAWL_HOST_BURST}",
+        "-s", f"CRAWL_TELEMETRY_RUN={TELEMETRY_RUN}",
+    ]
+    if partition is not None:
+        plan_path, index = partition
+        command += [
+            "-a", f"partition_plan={plan_path}",
+            "-a", f"partition={index}",
+            "-s", f"DISK_DUPEFILTER_DIR={Path(config.CRAWL_SEEN_DIR) / 'partitions' / str(index)}",
+        ]
+    if frontier is not None:
+        url, node, seed = frontier
+        command += [
+            "-s", "SCHEDULER=csula_pdf_scan.frontier.FrontierScheduler",
+            "-s", f"FRONTIER_URL={url}",
+            "-s", f"FRONTIER_NODE={node}",
+            "-s", f"FRONTIER_SEED={1 if seed else 0}",
+            # FrontierGuard's canonical URL keys, per node (see dupefilter.SeenSets).
+            "-s", f"DISK_DUPEFILTER_DIR={Path(config.CRAWL_SEEN_DIR) / 'nodes' / node}",
+        ]
     with open(log_path, "w") as log_file:
         result = subprocess.run(
-            [scrapy_cmd, "crawl", spider_name],
+            command,
             cwd=str(SPIDER_DIR),
             env=env,
             stdout=log_file,
@@ -90,88 +337,390 @@ def _run_spider(spider_name, scrapy_cmd):
         )
 
     if result.returncode == 0:
-        mark_completed(spider_name)
+        if partition is None and frontier is None:
+            mark_completed(site_keys)
         with _lock:
-            print(f"[DONE]  {spider_name}")
+            print(f"[DONE]  {process_name}")
     else:
         with _lock:
-            print(f"[FAIL]  {spider_name}  (exit {result.returncode})")
+            print(f"[FAIL]  {process_name}  (exit {result.returncode})")
             print(f"        See log for details: {log_path}")
 
-    return spider_name, result.returncode
+    return process_name, site_keys, result.returncode
+
+
+def _run_nodes(site_keys, scrapy_cmd, incremental, url, nodes, seed):
+    """
+    Run `nodes` SiteSpider processes as nodes of the distributed crawl at
+    url; the first one seeds it if `seed`. Returns [(name, returncode, stats_path)].
+    """
+    machine = re.sub(r"[^A-Za-z0-9_.-]", "_", socket.gethostname())
+    results = []
+    with ThreadPoolExecutor(max_workers=nodes) as executor:
+        futures = {}
+        for index in range(nodes):
+            name = f"crawl_node{index:02d}"
+            stats_path = CRAWL_STATS_DIR / f"{name}.json"
+            if stats_path.exists():
+                stats_path.unlink()
+            frontier = (url, f"{machine}-{index}", seed and index == 0)
+            future = executor.submit(_run_process, name, site_keys, scrapy_cmd, stats_path, incremental,
+                                     None, frontier)
+            futures[future] = stats_path
+        for future in as_completed(futures):
+            name, _, returncode = future.result()
+            results.append((name, returncode, futures[future]))
+    return results
+
+
+def run_distributed(sites, nodes, scrapy_cmd, incremental, bind="127.0.0.1"):
+    """
+    Crawl `sites` as one distributed crawl: start the frontier service on
+    bind:config.CRAWL_FRONTIER_PORT, run `nodes` local node processes (more
+    can join from other machines with --join) and, once every node has left,
+    record one discovery_crawl per site and export its scanned_pdfs.txt and
+    failed_box_links.txt from what the nodes sent. Returns the finish reason.
+    """
+    for suffix in ("", "-wal", "-shm"):
+        # A new crawl starts with an empty queue.
+        Path(str(config.CRAWL_FRONTIER_DB) + suffix).unlink(missing_ok=True)
+    service = FrontierService((bind, config.CRAWL_FRONTIER_PORT), config.CRAWL_FRONTIER_DB,
+                              [site.key for site in sites])
+    service.start()
+    address = "127.0.0.1" if bind in ("", "0.0.0.0") else bind
+    url = f"http://{address}:{service.port}"
+    print(f"Frontier       : {url}  (queue {config.CRAWL_FRONTIER_DB})")
+    if bind in ("", "0.0.0.0"):
+        print(f"                 other machines: python run_all_spiders.py --join "
+              f"http://{socket.gethostname()}:{service.port}")
+    print(f"")
+
+    started_at = seen_at_now()
+    results = _run_nodes([site.key for site in sites], scrapy_cmd, incremental, url, nodes, seed=True)
+
+    client = FrontierClient(url, "runner")
+    status = client.status()
+    while status["nodes"]:
+        # Nodes on other machines are still working (or haven't timed out).
+        time.sleep(10)
+        status = client.status()
+    service.stop()
+
+    if status["finished"]:
+        reason = "finished"
+    else:
+        reason = "failed" if any(returncode != 0 for _, returncode, _ in results) else "shutdown"
+    found = record_merged_crawl(sites, started_at, seen_at_now(), reason, budget_truncated(results))
+
+    folders = {os.path.basename(site.output_folder): site.output_folder for site in sites}
+    lines = {folder: [] for folder in folders}
+    for folder, link, parent, seen_at in read_box_failures(config.CRAWL_FRONTIER_DB):
+        if folder in lines:
+            lines[folder].append(f"{link} {parent} {seen_at}\n")
+    for folder, output_folder in folders.items():
+        os.makedirs(output_folder, exist_ok=True)
+        with open(Path(output_folder) / "failed_box_links.txt", "w", encoding="utf-8") as f:
+            f.writelines(lines[folder])
+
+    save_durations([stats_path for _, _, stats_path in results])
+    print(f"")
+    print(f"Distributed crawl {reason}: {status['done']} requests by {len(results)} local nodes, "
+          f"{sum(found.values())} PDF links across {len(sites)} sites")
+    return reason
+
+
+def join_distributed(url, nodes, scrapy_cmd, incremental):
+    """Add `nodes` processes on this machine to the distributed crawl at url. Returns failed node names."""
+    status = FrontierClient(url, "runner").status()
+    print(f"Joining {url}: {len(status['sites'])} sites, {len(status['nodes'])} nodes, {status['queued']} queued")
+    results = _run_nodes(status["sites"], scrapy_cmd, incremental, url, nodes, seed=False)
+    return [name for name, returncode, _ in results if returncode != 0]
+
+
+def print_telemetry(run=None):
+    """
+    Print the per-site telemetry summary of a crawl run (the latest when run
+    is None). Returns False if there is nothing to show.
+    """
+    runs = list_runs()
+    if run is None and runs:
+        run = runs[-1]
+    reports = load_run(run) if run in runs else []
+    if not reports:
+        print(f"No crawl telemetry for run {run or '(none yet)'} in {config.CRAWL_TELEMETRY_DIR}")
+        if runs:
+            print(f"Runs: {', '.join(runs[-10:])}")
+        return False
+    print(format_summary(summarize(reports), run))
+    return True
+
+
+def run_verify(site_keys, scrapy_cmd):
+    """
+    Run the verify spider ('scrapy crawl verify') over site_keys in one
+    process: re-fetch only the pages that linked PDFs in drupal_pdf_files,
+    mark PDFs they no longer link as removed and record any new PDF links.
+    Ignores COMPLETED_FILE; a verification pass is cheap to repeat.
+
+    Returns the scrapy exit code.
+    """
+    log_path = config.TEMP_DIR / "verify.log"
+    stats_path = CRAWL_STATS_DIR / "verify.json"
+    if stats_path.exists():
+        stats_path.unlink()
+
+    env = os.environ.copy()
+    env["PYTHONPATH"] = str(SPIDER_DIR) + os.pathsep + env.get("PYTHONPATH", "")
+    command = [
+        scrapy_cmd, "crawl", "verify",
+        "-a", "sites=" + ",".join(site_keys),
+        "-a", f"stats_path={stats_path}",
+        "-s", f"HOST_BUDGET_DB={HOST_BUDGET_DB}",
+        "-s", f"HOST_BUDGET_RATE={config.CRAWL_HOST_RATE}",
+        "-s", f"HOST_BUDGET_BURST={config.CRAWL_HOST_BURST}",
+        "-s", f"CRAWL_TELEMETRY_RUN={TELEMETRY_RUN}",
+    ]
+    print(f"[START] verify: {len(site_keys)} sites")
+    print(f"        log → {log_path}")
+    with open(log_path, "w") as log_file:
+        result = subprocess.run(command, cwd=str(SPIDER_DIR), env=env, stdout=log_file, stderr=subprocess.STDOUT)
+
+    if result.returncode != 0 or not stats_path.exists():
+        print(f"[FAIL]  verify  (exit {result.returncode})")
+        print(f"        See log for details: {log_path}")
+        return result.returncode or 1
+
+    with open(stats_path) as f:
+        summary = json.load(f)
+    parents = summary["parents"]
+    print(f"[DONE]  verify")
+    print(f"")
+    print(f"Parent pages   : {parents.get('verified', 0)} verified of {parents.get('requested', 0)}"
+          f"  ({parents.get('not_modified', 0)} not modified, {parents.get('gone', 0)} gone)")
+    print(f"PDF links gone : {len(summary['removed'])}  (marked removed in drupal_pdf_files)")
+    print(f"New PDF links  : {len(summary['new'])}  (queued in discovered_pdf for the next scan)")
+    print(f"Summary        : {stats_path}")
+    return 0
 
 
 if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(
-        description="Run Scrapy spiders in parallel (restart-safe)."
+        description="Crawl sites in parallel with the data-driven SiteSpider (restart-safe)."
     )
     parser.add_argument(
         "--domain",
         default=None,
         metavar="DOMAIN_KEY",
         help="Limit to a single domain key, e.g. calstatela.edu_ecst. "
-             "The spider name is derived using the same formula as generate_spiders.py "
-             "(dots and hyphens → underscores, lower-cased, _spider suffix). "
-             "Omit to run all spiders.",
+             "Omit to crawl every site in drupal_site (or data/sites.csv).",
+    )
+    parser.add_argument(
+        "--list",
+        action="store_true",
+        help="Print the sites that would be crawled and exit.",
+    )
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--incremental",
+        action="store_true",
+        default=None,
+        help="Revalidate pages from earlier crawls with conditional requests and skip "
+             "sitemap entries whose <lastmod> is unchanged (default: config.CRAWL_INCREMENTAL).",
+    )
+    mode.add_argument(
+        "--full",
+        dest="incremental",
+        action="store_false",
+        help="Download every page again, refreshing the incremental crawl cache.",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Quick check between full crawls: re-fetch only the pages that linked known PDFs, "
+             "mark PDFs they no longer link as removed and queue new ones.",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=MAX_CONCURRENT_SPIDERS,
+        help=f"Number of crawl processes (default {MAX_CONCURRENT_SPIDERS}).",
+    )
+    parser.add_argument(
+        "--no-partition",
+        action="store_true",
+        help="Crawl every host in a single process, however long its last crawl took.",
+    )
+    parser.add_argument(
+        "--distributed",
+        action="store_true",
+        help="Run the crawl as nodes sharing one frontier service (request queue, dupefilter "
+             "and PDF sink) instead of one process per host group.",
+    )
+    parser.add_argument(
+        "--nodes",
+        type=int,
+        default=None,
+        help="Node processes to run on this machine with --distributed or --join (default --processes).",
+    )
+    parser.add_argument(
+        "--frontier-bind",
+        default="127.0.0.1",
+        metavar="ADDRESS",
+        help="Address the frontier service listens on; 0.0.0.0 lets nodes on other machines join.",
+    )
+    parser.add_argument(
+        "--join",
+        default=None,
+        metavar="URL",
+        help="Add this machine's nodes to the distributed crawl whose frontier service is at URL.",
+    )
+    parser.add_argument(
+        "--report",
+        nargs="?",
+        const="latest",
+        default=None,
+        metavar="RUN",
+        help="Print per-site crawl telemetry (pages/s, latency, statuses, depth, duplicates, PDFs) "
+             "for the latest run, or for RUN (a folder name in config.CRAWL_TELEMETRY_DIR), and exit.",
     )
     args = parser.parse_args()
+    nodes = args.nodes or args.processes
 
-    # Derive the expected spider name from the domain key.
-    domain_spider_filter = None
-    if args.domain:
-        domain_spider_filter = (
-            args.domain.replace(".", "_").replace("-", "_").lower() + "_spider"
-        )
-        print(f"Domain filter active — looking for spider: {domain_spider_filter}")
+    if args.report:
+        # Informational: a missing run doesn't fail the workflow step that prints it.
+        print_telemetry(None if args.report == "latest" else args.report)
+        sys.exit(0)
+
+    if args.join:
+        CRAWL_STATS_DIR.mkdir(parents=True, exist_ok=True)
+        failed_nodes = join_distributed(args.join, nodes, _find_scrapy(), bool(args.incremental))
+        sys.exit(1 if failed_nodes else 0)
 
-    # Discover available spiders via Scrapy's spider loader.
-    settings = get_project_settings()
-    loader = spiderloader.SpiderLoader.from_settings(settings)
-    all_spiders = list(reversed(loader.list()))
+    # Sites are read from the database at run time; no spider code is generated.
+    sites = load_sites([args.domain] if args.domain else None)
+
+    if args.list:
+        for site in sites:
+            scope = site.scope_path or "/"
+            print(f"{site.key:<60} {site.allowed_domain}{scope}  → {site.output_folder}")
+        sys.exit(0)
+
+    if args.verify:
+        CRAWL_STATS_DIR.mkdir(parents=True, exist_ok=True)
+        sys.exit(run_verify([site.key for site in sites], _find_scrapy()))
 
     completed = load_completed()
-    to_run = [
-        name for name in all_spiders
-        if name not in completed
-        and (domain_spider_filter is None or name == domain_spider_filter)
-    ]
+    pending = [site for site in sites if site.key not in completed]
+    to_run = [site.key for site in pending]
+    groups = [[site.key for site in group] for group in group_by_host(pending).values()]
 
     if not to_run:
-        print("All spiders have already completed. Exiting.")
+        print("All sites have already been crawled. Exiting.")
         print(f"(Delete {COMPLETED_FILE} or run fresh_start to reset.)")
         sys.exit(0)
 
+    incremental = config.CRAWL_INCREMENTAL if args.incremental is None else args.incremental
+    if args.distributed:
+        CRAWL_STATS_DIR.mkdir(parents=True, exist_ok=True)
+        print(f"")
+        print(f"Sites to crawl : {len(to_run)}  ({len(completed)} already done)")
+        print(f"Nodes          : {nodes} on this machine, sharing one frontier")
+        print(f"Crawl mode     : {'incremental' if incremental else 'full'}")
+        reason = run_distributed(pending, nodes, _find_scrapy(), incremental, args.frontier_bind)
+        print(f"")
+        print_telemetry(TELEMETRY_RUN)
+        if reason != "finished":
+            print(f"Re-run this script to crawl the sites again (logs: {config.TEMP_DIR}/crawl_node*.log).")
+            sys.exit(1)
+        mark_completed(to_run)
+        sys.exit(0)
+
+    durations = load_durations()
+    if args.no_partition:
+        partitioned, rest = [], groups
+    else:
+        partitioned, rest = split_large_groups(groups, durations, args.processes)
+    # Partitions run first; the remaining hosts share the other processes.
+    spare = args.processes - max((count for _, count, _ in partitioned), default=0)
+    plan = plan_processes(rest, durations, max(1, spare)) if rest else []
+
     scrapy_cmd = _find_scrapy()
-    workers = min(len(to_run), MAX_CONCURRENT_SPIDERS)
+    CRAWL_STATS_DIR.mkdir(parents=True, exist_ok=True)
 
     print(f"")
-    print(f"Spiders to run : {len(to_run)}")
+    print(f"Sites to crawl : {len(to_run)}  ({sum(1 for key in to_run if key in durations)} with previous timings)")
     print(f"Already done   : {len(completed)}")
-    print(f"Parallel workers: {workers}  (MAX_CONCURRENT_SPIDERS={MAX_CONCURRENT_SPIDERS})")
+    print(f"Hosts          : {len(groups)}  (each crawled once, shared by its subsites)")
+    print(f"Processes      : {args.processes} at a time  (longest-first by previous crawl time)")
+    jobs = []   # (name, site_keys, (plan_path, index) or None, partitioned host or None)
+    partition_runs = {}   # host -> {"sites", "started_at", "pending", "results"}
+    for group, count, estimate in partitioned:
+        group_sites = [site for site in pending if site.key in group]
+        host = group_sites[0].allowed_domain
+        plan_path, partition_plan = write_partition_plan(host, count)
+        partition_runs[host] = {
+            "sites": group_sites,
+            "started_at": seen_at_now(),
+            "pending": count,
+            "results": [],
+        }
+        slug = Path(plan_path).stem
+        loads = partition_plan["loads"]
+        print(f"  {host}: {len(group)} sites in {count} partitions, ~{estimate / count / 60:.0f} min each "
+              f"(section weights {', '.join(str(load) for load in loads)})")
+        for index in range(count):
+            jobs.append((f"crawl_{slug}_p{index}", group, (plan_path, index), host))
+    for n, (estimate, keys) in enumerate(plan, start=1):
+        print(f"  crawl_{n:02d}   : {len(keys):>3} sites, ~{estimate / 60:.0f} min")
+        jobs.append((f"crawl_{n:02d}", keys, None, None))
+    print(f"Host budget    : {config.CRAWL_HOST_RATE:g} req/s per host across all processes")
+    print(f"Crawl mode     : {'incremental (' + str(config.CRAWL_CACHE_PATH) + ')' if incremental else 'full'}")
     print(f"Scrapy command : {scrapy_cmd}")
-    print(f"Spider logs    : {config.TEMP_DIR}/")
+    print(f"Crawl logs     : {config.TEMP_DIR}/")
     print(f"")
 
     failed = []
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        futures = {
-            executor.submit(_run_spider, name, scrapy_cmd): name
-            for name in to_run
-        }
+    stats_paths = []
+    # A host's partitions are queued next to each other, ahead of everything
+    # else, so they start together: each waits for its siblings to finish.
+    with ThreadPoolExecutor(max_workers=min(args.processes, len(jobs))) as executor:
+        futures = {}
+        for name, keys, partition, host in jobs:
+            stats_path = CRAWL_STATS_DIR / f"{name}.json"
+            if stats_path.exists():
+                stats_path.unlink()
+            stats_paths.append(stats_path)
+            future = executor.submit(_run_process, name, keys, scrapy_cmd, stats_path, incremental, partition)
+            futures[future] = (host, stats_path)
         for future in as_completed(futures):
-            name, returncode = future.result()
-            if returncode != 0:
-                failed.append(name)
+            name, site_keys, returncode = future.result()
+            host, stats_path = futures[future]
+            if host is None:
+                if returncode != 0:
+                    failed.append((name, site_keys))
+                continue
+            run = partition_runs[host]
+            run["results"].append((name, returncode, stats_path))
+            run["pending"] -= 1
+            if run["pending"] == 0:
+                if merge_partitioned_crawl(run["sites"], run["started_at"], run["results"]) == "finished":
+                    mark_completed(site_keys)
+                else:
+                    failed.append((name.rsplit("_p", 1)[0] + "_p*", site_keys))
+
+    save_durations(stats_paths)
 
+    print(f"")
+    print_telemetry(TELEMETRY_RUN)
     print(f"")
     print(f"Crawl complete.")
-    print(f"  Succeeded : {len(to_run) - len(failed)}")
+    print(f"  Succeeded : {len(to_run) - sum(len(keys) for _, keys in failed)} sites")
     if failed:
-        print(f"  Failed    : {len(failed)}")
-        for name in failed:
-            print(f"    - {name}  (log: {config.TEMP_DIR}/{name}.log)")
-        print(f"  Re-run this script to retry failed spiders (completed ones are skipped).")
+        print(f"  Failed    : {len(failed)} processes")
+        for name, site_keys in failed:
+            print(f"    - {name}: {', '.join(site_keys)}  (log: {config.TEMP_DIR}/{name}.log)")
+        print(f"  Re-run this script to retry failed sites (completed ones are skipped).")
     else:
-        print(f"  All spiders finished successfully.")
+        print(f"  All sites crawled successfully.")
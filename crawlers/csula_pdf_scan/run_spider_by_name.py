@@ -1,4 +1,5 @@
-import scrapy
+import sys
+
 from scrapy.crawler import CrawlerProcess
 from scrapy.utils.project import get_project_settings
 
@@ -7,11 +8,11 @@ if __name__ == '__main__':
     settings = get_project_settings()
     process = CrawlerProcess(settings)
 
-    # Provide the spider name you want to run
-    spider_name = 'information_technology_services2_spider'  # Replace with your actual spider name
+    # Site keys to crawl, e.g. calstatela.edu_ecst (several may be given)
+    site_keys = sys.argv[1:] or ['calstatela.edu_accessibility']
 
-    # Schedule the spider to crawl
-    process.crawl(spider_name)
+    # Schedule the data-driven spider for those sites
+    process.crawl('site', sites=','.join(site_keys))
 
     # Start the crawling process
-    process.start()
\ No newline at end of file
+    process.start()
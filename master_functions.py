@@ -1,11 +1,17 @@
 import os
+import sys
 import json
+import subprocess
 from datetime import datetime
 
-from src.core.conformance_checker import full_pdf_scan, refresh_existing_pdf_reports, single_site_pdf_scan
-from src.data_management.data_export import get_pdf_reports_by_site_name, get_all_sites, write_data_to_excel, get_site_failures
-from src.core.filters import check_for_node, is_high_priority
+from src.core.conformance_checker import full_pdf_scan, pipelined_pdf_scan, refresh_existing_pdf_reports, \
+    single_site_pdf_scan
+from src.data_management.data_export import get_pdf_reports_by_site_name, get_all_sites, write_data_to_excel, get_site_failures, \
+    get_site_summary
 from src.core.scan_refresh import refresh_status
+from src.core.scan_diff import diff_latest_runs
+from src.data_management.parquet_export import export_scan_snapshot
+from src.core.database import publish_snapshot
 from src.utilities.tools import mark_pdfs_as_removed
 import config
 
@@ -15,10 +21,10 @@ scans_output = str(config.PDF_SITES_FOLDER / "{}")
 
 def build_all_xcel_reports():
 
-    all_sites = get_all_sites()
+    all_sites = get_all_sites(snapshot=True)
 
     for site in all_sites:
-        site_data = get_pdf_reports_by_site_name(site)
+        site_data = get_pdf_reports_by_site_name(site, snapshot=True)
         fail_data = get_site_failures(site)
 
         site_folder = str(config.get_site_output_path(site))
@@ -33,7 +39,7 @@ def build_all_xcel_reports():
 
 def build_single_xcel_report(site_name):
 
-        site_data = get_pdf_reports_by_site_name(site_name)
+        site_data = get_pdf_reports_by_site_name(site_name, snapshot=True)
         print(site_data)
         fail_data = get_site_failures(site_name)
 
@@ -50,34 +56,12 @@ def build_single_xcel_report(site_name):
 
 
 def count_reportable_pdfs():
-    total_pdfs = 0
-    all_sites = get_all_sites()
-
-    for site in all_sites:
-        site_folder_name = site.replace(".", "-")
-        site_data = get_pdf_reports_by_site_name(site)
-        fail_data = get_site_failures(site)
-
-        for item in site_data:
-            item_list = list(item)
-            if not check_for_node(item_list[1]):
-                total_pdfs += 1
-
-    return total_pdfs
+    """Total reportable PDF instances across all sites, from the live site_summary."""
+    return sum(site.total_pdf_instances for site in get_site_summary())
 
 def count_high_priority_pdfs():
-    is_high_priority_count = 0
-
-    all_sites = get_all_sites()
-    for site in all_sites:
-        site_folder_name = site.replace(".", "-")
-        site_data = get_pdf_reports_by_site_name(site)
-        fail_data = get_site_failures(site)
-        for item in site_data:
-
-            if not is_high_priority(item):
-                is_high_priority_count += 1
-    return is_high_priority_count
+    """Total high-priority PDF instances across all sites, from the live site_summary."""
+    return sum(site.total_high_priority for site in get_site_summary())
 
 # def backup_database():
 #
@@ -93,7 +77,7 @@ def count_high_priority_pdfs():
 #
 
 
-def create_all_pdf_reports():
+def create_all_pdf_reports(crawl_done=None):
     """
     Initiates a full PDF scan for all subdirectories within the specified folder.
 
@@ -119,8 +103,12 @@ def create_all_pdf_reports():
 
     On Windows workers=1 is used — sequential, one PDF at a time.
 
+    If crawl_done is given (see crawl_and_scan), the crawl is still running:
+    PDFs are scanned as the crawler discovers them via pipelined_pdf_scan,
+    and the post-scan steps run once crawl_done() is True and the queue drains.
+
     Parameters:
-    None
+    crawl_done (callable, optional): Returns True once the running crawl has exited.
 
     Returns:
     None
@@ -145,7 +133,10 @@ def create_all_pdf_reports():
     print(f"Scan started: {scan_start.strftime('%Y-%m-%d %H:%M:%S')}")
 
     # Import pdfs and test for accessibility
-    full_pdf_scan(pdf_sites_folder, workers=workers)
+    if crawl_done is not None:
+        pipelined_pdf_scan(pdf_sites_folder, crawl_done, workers=workers)
+    else:
+        full_pdf_scan(pdf_sites_folder, workers=workers)
 
     scan_end = datetime.now()
     duration = scan_end - scan_start
@@ -176,6 +167,12 @@ def create_all_pdf_reports():
     refresh_status()
     # compare the pdfs in the folder to the database and mark as removed if not in the folder
     mark_pdfs_as_removed(pdf_sites_folder)
+    # per-site summary of new / removed / fixed / regressed PDFs since the previous run
+    diff_latest_runs()
+    # columnar snapshot of this run for analytics (skipped if pyarrow is not installed)
+    export_scan_snapshot()
+    # consistent read-only copy for the Excel / HTML / email stages
+    publish_snapshot()
     # refresh_existing_pdf_reports - DISABLED for initial scan to prevent infinite loop
     # This function re-downloads and re-analyzes ALL PDFs in the database
     # Only enable this for periodic refreshes of already-scanned PDFs
@@ -183,11 +180,46 @@ def create_all_pdf_reports():
     print("PDF scan complete!")
 
 
+def crawl_and_scan(domain=None):
+    """
+    Pipelined crawl + scan: starts run_all_spiders.py in the background and
+    analyses PDFs as the crawl discovers them, instead of waiting for every
+    spider to finish first. Ends with the same post-scan steps as
+    create_all_pdf_reports().
+
+    Parameters:
+    domain (str, optional): Crawl only this site key (run_all_spiders.py --domain).
+                            The scan still covers every site folder.
+
+    Returns:
+    int: The crawl's exit code.
+    """
+    crawler_dir = config.PROJECT_ROOT / "crawlers" / "csula_pdf_scan"
+    command = [sys.executable, "run_all_spiders.py"]
+    if domain:
+        command += ["--domain", domain]
+
+    print(f"Starting crawl in the background: {' '.join(command)}")
+    crawl = subprocess.Popen(command, cwd=str(crawler_dir))
+
+    try:
+        create_all_pdf_reports(crawl_done=lambda: crawl.poll() is not None)
+    finally:
+        if crawl.poll() is None:
+            crawl.terminate()
+        returncode = crawl.wait()
+
+    if returncode != 0:
+        print(f"Warning: crawl exited with code {returncode}; some sites may be incomplete")
+    return returncode
+
+
 def single_site_full_refresh():
     single_site_pdf_scan(r"C:\Users\913678186\Box\ATI\PDF Accessibility\CSULA Website PDF Scans\creativewriting-sfsu-edu")
     refresh_status(site="creativewriting.sfsu.edu")
     mark_pdfs_as_removed(pdf_sites_folder)
     refresh_existing_pdf_reports(single_domain="creativewriting.sfsu.edu")
+    publish_snapshot()
 
 if __name__=="__main__":
     create_all_pdf_reports()
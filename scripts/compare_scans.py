@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Compare two PDF scans and report new, removed, fixed, regressed and changed PDFs.
+
+Usage
+-----
+    # Diff the two most recent scan runs recorded by full_pdf_scan():
+    python scripts/compare_scans.py --latest
+
+    # Diff two specific scan runs:
+    python scripts/compare_scans.py --runs 12 15
+
+    # Diff two manifest CSVs (site,pdf_uri,parent_uri,file_hash,priority):
+    python scripts/compare_scans.py --manifests before.csv after.csv
+
+    # Export a run as a manifest for later comparison:
+    python scripts/compare_scans.py --export-manifest 15 run15.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from src.core.scan_diff import (
+    CHANGE_TYPES,
+    diff_manifests,
+    diff_scan_runs,
+    export_run_manifest,
+    latest_run_ids,
+    summarize_by_site,
+    write_diff_summary,
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Set-based diff of two PDF scans.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--latest", action="store_true", help="Diff the two most recent scan runs")
+    group.add_argument("--runs", nargs=2, type=int, metavar=("RUN_A", "RUN_B"), help="Diff two scan run ids")
+    group.add_argument("--manifests", nargs=2, type=Path, metavar=("CSV_A", "CSV_B"), help="Diff two manifest CSVs")
+    group.add_argument("--export-manifest", nargs=2, metavar=("RUN_ID", "CSV"), help="Write a run as a manifest CSV")
+    parser.add_argument("--no-excel", action="store_true", help="Only write the JSON summary")
+    args = parser.parse_args()
+
+    if args.export_manifest:
+        run_id, path = args.export_manifest
+        count = export_run_manifest(int(run_id), path)
+        print(f"Wrote {count} rows to {path}")
+        return 0
+
+    if args.manifests:
+        changes = diff_manifests(*args.manifests)
+        label = f"{args.manifests[0].stem}-{args.manifests[1].stem}"
+    else:
+        run_ids = args.runs or latest_run_ids()
+        if len(run_ids) < 2:
+            print("Fewer than two scan runs recorded; nothing to diff yet.")
+            return 0
+        changes = diff_scan_runs(*run_ids)
+        label = f"run{run_ids[0]}-run{run_ids[1]}"
+
+    summary = summarize_by_site(changes)
+    print(f"{'site':<50} " + " ".join(f"{key:>9}" for key in CHANGE_TYPES))
+    for site, counts in summary.items():
+        print(f"{site:<50} " + " ".join(f"{counts[key]:>9}" for key in CHANGE_TYPES))
+
+    write_diff_summary(changes, label, excel=not args.no_excel)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
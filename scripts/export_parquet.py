@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Export scan runs to the Parquet analytics dataset and query it.
+
+Usage
+-----
+    # Export the latest scan run:
+    python scripts/export_parquet.py
+
+    # Export a specific run, or backfill every recorded run:
+    python scripts/export_parquet.py --run 12
+    python scripts/export_parquet.py --all
+
+    # Print compliance per run for some sites since a date:
+    python scripts/export_parquet.py --summary --sites calstatela.edu_ecst --since 2026-01-01
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+import config
+from src.data_management.parquet_export import (
+    compliance_by_run,
+    export_all_scan_snapshots,
+    export_scan_snapshot,
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Parquet snapshot export of scan runs.",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__,
+    )
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--run", type=int, metavar="RUN_ID", help="Export one scan run")
+    group.add_argument("--all", action="store_true", help="Export every recorded scan run")
+    group.add_argument("--summary", action="store_true", help="Print compliance per run from the dataset")
+    parser.add_argument("--sites", nargs="+", metavar="DOMAIN", help="Sites for --summary")
+    parser.add_argument("--since", metavar="YYYY-MM-DD", help="Earliest run date for --summary")
+    args = parser.parse_args()
+
+    if args.summary:
+        summary = compliance_by_run(sites=args.sites, since=args.since)
+        print(summary.to_string(index=False))
+        return 0
+
+    if args.all:
+        rows = export_all_scan_snapshots()
+    else:
+        rows = export_scan_snapshot(args.run)
+    print(f"{rows} row(s) written under {config.ANALYTICS_DIR}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -5,7 +5,7 @@
 # Usage (from project root):
 #   .\scripts\fresh_start.ps1
 # WARNING: This deletes the database, all scan output, temp files, and
-#          generated spiders. Run only when you want a completely clean slate.
+#          crawler caches. Run only when you want a completely clean slate.
 # =============================================================================
 
 $ErrorActionPreference = "Stop"
@@ -20,11 +20,6 @@ Write-Host "Project root: $(Get-Location)"
 Write-Host "Using Python: $PYTHON"
 Write-Host ""
 
-# Regenerate spider files before deleting DB (spider gen reads from DB)
-Write-Host "Regenerating spider files..."
-& $PYTHON config\generate_spiders.py
-Write-Host ""
-
 # Backup existing database (single overwriting backup in temp/)
 if (Test-Path "drupal_pdfs.db") {
     if (-not (Test-Path "temp")) { New-Item -ItemType Directory -Path "temp" | Out-Null }
@@ -35,6 +30,9 @@ if (Test-Path "drupal_pdfs.db") {
 # Delete database
 Write-Host "Deleting database..."
 Remove-Item -Force "drupal_pdfs.db" -ErrorAction SilentlyContinue
+Remove-Item -Force "output\crawl_cache.db*" -ErrorAction SilentlyContinue
+Remove-Item -Recurse -Force "output\crawl_seen" -ErrorAction SilentlyContinue
+Remove-Item -Force "output\box_cache.db*" -ErrorAction SilentlyContinue
 
 # Clean output directories
 Write-Host "Cleaning output directories..."
@@ -46,10 +44,9 @@ Write-Host "Cleaning temp files..."
 Get-ChildItem "temp" -ErrorAction SilentlyContinue | Remove-Item -Recurse -Force
 Remove-Item -Force "nohup.out", "workflow_output.log" -ErrorAction SilentlyContinue
 
-# Clean generated spiders (__pycache__ and *_spider.py files)
-Write-Host "Cleaning generated spider files..."
+# Clean crawler __pycache__ folders
+Write-Host "Cleaning crawler caches..."
 Get-ChildItem "crawlers\csula_pdf_scan\csula_pdf_scan" -Recurse -Filter "__pycache__" -ErrorAction SilentlyContinue | Remove-Item -Recurse -Force
-Get-ChildItem "crawlers\csula_pdf_scan\csula_pdf_scan\spiders" -Filter "*_spider.py" -ErrorAction SilentlyContinue | Remove-Item -Force
 
 # Recreate necessary directories
 Write-Host "Recreating directory structure..."
@@ -36,12 +36,6 @@ else
 fi
 sleep 2
 
-# Regenerate spider files from database (must happen before DB is deleted)
-echo "🕷️  Regenerating spider files..."
-"$PYTHON_CMD" config/generate_spiders.py || {
-    echo "   ⚠️  Spider generation had errors (see above). Continuing fresh start..."
-}
-
 # Backup existing database (single overwriting backup in temp/)
 if [ -f "drupal_pdfs.db" ]; then
     echo "💾 Backing up existing database..."
@@ -52,6 +46,9 @@ fi
 # Delete database
 echo "🗑️  Deleting database..."
 rm -f drupal_pdfs.db
+rm -f output/crawl_cache.db output/crawl_cache.db-wal output/crawl_cache.db-shm
+rm -rf output/crawl_seen
+rm -f output/box_cache.db output/box_cache.db-wal output/box_cache.db-shm
 
 # Clean output directories
 echo "🗑️  Cleaning output directories..."
@@ -69,8 +66,6 @@ rm -f nohup.out workflow_output.log
 echo "🗑️  Cleaning crawl data..."
 rm -rf crawlers/csula_pdf_scan/csula_pdf_scan/__pycache__
 rm -rf crawlers/csula_pdf_scan/csula_pdf_scan/spiders/__pycache__
-# Remove generated spider files (keep only __init__.py)
-find crawlers/csula_pdf_scan/csula_pdf_scan/spiders -name '*_spider.py' -delete
 
 # Recreate necessary directories
 echo "📁 Recreating directory structure..."
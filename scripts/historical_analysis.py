@@ -33,6 +33,9 @@ Usage
 
     # Generate locally only (don't write back to OneDrive domain folders):
     python scripts/historical_analysis.py --no-upload
+
+    # Build trends from the scan_run ledger in drupal_pdfs.db (no workbooks opened):
+    python scripts/historical_analysis.py --source database
 """
 
 from __future__ import annotations
@@ -57,6 +60,7 @@ import openpyxl
 from src.data_management.report_reader import (
     parse_domain_excel,
     collect_from_local,
+    collect_from_database,
     _parse_timestamp,
     _TIMESTAMP_RE,
     _js,
@@ -504,11 +508,12 @@ def main() -> None:
         help="Domain(s) to analyse (default: all in config.DOMAINS)",
     )
     parser.add_argument(
-        "--source", choices=["onedrive", "local"], default="onedrive",
+        "--source", choices=["onedrive", "local", "database"], default="onedrive",
         help=(
             "Where to read reports from: "
-            "'onedrive' (default — uses TEAMS_ONEDRIVE_PATH from config) or "
-            "'local' (any folder via --local-path)."
+            "'onedrive' (default — uses TEAMS_ONEDRIVE_PATH from config), "
+            "'local' (any folder via --local-path) or "
+            "'database' (scan_run history in drupal_pdfs.db)."
         ),
     )
     parser.add_argument(
@@ -531,6 +536,9 @@ def main() -> None:
         onedrive_path = _check_onedrive_config()
         print(f"Reading reports from OneDrive: {onedrive_path}\n")
         domain_data = collect_from_local(onedrive_path, domains)
+    elif args.source == "database":
+        print(f"Reading scan history from database: {config.DATABASE_PATH}\n")
+        domain_data = collect_from_database(domains)
     else:  # local
         if not args.local_path:
             parser.error("--local-path is required when --source=local")
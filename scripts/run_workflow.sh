@@ -6,10 +6,15 @@
 # Usage (from project root):
 #   ./scripts/run_workflow.sh
 #   ./scripts/run_workflow.sh --domain calstatela.edu_ecst
+#   ./scripts/run_workflow.sh --pipelined
 #
 # --domain limits Steps 1 (spider generation) and 2 (crawl) to a single domain.
 # Steps 4-5 (scan + Excel) always process the full database. Run the downstream
 # scripts afterwards to sync OneDrive and generate master reports.
+#
+# --pipelined runs Steps 2 and 4 together: PDFs are analysed as the crawler
+# discovers them (master_functions.crawl_and_scan), so total time is close to
+# the longer of crawl and scan rather than their sum.
 # =============================================================================
 
 set -euo pipefail
@@ -18,15 +23,20 @@ set -euo pipefail
 # Parse arguments
 # ---------------------------------------------------------------------------
 DOMAIN_KEY=""
+PIPELINED=0
 while [[ $# -gt 0 ]]; do
     case "$1" in
         --domain)
             DOMAIN_KEY="$2"
             shift 2
             ;;
+        --pipelined)
+            PIPELINED=1
+            shift
+            ;;
         *)
             echo "Unknown flag: $1"
-            echo "Usage: $0 [--domain DOMAIN_KEY]"
+            echo "Usage: $0 [--domain DOMAIN_KEY] [--pipelined]"
             exit 1
             ;;
     esac
@@ -71,19 +81,40 @@ echo "Step 0 complete."
 echo ""
 
 # ---------------------------------------------------------------------------
-# Step 1: Generate Spiders
+# Step 1: Resolve Sites (SiteSpider reads them at crawl time; nothing is generated)
 # ---------------------------------------------------------------------------
 echo "============================================================"
-echo "STEP 1: Generate Spiders for Domains"
+echo "STEP 1: Resolve Sites to Crawl"
 echo "============================================================"
+pushd crawlers/csula_pdf_scan > /dev/null
 if [[ -n "$DOMAIN_KEY" ]]; then
-    "$PYTHON" config/generate_spiders.py --domain "$DOMAIN_KEY"
+    "../../$PYTHON" run_all_spiders.py --list --domain "$DOMAIN_KEY"
 else
-    "$PYTHON" config/generate_spiders.py
+    "../../$PYTHON" run_all_spiders.py --list
 fi
+popd > /dev/null
 echo "Step 1 complete."
 echo ""
 
+if [[ "$PIPELINED" -eq 1 ]]; then
+# ---------------------------------------------------------------------------
+# Steps 2-4 (pipelined): crawl in the background, analyse PDFs as they are found
+# ---------------------------------------------------------------------------
+echo "============================================================"
+echo "STEPS 2-4: Crawl Websites and Analyze PDFs (Pipelined)"
+echo "============================================================"
+echo "PDFs are analyzed while the crawl is still running..."
+echo ""
+DOMAIN_KEY="$DOMAIN_KEY" "$PYTHON" -c "
+import os
+from master_functions import crawl_and_scan
+crawl_and_scan(domain=os.environ.get('DOMAIN_KEY') or None)
+print('Pipelined crawl and PDF analysis complete!')
+"
+echo ""
+echo "Steps 2-4 complete."
+echo ""
+else
 # ---------------------------------------------------------------------------
 # Step 2: Run Spiders (crawl websites to discover PDFs)
 # ---------------------------------------------------------------------------
@@ -111,6 +142,10 @@ echo "STEP 3: Check Crawl Results"
 echo "============================================================"
 find output/scans -name 'scanned_pdfs.txt' -exec wc -l {} +
 echo ""
+# Per-site pages/s, latency, status codes, depth, duplicates and PDFs per
+# page for this crawl; slow or misconfigured sites are flagged.
+"$PYTHON" crawlers/csula_pdf_scan/run_all_spiders.py --report
+echo ""
 echo "Step 3 complete."
 echo ""
 
@@ -137,6 +172,7 @@ print('PDF analysis complete!')
 echo ""
 echo "Step 4 complete."
 echo ""
+fi
 
 # ---------------------------------------------------------------------------
 # Step 5: Generate Excel Reports
@@ -36,15 +36,20 @@ Write-Host "Step 0 complete."
 Write-Host ""
 
 # ---------------------------------------------------------------------------
-# Step 1: Generate Spiders
+# Step 1: Resolve Sites (SiteSpider reads them at crawl time; nothing is generated)
 # ---------------------------------------------------------------------------
 Write-Host "============================================================"
-Write-Host "STEP 1: Generate Spiders for Domains"
+Write-Host "STEP 1: Resolve Sites to Crawl"
 Write-Host "============================================================"
-if ($Domain) {
-    & $PYTHON config\generate_spiders.py --domain $Domain
-} else {
-    & $PYTHON config\generate_spiders.py
+Push-Location crawlers\csula_pdf_scan
+try {
+    if ($Domain) {
+        & ..\..\$PYTHON run_all_spiders.py --list --domain $Domain
+    } else {
+        & ..\..\$PYTHON run_all_spiders.py --list
+    }
+} finally {
+    Pop-Location
 }
 Write-Host "Step 1 complete."
 Write-Host ""
@@ -78,6 +83,9 @@ Write-Host "STEP 3: Check Crawl Results"
 Write-Host "============================================================"
 Get-ChildItem -Path output\scans -Recurse -Filter scanned_pdfs.txt |
     ForEach-Object { $c = (Get-Content $_.FullName | Measure-Object -Line).Lines; Write-Host "$c $($_.FullName)" }
+Write-Host ""
+# Per-site crawl telemetry; slow or misconfigured sites are flagged.
+& $PYTHON crawlers\csula_pdf_scan\run_all_spiders.py --report
 Write-Host "Step 3 complete."
 Write-Host ""
 
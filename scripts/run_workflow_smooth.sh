@@ -37,13 +37,15 @@ echo ""
 echo "✓ Step 0 complete."
 echo ""
 
-# Step 1: Generate Spiders
+# Step 1: Resolve Sites (SiteSpider reads them at crawl time; nothing is generated)
 echo "============================================================"
-echo "STEP 1: Generate Spiders for Test Domains"
+echo "STEP 1: Resolve Sites to Crawl"
 echo "============================================================"
-echo "Command: $PYTHON_CMD config/generate_spiders.py"
+echo "Command: cd crawlers/csula_pdf_scan && $PYTHON_CMD run_all_spiders.py --list"
 echo ""
-"$PYTHON_CMD" config/generate_spiders.py
+cd crawlers/csula_pdf_scan
+../../"$PYTHON_CMD" run_all_spiders.py --list
+cd ../..
 echo ""
 echo "✓ Step 1 complete."
 echo ""
@@ -71,6 +73,10 @@ echo "Command: find output/scans -name 'scanned_pdfs.txt' -exec wc -l {} +"
 echo ""
 find output/scans -name 'scanned_pdfs.txt' -exec wc -l {} +
 echo ""
+echo "Command: $PYTHON_CMD crawlers/csula_pdf_scan/run_all_spiders.py --report"
+echo ""
+"$PYTHON_CMD" crawlers/csula_pdf_scan/run_all_spiders.py --report
+echo ""
 echo "✓ Step 3 complete."
 echo ""
 
@@ -22,6 +22,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 # Import configuration
 import config
+from src.core.database import ensure_site_summary, ensure_scan_history
 
 
 def require_existing_csvs():
@@ -157,6 +158,11 @@ def create_database_tables():
     """)
     
     conn.commit()
+
+    # Per-site rollup table + triggers (see src/core/database.py)
+    ensure_site_summary(conn)
+    # Scan-run ledger used for history/trend queries
+    ensure_scan_history(conn)
     conn.close()
     
     print("✅ Database tables created successfully!")
@@ -1,9 +1,5 @@
-SELECT domain_name, COUNT(drupal_pdf_files.drupal_site_id) AS pdf_count
+SELECT drupal_site.domain_name, site_summary.instance_count AS pdf_count
 FROM drupal_site
-         JOIN drupal_pdf_files ON drupal_site.id = drupal_pdf_files.drupal_site_id
-WHERE drupal_pdf_files.parent_uri NOT LIKE '%/node/%'
-  AND drupal_pdf_files.parent_uri NOT LIKE '%/index.php/%'
-  AND drupal_pdf_files.pdf_returns_404 = 0
-  AND drupal_pdf_files.parent_returns_404 = 0
-  AND removed is FALSE
-GROUP BY domain_name;
\ No newline at end of file
+         JOIN site_summary ON drupal_site.id = site_summary.site_id
+WHERE site_summary.instance_count > 0
+ORDER BY drupal_site.domain_name;
@@ -0,0 +1,15 @@
+-- PDFs found by the latest complete crawl of one site (plus anything a newer,
+-- interrupted crawl has found since). All rows if no crawl has finished yet.
+SELECT
+    discovered_pdf.pdf_uri,
+    discovered_pdf.parent_uri,
+    discovered_pdf.last_seen_at
+FROM discovered_pdf
+WHERE discovered_pdf.site = :site
+  AND discovered_pdf.last_seen_at >= COALESCE((
+        SELECT MAX(discovery_crawl.started_at)
+        FROM discovery_crawl
+        WHERE discovery_crawl.site = :site
+          AND discovery_crawl.finish_reason = 'finished'
+      ), '')
+ORDER BY discovered_pdf.rowid;
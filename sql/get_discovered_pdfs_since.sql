@@ -0,0 +1,10 @@
+-- Every discovered PDF link (re)seen at or after :since, across all sites.
+-- Polled by pipelined_pdf_scan() while the crawl is still running.
+SELECT
+    discovered_pdf.site,
+    discovered_pdf.pdf_uri,
+    discovered_pdf.parent_uri,
+    discovered_pdf.last_seen_at
+FROM discovered_pdf
+WHERE discovered_pdf.last_seen_at >= :since
+ORDER BY discovered_pdf.last_seen_at;
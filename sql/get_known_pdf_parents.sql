@@ -0,0 +1,10 @@
+-- Every (site, parent page, PDF) link the scanner knows and hasn't marked removed.
+-- The crawler's verify spider re-fetches just these parent pages.
+SELECT
+    drupal_site.domain_name,
+    drupal_pdf_files.parent_uri,
+    drupal_pdf_files.pdf_uri
+FROM drupal_pdf_files
+    JOIN drupal_site ON drupal_pdf_files.drupal_site_id = drupal_site.id
+WHERE drupal_pdf_files.removed IS NOT TRUE
+ORDER BY drupal_pdf_files.parent_uri;
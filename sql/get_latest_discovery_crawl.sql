@@ -0,0 +1,10 @@
+-- The latest discovery_crawl of one site: when it started and ended and why
+-- ('finished', 'budget', 'shutdown', ...; NULL while it is still running).
+SELECT
+    discovery_crawl.started_at,
+    discovery_crawl.finished_at,
+    discovery_crawl.finish_reason
+FROM discovery_crawl
+WHERE discovery_crawl.site = :site
+ORDER BY discovery_crawl.started_at DESC, discovery_crawl.id DESC
+LIMIT 1;
@@ -0,0 +1,30 @@
+WITH unique_pdfs AS (
+    SELECT
+        scan_observation.run_id,
+        scan_observation.site_id,
+        scan_observation.report_id,
+        MAX(scan_observation.priority = 'high') AS is_high
+    FROM scan_observation
+             JOIN drupal_pdf_files ON drupal_pdf_files.id = scan_observation.pdf_file_id
+    WHERE scan_observation.report_id IS NOT NULL
+      AND drupal_pdf_files.parent_uri NOT LIKE '%/node/%'
+      AND drupal_pdf_files.parent_uri NOT LIKE '%/index.php/%'
+    GROUP BY scan_observation.run_id, scan_observation.site_id, scan_observation.report_id
+)
+SELECT
+    scan_run.id AS run_id,
+    datetime(scan_run.started_at, 'localtime') AS started_at,
+    drupal_site.domain_name,
+    COUNT(*) AS unique_pdfs,
+    SUM(unique_pdfs.is_high) AS high_priority,
+    SUM(pdf_report.violations) AS violations_total,
+    AVG(CASE
+            WHEN pdf_report.page_count > 0 THEN ROUND(pdf_report.failed_checks * 1.0 / pdf_report.page_count)
+            ELSE 0
+        END) AS errors_per_page_avg
+FROM unique_pdfs
+         JOIN scan_run ON scan_run.id = unique_pdfs.run_id
+         JOIN drupal_site ON drupal_site.id = unique_pdfs.site_id
+         JOIN pdf_report ON pdf_report.id = unique_pdfs.report_id
+GROUP BY scan_run.id, drupal_site.id
+ORDER BY drupal_site.domain_name, scan_run.started_at;
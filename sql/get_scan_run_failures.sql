@@ -0,0 +1,10 @@
+SELECT
+    scan_run.id AS run_id,
+    drupal_site.domain_name,
+    SUBSTR(failure.error_message, 1, 150) AS error_message,
+    COUNT(*) AS occurrences
+FROM failure
+         JOIN scan_run ON failure.error_date BETWEEN scan_run.started_at AND scan_run.finished_at
+         JOIN drupal_site ON drupal_site.id = failure.site_id
+GROUP BY scan_run.id, drupal_site.id, SUBSTR(failure.error_message, 1, 150)
+ORDER BY occurrences DESC;
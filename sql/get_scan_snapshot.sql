@@ -0,0 +1,31 @@
+-- One run's PDFs as they were observed. The drupal_pdf_files fields that
+-- change between scans (scanned date, 404 flags) come from scan_observation;
+-- runs recorded before those columns existed export them as NULL.
+SELECT
+    scan_run.id AS run_id,
+    date(scan_run.started_at, 'localtime') AS run_date,
+    drupal_site.domain_name AS site,
+    drupal_site.security_group_name,
+    drupal_pdf_files.pdf_uri,
+    drupal_pdf_files.parent_uri,
+    scan_observation.scanned_date,
+    pdf_report.pdf_hash AS file_hash,
+    scan_observation.priority,
+    pdf_report.violations,
+    pdf_report.failed_checks,
+    pdf_report.tagged,
+    pdf_report.check_for_image_only,
+    pdf_report.pdf_text_type,
+    pdf_report.title_set,
+    pdf_report.language_set,
+    pdf_report.page_count,
+    pdf_report.has_form,
+    pdf_report.approved_pdf_exporter,
+    scan_observation.pdf_returns_404,
+    scan_observation.parent_returns_404
+FROM scan_observation
+         JOIN scan_run ON scan_run.id = scan_observation.run_id
+         JOIN drupal_pdf_files ON drupal_pdf_files.id = scan_observation.pdf_file_id
+         JOIN drupal_site ON drupal_site.id = scan_observation.site_id
+         LEFT JOIN pdf_report ON pdf_report.id = scan_observation.report_id
+WHERE scan_observation.run_id = :run_id;
@@ -0,0 +1,12 @@
+INSERT INTO temp.{side} (site, pdf_uri, parent_uri, file_hash, priority)
+SELECT
+    drupal_site.domain_name,
+    drupal_pdf_files.pdf_uri,
+    drupal_pdf_files.parent_uri,
+    pdf_report.pdf_hash,
+    scan_observation.priority
+FROM scan_observation
+         JOIN drupal_pdf_files ON drupal_pdf_files.id = scan_observation.pdf_file_id
+         JOIN drupal_site ON drupal_site.id = scan_observation.site_id
+         LEFT JOIN pdf_report ON pdf_report.id = scan_observation.report_id
+WHERE scan_observation.run_id = :run_id;
@@ -0,0 +1,16 @@
+-- Mark every PDF link its site's latest crawl no longer found as removed.
+-- temp.current_discovery holds (site_id, pdf_uri, parent_uri) for the sites
+-- being checked; sites with no rows there are left alone. Returns one row per
+-- newly removed link, for per-site counts.
+UPDATE drupal_pdf_files
+SET removed = 1
+WHERE removed IS NOT TRUE
+  AND drupal_site_id IN (SELECT DISTINCT site_id FROM temp.current_discovery)
+  AND NOT EXISTS (
+        SELECT 1
+        FROM temp.current_discovery
+        WHERE current_discovery.site_id = drupal_pdf_files.drupal_site_id
+          AND current_discovery.pdf_uri = drupal_pdf_files.pdf_uri
+          AND current_discovery.parent_uri = drupal_pdf_files.parent_uri
+      )
+RETURNING drupal_site_id;
@@ -0,0 +1,17 @@
+INSERT OR IGNORE INTO scan_observation (run_id, pdf_file_id, site_id, report_id, priority,
+                                        scanned_date, pdf_returns_404, parent_returns_404)
+SELECT
+    :run_id,
+    drupal_pdf_files.id,
+    drupal_pdf_files.drupal_site_id,
+    pdf_priority.report_id,
+    pdf_priority.priority,
+    drupal_pdf_files.scanned_date,
+    drupal_pdf_files.pdf_returns_404,
+    drupal_pdf_files.parent_returns_404
+FROM temp.run_pdfs
+         JOIN drupal_pdf_files
+              ON drupal_pdf_files.pdf_uri = run_pdfs.pdf_uri
+                  AND drupal_pdf_files.parent_uri = run_pdfs.parent_uri
+         LEFT JOIN pdf_priority ON pdf_priority.pdf_hash = drupal_pdf_files.file_hash
+WHERE drupal_pdf_files.removed IS NOT TRUE;
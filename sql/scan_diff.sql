@@ -0,0 +1,44 @@
+WITH paired AS (
+    SELECT
+        site,
+        pdf_uri,
+        MAX(side = 'a') AS in_a,
+        MAX(side = 'b') AS in_b,
+        MAX(CASE WHEN side = 'a' THEN file_hash END) AS hash_a,
+        MAX(CASE WHEN side = 'b' THEN file_hash END) AS hash_b,
+        MAX(CASE WHEN side = 'a' THEN rank END) AS rank_a,
+        MAX(CASE WHEN side = 'b' THEN rank END) AS rank_b,
+        MIN(CASE WHEN side = 'b' THEN parent_uri END) AS parent_b,
+        MIN(CASE WHEN side = 'a' THEN parent_uri END) AS parent_a
+    FROM (
+        SELECT 'a' AS side, site, pdf_uri, parent_uri, file_hash,
+               CASE priority WHEN 'high' THEN 3 WHEN 'medium' THEN 2 WHEN 'low' THEN 1 END AS rank
+        FROM temp.diff_a
+        UNION ALL
+        SELECT 'b' AS side, site, pdf_uri, parent_uri, file_hash,
+               CASE priority WHEN 'high' THEN 3 WHEN 'medium' THEN 2 WHEN 'low' THEN 1 END AS rank
+        FROM temp.diff_b
+    )
+    GROUP BY site, pdf_uri
+)
+SELECT
+    site,
+    pdf_uri,
+    COALESCE(parent_b, parent_a) AS parent_uri,
+    CASE
+        WHEN in_b AND NOT in_a THEN 'new'
+        WHEN in_a AND NOT in_b THEN 'removed'
+        WHEN rank_a IS NOT NULL AND rank_b IS NOT NULL AND rank_b < rank_a THEN 'fixed'
+        WHEN rank_a IS NOT NULL AND rank_b IS NOT NULL AND rank_b > rank_a THEN 'regressed'
+        ELSE 'changed'
+    END AS change_type,
+    hash_a IS NOT NULL AND hash_b IS NOT NULL AND hash_a <> hash_b AS content_changed,
+    hash_a,
+    hash_b,
+    CASE rank_a WHEN 3 THEN 'high' WHEN 2 THEN 'medium' WHEN 1 THEN 'low' END AS priority_a,
+    CASE rank_b WHEN 3 THEN 'high' WHEN 2 THEN 'medium' WHEN 1 THEN 'low' END AS priority_b
+FROM paired
+WHERE NOT (in_a AND in_b)
+   OR (hash_a IS NOT hash_b AND hash_a IS NOT NULL AND hash_b IS NOT NULL)
+   OR (rank_a IS NOT NULL AND rank_b IS NOT NULL AND rank_a <> rank_b)
+ORDER BY site, change_type, pdf_uri;
@@ -1,20 +1,25 @@
+-- After a re-scan, keep only the newest row per (site, pdf_uri, parent_uri)
+-- and mark the older ones removed. :site_name limits it to one site; NULL
+-- does every site in one pass. Returns one row per newly removed row.
 WITH ranked AS (
     SELECT
         d.id,
         ROW_NUMBER() OVER (
-            PARTITION BY d.pdf_uri, d.parent_uri
+            PARTITION BY d.drupal_site_id, d.pdf_uri, d.parent_uri
             ORDER BY COALESCE(d.scanned_date, '0000-01-01T00:00:00') DESC, d.id DESC
             ) AS rn,
-        COUNT(*) OVER (PARTITION BY d.pdf_uri, d.parent_uri) AS dup_count
+        COUNT(*) OVER (PARTITION BY d.drupal_site_id, d.pdf_uri, d.parent_uri) AS dup_count
     FROM drupal_pdf_files d
              JOIN drupal_site s ON d.drupal_site_id = s.id
-    WHERE s.domain_name = '{site_name}'
+    WHERE :site_name IS NULL OR s.domain_name = :site_name
 )
 UPDATE drupal_pdf_files
 SET removed = 1
-WHERE id IN (
+WHERE removed IS NOT TRUE
+  AND id IN (
     SELECT id
     FROM ranked
     WHERE dup_count > 1
       AND rn > 1   -- all but the most recent per (pdf_uri, parent_uri)
-);
\ No newline at end of file
+)
+RETURNING drupal_site_id;
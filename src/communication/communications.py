@@ -1,9 +1,9 @@
-import sqlite3
 import os
 from collections import namedtuple
 from pathlib import Path
 
 from src.core.filters import is_high_priority, get_priority_level
+from src.core.database import connect_snapshot
 import config
 
 
@@ -37,7 +37,7 @@ def generate_pdf_details_by_employee(employee_id):
     with open(config.SQL_DIR / 'get_pdfs_by_user_id.sql', 'r') as file:
         sql_query = file.read()
         formatted_query = sql_query.format(employee_id=employee_id)
-        conn = sqlite3.connect(config.DATABASE_PATH)
+        conn = connect_snapshot()
         cursor = conn.cursor()
         cursor.execute(formatted_query)
         results = cursor.fetchall()
@@ -46,7 +46,7 @@ def generate_pdf_details_by_employee(employee_id):
     # Get detailed PDF reports for each domain
     with open(config.SQL_DIR / 'get_pdf_reports_by_site_name.sql') as pdf_reports_sql:
         sql_query = pdf_reports_sql.read()
-        conn = sqlite3.connect(config.DATABASE_PATH)
+        conn = connect_snapshot()
         cursor = conn.cursor()
 
         for domain in domains:
@@ -193,7 +193,7 @@ def build_emails():
     emails = []
     with open(config.SQL_DIR / 'get_all_users_with_pdf_files.sql') as pdf_reports_sql:
         sql_query = pdf_reports_sql.read()
-        conn = sqlite3.connect(config.DATABASE_PATH)
+        conn = connect_snapshot()
         cursor = conn.cursor()
         cursor.execute(sql_query)
         results = cursor.fetchall()
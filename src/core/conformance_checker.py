@@ -3,6 +3,7 @@ import sqlite3
 import sys
 
 import time
+from datetime import datetime, timedelta
 from urllib.parse import urlparse, urlunparse, quote
 
 import requests
@@ -17,11 +18,13 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from src.data_management.data_export import get_all_sites, get_pdf_reports_by_site_name
+from src.data_management.data_export import get_all_sites, get_pdf_reports_by_site_name, get_discovered_pdfs, \
+    get_discovered_pdfs_since
 from src.data_management.data_import import add_pdf_file_to_database, get_site_id_by_domain_name, check_if_pdf_report_exists, \
-    add_pdf_report_failure
+    add_pdf_report_failure, record_scan_run, mark_replaced_pdf_rows_as_removed
 from src.core.pdf_priority import violation_counter, pdf_check, pdf_status
-from crawlers.csula_pdf_scan.csula_pdf_scan.box_handler import box_share_pattern_match, download_from_box
+from crawlers.csula_pdf_scan.csula_pdf_scan.box_handler import box_share_pattern_match, download_from_box, \
+    resolve_box_shares
 import config
 
 temp_pdf_path = str(config.TEMP_PDF_PATH)
@@ -94,6 +97,30 @@ def loop_through_files_in_folder(folder_path):
     return None  # Return None if the file does not exist
 
 
+def load_discovered_pdfs(folder_path):
+    """
+    (pdf_uri, parent_uri) pairs for one site folder.
+
+    Read from the discovered_pdf table the crawler streams into; sites with no
+    rows there (crawled before the table existed) fall back to parsing the
+    folder's scanned_pdfs.txt ("PDF PARENT TIMESTAMP" per line). Returns None
+    if neither source has anything, like loop_through_files_in_folder().
+    """
+    rows = get_discovered_pdfs(os.path.basename(os.path.normpath(folder_path)))
+    if rows:
+        return [(row.pdf_uri, row.parent_uri) for row in rows]
+
+    lines = loop_through_files_in_folder(folder_path)
+    if lines is None:
+        return None
+    pairs = []
+    for line in lines:
+        parts = line.split()
+        if len(parts) >= 2:
+            pairs.append((parts[0], parts[1]))
+    return pairs
+
+
 def scan_pdfs(directory, domain_id):
 
     """
@@ -104,7 +131,7 @@ def scan_pdfs(directory, domain_id):
     domain_id (int): The ID of the domain associated with the PDFs.
 
     Process:
-    1. Loads the list of PDF URLs and their locations from text files in the specified directory.
+    1. Loads the PDF URLs and their locations the crawler found for this directory's site (see load_discovered_pdfs).
     2. For each PDF URL and location:
         a. Checks if an accessibility report already exists for the PDF.
         b. If no report exists, downloads the PDF.
@@ -112,21 +139,15 @@ def scan_pdfs(directory, domain_id):
         d. Adds the report to the database if successful, or logs a failure if not.
     """
 
-    pdf_locations = loop_through_files_in_folder(directory)
+    pdf_locations = load_discovered_pdfs(directory)
     
     # Track analyzed PDFs in this session to avoid re-analyzing the same PDF
     analyzed_pdfs_in_session = set()
 
     if pdf_locations:
 
-        for file in pdf_locations:
-            print("DFD", file)
-
+        for file_url, loc in pdf_locations:
             try:
-                file_split = file.split(' ', 1)  # Splits at the last space
-
-                file_url = file_split[0]
-                loc = file_split[1].split(" ")[0]
                 print("checking", file_url, loc)
 
                 # Check if we already analyzed this PDF URL in this session
@@ -157,18 +178,21 @@ def scan_pdfs(directory, domain_id):
                 # file_url = urlunparse(parsed_url._replace(path=encoded_path))
                 report_exsits = check_if_pdf_report_exists(file_url, loc) # report will exist if there is a hash match
             except ValueError as e:
-                add_pdf_report_failure("file_url", "loc", domain_id, "Couldn't unpack file url and location")
+                add_pdf_report_failure(file_url, loc, domain_id, f"Couldn't check existing report: {e}")
                 continue
 
             if not report_exsits:
                 print("Report does not exist", file_url, loc)
                 if box_share_pattern_match(file_url):
                     print("Downloading File From Box")
-                    box_download = download_from_box(file_url, loc, domain_id) # saved to temp_pdf_path
+                    box_download = download_from_box(file_url, loc, domain_id)
 
                     if not box_download[0]:
                         print("Box Download failed", file_url)
                         add_pdf_report_failure(file_url, loc, domain_id, box_download[1])
+                        continue
+                    with open(temp_pdf_path, "wb") as f:
+                        f.write(box_download[1])
                 else:
                     pdf_download = download_pdf_into_memory(file_url,loc, domain_id) # saved to temp_pdf_path
                     if pdf_download:
@@ -195,17 +219,16 @@ def scan_pdfs(directory, domain_id):
                 continue
 
 
-def mark_replaced_pdfs_as_removed(domain_id):
-
-    with open(config.SQL_DIR / "update_scan_by_removing_old_duplicates.sql", "r") as file:
-        query = file.read()
-
-    formatted_query = query.format(site_name=domain_id)
-    print(formatted_query)
-    conn = sqlite3.connect(config.DATABASE_PATH)
-    conn.execute("PRAGMA journal_mode=WAL")
-    cursor = conn.cursor()
-    cursor.execute(formatted_query)
+def mark_replaced_pdfs_as_removed(domain_id=None):
+    """
+    After re-scanning, mark all but the newest row per (pdf_uri, parent_uri)
+    as removed, for one domain name or (None) every site at once, in a single
+    committed UPDATE. Returns {domain_name: rows marked removed}.
+    """
+    removed = mark_replaced_pdf_rows_as_removed(domain_id)
+    for site, count in removed.items():
+        print(f"{site}: {count} replaced PDF rows marked removed")
+    return removed
 
 
 def refresh_existing_pdf_reports(single_domain=None):
@@ -227,6 +250,9 @@ def refresh_existing_pdf_reports(single_domain=None):
                     if not box_download[0]:
                         print("Box Download failed", row.pdf_uri)
                         add_pdf_report_failure(row.pdf_uri, row.parent_uri, row.drupal_site_id, box_download[1])
+                        continue
+                    with open(temp_pdf_path, "wb") as f:
+                        f.write(box_download[1])
 
                 else:
                     pdf_download = download_pdf_into_memory(row.pdf_uri, row.parent_uri, row.drupal_site_id)
@@ -253,7 +279,7 @@ def refresh_existing_pdf_reports(single_domain=None):
         print(all_sites_list)
         for domain in all_sites_list:
             scan_pdfs_by_domain(domain)
-            mark_replaced_pdfs_as_removed(domain)
+        mark_replaced_pdfs_as_removed()
 
     if single_domain:
         #refresh single domain
@@ -268,7 +294,7 @@ def _scan_pdf_worker(args):
     """
     Picklable top-level worker for per-PDF parallel scanning.
 
-    Each worker handles exactly one (pdf_line, domain_id) task: check if
+    Each worker handles exactly one (pdf_uri, parent_uri, domain_id) task: check if
     already scanned, download, run VeraPDF, write result to DB.
     Process-specific temp file paths prevent disk collisions between workers.
 
@@ -278,19 +304,11 @@ def _scan_pdf_worker(args):
     import os as _os
     import config as _config
     global temp_pdf_path, temp_profile_path
-    pdf_line, domain_id = args
+    file_url, loc, domain_id = args
     pid = _os.getpid()
     temp_pdf_path = str(_config.TEMP_DIR / f"temp_{pid}.pdf")
     temp_profile_path = str(_config.TEMP_DIR / f"temp_profile_{pid}.json")
 
-    try:
-        file_split = pdf_line.split(' ', 1)
-        file_url = file_split[0]
-        loc = file_split[1].split(" ")[0]
-    except (ValueError, IndexError):
-        add_pdf_report_failure("unknown", "unknown", domain_id, "Couldn't unpack file url and location")
-        return
-
     if check_if_pdf_report_exists(file_url, loc):
         return
 
@@ -299,6 +317,8 @@ def _scan_pdf_worker(args):
         if not box_download[0]:
             add_pdf_report_failure(file_url, loc, domain_id, box_download[1])
             return
+        with open(temp_pdf_path, "wb") as f:
+            f.write(box_download[1])
     else:
         pdf_download = download_pdf_into_memory(file_url, loc, domain_id)
         if not pdf_download:
@@ -317,7 +337,7 @@ def full_pdf_scan(site_folders, workers=1):
     """
     Scans all PDFs across all domain folders for accessibility issues.
 
-    Builds a flat work queue of (pdf_line, domain_id) tuples — one per
+    Builds a flat work queue of (pdf_uri, parent_uri, domain_id) tuples — one per
     unique (url, parent_uri) pair across ALL domains — then submits the
     entire queue to a ProcessPoolExecutor. This gives true per-PDF
     parallelism: workers pick up the next available PDF regardless of
@@ -326,41 +346,138 @@ def full_pdf_scan(site_folders, workers=1):
 
     Parameters:
     site_folders (str): Path to the directory containing per-domain
-                        subdirectories, each with a scanned_pdfs.txt.
+                        subdirectories. Each folder name is looked up in
+                        discovered_pdf (see load_discovered_pdfs).
     workers (int):      Number of parallel worker processes. 1 = sequential
                         (Windows default). >1 uses ProcessPoolExecutor (Mac).
+
+    When the queue drains, the run and every (url, parent_uri) pair it saw are
+    recorded in scan_run / scan_observation (see record_scan_run).
     """
-    work_items = []
+    started_at = datetime.now()
     seen = set()  # deduplicate (url, loc) — prevents two workers racing on the same PDF
+    work_items = _collect_work_items(site_folders, seen)
+
+    total = len(work_items)
+    print(f"Total unique PDF work items across all domains: {total}")
 
+    # Resolve Box share links concurrently up front; workers read the cache.
+    resolve_box_shares(item[0] for item in work_items)
+
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_scan_pdf_worker, work_items))
+    else:
+        for item in work_items:
+            _scan_pdf_worker(item)
+
+    # Snapshot what this run saw so history can be queried from the database.
+    record_scan_run(started_at, datetime.now(), seen)
+
+
+def _collect_work_items(site_folders, seen):
+    """
+    (pdf_uri, parent_uri, domain_id) work items for every site folder, skipping
+    pairs already in `seen` (which is updated in place).
+    """
+    work_items = []
     for folder in os.listdir(site_folders):
         domain_id = get_site_id_by_domain_name(folder)
         if domain_id is None:
             continue
         folder_path = os.path.join(site_folders, folder)
-        pdf_lines = loop_through_files_in_folder(folder_path)
-        if not pdf_lines:
+        pdf_pairs = load_discovered_pdfs(folder_path)
+        if not pdf_pairs:
             continue
-        for line in pdf_lines:
-            try:
-                parts = line.split(' ', 1)
-                key = (parts[0], parts[1].split(" ")[0])
-            except (ValueError, IndexError):
-                key = (line, "")
+        for key in pdf_pairs:
             if key not in seen:
                 seen.add(key)
-                work_items.append((line, domain_id))
+                work_items.append((key[0], key[1], domain_id))
+    return work_items
 
-    total = len(work_items)
-    print(f"Total unique PDF work items across all domains: {total}")
 
+# Crawl processes write discovered_pdf in batches stamped with the time each
+# link was found, so a batch can land with timestamps older than rows already
+# polled. Each poll re-reads this far back; `seen` drops the repeats.
+PIPELINE_POLL_OVERLAP = timedelta(seconds=60)
+
+
+def pipelined_pdf_scan(site_folders, crawl_done, workers=1, poll_seconds=5):
+    """
+    Scan PDFs while the crawl that discovers them is still running.
+
+    Polls the discovered_pdf table (which the crawler streams into) and hands
+    each new (pdf_uri, parent_uri) pair to the scanner as soon as it appears,
+    so crawling and VeraPDF analysis overlap and the run takes roughly
+    max(crawl, scan) instead of their sum. Once crawl_done() returns True a
+    last poll picks up the crawl's final batch, then every site folder is
+    swept exactly as full_pdf_scan() would, so sites this crawl didn't touch
+    are still scanned. Pairs are deduplicated across both phases.
+
+    Parameters:
+    site_folders (str): Same as full_pdf_scan().
+    crawl_done (callable): Returns True once the crawl has exited.
+    workers (int):      1 = scan in this process between polls; >1 submits each
+                        PDF to a ProcessPoolExecutor as it is discovered.
+    poll_seconds (int): Wait between polls when nothing new was found.
+    """
+    started_at = datetime.now()
+    seen = set()
+    domain_ids = {}
+    cursor = started_at
+    submitted = 0
+
+    executor = None
+    futures = []
     if workers > 1:
         from concurrent.futures import ProcessPoolExecutor
-        with ProcessPoolExecutor(max_workers=workers) as executor:
-            list(executor.map(_scan_pdf_worker, work_items))
-    else:
-        for item in work_items:
-            _scan_pdf_worker(item)
+        executor = ProcessPoolExecutor(max_workers=workers)
+
+    def submit(items):
+        for item in items:
+            if executor is not None:
+                futures.append(executor.submit(_scan_pdf_worker, item))
+            else:
+                _scan_pdf_worker(item)
+        return len(items)
+
+    try:
+        while True:
+            # Checked before polling so the last poll sees the crawl's final flush.
+            finished = crawl_done()
+            since = max(started_at, cursor - PIPELINE_POLL_OVERLAP)
+            items = []
+            for row in get_discovered_pdfs_since(since.strftime('%Y-%m-%d %H:%M:%S.%f')):
+                cursor = max(cursor, datetime.strptime(row.last_seen_at, '%Y-%m-%d %H:%M:%S.%f'))
+                key = (row.pdf_uri, row.parent_uri)
+                if key in seen:
+                    continue
+                if row.site not in domain_ids:
+                    domain_ids[row.site] = get_site_id_by_domain_name(row.site)
+                if domain_ids[row.site] is None:
+                    continue
+                seen.add(key)
+                items.append((row.pdf_uri, row.parent_uri, domain_ids[row.site]))
+
+            if items:
+                submitted += submit(items)
+                print(f"Queued {len(items)} newly discovered PDFs ({submitted} so far)")
+            if finished:
+                break
+            if not items:
+                time.sleep(poll_seconds)
+
+        remaining = submit(_collect_work_items(site_folders, seen))
+        print(f"Crawl finished; queued {remaining} more PDFs from site folders ({submitted + remaining} total)")
+
+        for future in futures:
+            future.result()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    record_scan_run(started_at, datetime.now(), seen)
 
 
 
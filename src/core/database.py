@@ -1,5 +1,12 @@
+import os
 import sqlite3
 import csv
+import glob
+import time
+from datetime import datetime
+from pathlib import Path
+
+import config
 
 # Define SQL commands to create three tables
 create_pdf_table = """
@@ -90,6 +97,433 @@ CREATE TABLE IF NOT EXISTS failure (
 
 
 
+# Per-site rollup read by the dashboards, the HTML report and the count_*
+# helpers in master_functions.py. Triggers on drupal_pdf_files and pdf_report
+# only note which sites changed (site_summary_stale, one row per site), so a
+# scan write costs one keyed insert however large the site is.
+# refresh_site_summary() then recomputes just those sites; publish_snapshot()
+# calls it before copying, and every reader goes through the snapshot.
+create_site_summary = """
+CREATE TABLE IF NOT EXISTS site_summary (
+    site_id INTEGER PRIMARY KEY,
+    instance_count INTEGER NOT NULL DEFAULT 0,
+    unique_count INTEGER NOT NULL DEFAULT 0,
+    high_priority_count INTEGER NOT NULL DEFAULT 0,
+    last_scanned TIMESTAMP,
+    FOREIGN KEY (site_id) REFERENCES drupal_site(id)
+);
+
+CREATE TABLE IF NOT EXISTS site_summary_stale (
+    site_id INTEGER PRIMARY KEY
+);
+"""
+
+create_pdf_file_indexes = """
+CREATE INDEX IF NOT EXISTS idx_drupal_pdf_files_site ON drupal_pdf_files(drupal_site_id);
+CREATE INDEX IF NOT EXISTS idx_drupal_pdf_files_hash ON drupal_pdf_files(file_hash);
+"""
+
+# Rounded failed checks per page, as filters.errors_per_page() computes it:
+# integer arithmetic, halves rounded up, NULL without pages.
+_errors_per_page = "((2 * {r}.failed_checks + {r}.page_count) / NULLIF(2 * {r}.page_count, 0))"
+
+# Recomputes the summary row for every site matched by {site_filter}. The
+# reportable/high-priority rules mirror filters.check_for_node() and
+# filters.is_high_priority().
+_refresh_site_summary_template = f"""
+DELETE FROM site_summary WHERE site_id IN ({{site_filter}});
+INSERT INTO site_summary (site_id, instance_count, unique_count, high_priority_count, last_scanned)
+SELECT
+    s.id,
+    COUNT(r.pdf_hash),
+    COUNT(DISTINCT r.pdf_hash),
+    COALESCE(SUM(
+        CASE
+            WHEN r.pdf_hash IS NULL THEN 0
+            WHEN r.tagged = 0 THEN 1
+            WHEN r.pdf_text_type = 'Image Only' THEN 1
+            WHEN r.approved_pdf_exporter THEN 0
+            WHEN {_errors_per_page.format(r="r")} > 9 THEN 1
+            WHEN r.has_form = 1 AND {_errors_per_page.format(r="r")} > 3 THEN 1
+            ELSE 0
+        END
+    ), 0),
+    (SELECT MAX(scanned_date) FROM drupal_pdf_files WHERE drupal_site_id = s.id)
+FROM drupal_site s
+    LEFT JOIN drupal_pdf_files f
+        ON f.drupal_site_id = s.id
+        AND f.parent_uri NOT LIKE '%/node/%'
+        AND f.parent_uri NOT LIKE '%/index.php/%'
+        AND f.pdf_returns_404 = 0
+        AND f.parent_returns_404 = 0
+        AND f.removed IS NOT TRUE
+    LEFT JOIN pdf_report r ON f.file_hash = r.pdf_hash
+WHERE s.id IN ({{site_filter}})
+GROUP BY s.id;
+"""
+
+_mark_sites_stale = "INSERT OR IGNORE INTO site_summary_stale (site_id) {sites};"
+_mark_report_sites_stale = _mark_sites_stale.format(
+    sites="SELECT DISTINCT drupal_site_id FROM drupal_pdf_files WHERE file_hash IN ({hashes})"
+)
+
+_site_summary_triggers = (
+    "site_summary_pdf_insert", "site_summary_pdf_delete", "site_summary_pdf_update",
+    "site_summary_report_insert", "site_summary_report_update", "site_summary_report_delete",
+)
+
+create_site_summary_triggers = f"""
+CREATE TRIGGER IF NOT EXISTS site_summary_pdf_insert
+AFTER INSERT ON drupal_pdf_files
+BEGIN
+{_mark_sites_stale.format(sites="VALUES (NEW.drupal_site_id)")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS site_summary_pdf_delete
+AFTER DELETE ON drupal_pdf_files
+BEGIN
+{_mark_sites_stale.format(sites="VALUES (OLD.drupal_site_id)")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS site_summary_pdf_update
+AFTER UPDATE OF pdf_uri, parent_uri, scanned_date, drupal_site_id, file_hash,
+                pdf_returns_404, parent_returns_404, removed ON drupal_pdf_files
+WHEN OLD.parent_uri IS NOT NEW.parent_uri
+  OR OLD.scanned_date IS NOT NEW.scanned_date
+  OR OLD.drupal_site_id IS NOT NEW.drupal_site_id
+  OR OLD.file_hash IS NOT NEW.file_hash
+  OR OLD.pdf_returns_404 IS NOT NEW.pdf_returns_404
+  OR OLD.parent_returns_404 IS NOT NEW.parent_returns_404
+  OR OLD.removed IS NOT NEW.removed
+BEGIN
+{_mark_sites_stale.format(sites="VALUES (OLD.drupal_site_id), (NEW.drupal_site_id)")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS site_summary_report_insert
+AFTER INSERT ON pdf_report
+BEGIN
+{_mark_report_sites_stale.format(hashes="NEW.pdf_hash")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS site_summary_report_update
+AFTER UPDATE OF pdf_hash, tagged, pdf_text_type, approved_pdf_exporter, failed_checks, page_count, has_form
+ON pdf_report
+WHEN OLD.pdf_hash IS NOT NEW.pdf_hash
+  OR OLD.tagged IS NOT NEW.tagged
+  OR OLD.pdf_text_type IS NOT NEW.pdf_text_type
+  OR OLD.approved_pdf_exporter IS NOT NEW.approved_pdf_exporter
+  OR OLD.failed_checks IS NOT NEW.failed_checks
+  OR OLD.page_count IS NOT NEW.page_count
+  OR OLD.has_form IS NOT NEW.has_form
+BEGIN
+{_mark_report_sites_stale.format(hashes="OLD.pdf_hash, NEW.pdf_hash")}
+END;
+
+CREATE TRIGGER IF NOT EXISTS site_summary_report_delete
+AFTER DELETE ON pdf_report
+BEGIN
+{_mark_report_sites_stale.format(hashes="OLD.pdf_hash")}
+END;
+"""
+
+
+def _ensure_column(cursor, table, column, definition):
+    columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})").fetchall()]
+    if column not in columns:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def rebuild_site_summary(conn):
+    """Recompute every row of site_summary from drupal_pdf_files and pdf_report."""
+    conn.executescript(
+        "BEGIN IMMEDIATE;"
+        + _refresh_site_summary_template.format(site_filter="SELECT id FROM drupal_site")
+        + "DELETE FROM site_summary_stale; COMMIT;"
+    )
+
+
+def refresh_site_summary(conn):
+    """Recompute the site_summary rows of the sites written to since the last refresh."""
+    conn.executescript(
+        "BEGIN IMMEDIATE;"
+        + _refresh_site_summary_template.format(site_filter="SELECT site_id FROM site_summary_stale")
+        + "DELETE FROM site_summary_stale; COMMIT;"
+    )
+
+
+def ensure_site_summary(conn):
+    """
+    Create the site_summary tables, their supporting indexes and triggers if
+    they are missing, backfilling site_summary the first time. Databases with
+    the older per-row recompute triggers get them replaced.
+    Safe to call on every connection; it is a no-op once the schema exists.
+    """
+    cursor = conn.cursor()
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'site_summary_stale'"
+    ).fetchone()
+    if exists:
+        return
+
+    # Older databases predate these columns; the summary rules depend on them.
+    _ensure_column(cursor, "drupal_pdf_files", "removed", "BOOLEAN DEFAULT FALSE")
+    _ensure_column(cursor, "pdf_report", "approved_pdf_exporter", "BOOLEAN DEFAULT FALSE")
+
+    cursor.executescript(
+        "".join(f"DROP TRIGGER IF EXISTS {name};\n" for name in _site_summary_triggers)
+        + create_site_summary + create_pdf_file_indexes + create_site_summary_triggers
+    )
+    rebuild_site_summary(conn)
+
+
+# Scan-run ledger. drupal_pdf_files is updated in place, so full_pdf_scan()
+# records one scan_run per run plus a scan_observation row for every PDF it
+# saw, letting trend queries answer "what did site X look like last month".
+create_scan_run = """
+CREATE TABLE IF NOT EXISTS scan_run (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TIMESTAMP NOT NULL,
+    finished_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    pdf_count INTEGER DEFAULT 0
+);
+"""
+
+create_scan_observation = """
+CREATE TABLE IF NOT EXISTS scan_observation (
+    run_id INTEGER NOT NULL,
+    pdf_file_id INTEGER NOT NULL,
+    site_id INTEGER NOT NULL,
+    report_id INTEGER,
+    priority TEXT,
+    -- drupal_pdf_files' mutable fields as they were during the run
+    scanned_date TIMESTAMP,
+    pdf_returns_404 BOOLEAN,
+    parent_returns_404 BOOLEAN,
+    PRIMARY KEY (run_id, pdf_file_id),
+    FOREIGN KEY (run_id) REFERENCES scan_run(id),
+    FOREIGN KEY (pdf_file_id) REFERENCES drupal_pdf_files(id),
+    FOREIGN KEY (site_id) REFERENCES drupal_site(id),
+    FOREIGN KEY (report_id) REFERENCES pdf_report(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_scan_observation_site_run ON scan_observation(site_id, run_id);
+CREATE INDEX IF NOT EXISTS idx_drupal_pdf_files_uri ON drupal_pdf_files(pdf_uri, parent_uri);
+"""
+
+# Priority level per report, rule for rule filters.get_priority_level() (the
+# level the Excel reports show): the errors-per-page 'high' rules come before
+# the approved-exporter 'low'. site_summary's high-priority count follows
+# filters.is_high_priority() instead, which exempts approved exporters first.
+create_pdf_priority_view = f"""
+CREATE VIEW IF NOT EXISTS pdf_priority AS
+SELECT
+    r.id AS report_id,
+    r.pdf_hash,
+    CASE
+        WHEN r.tagged = 0 THEN 'high'
+        WHEN r.pdf_text_type = 'Image Only' THEN 'high'
+        WHEN {_errors_per_page.format(r="r")} > 9 THEN 'high'
+        WHEN r.has_form = 1 AND {_errors_per_page.format(r="r")} > 3 THEN 'high'
+        WHEN r.approved_pdf_exporter THEN 'low'
+        WHEN {_errors_per_page.format(r="r")} >= 4 THEN 'medium'
+        ELSE 'low'
+    END AS priority
+FROM pdf_report r;
+"""
+
+
+def ensure_scan_history(conn):
+    """Create the scan_run / scan_observation tables and the pdf_priority view if missing."""
+    cursor = conn.cursor()
+    _ensure_column(cursor, "drupal_pdf_files", "removed", "BOOLEAN DEFAULT FALSE")
+    _ensure_column(cursor, "pdf_report", "approved_pdf_exporter", "BOOLEAN DEFAULT FALSE")
+    # The view carries no data; recreate it so its priority rules stay current.
+    cursor.executescript(create_scan_run + create_scan_observation
+                         + "DROP VIEW IF EXISTS pdf_priority;" + create_pdf_priority_view)
+    # Runs recorded before these columns existed keep NULL for them.
+    _ensure_column(cursor, "scan_observation", "scanned_date", "TIMESTAMP")
+    _ensure_column(cursor, "scan_observation", "pdf_returns_404", "BOOLEAN")
+    _ensure_column(cursor, "scan_observation", "parent_returns_404", "BOOLEAN")
+
+
+# Crawl output. SiteSpider streams every (pdf_uri, parent_uri) it finds into
+# discovered_pdf through CslaPdfScanPipeline, in small batches, so a killed
+# crawl keeps what it had found. `site` is the site's output folder name
+# (calstatela-edu_ecst), the same name full_pdf_scan() walks. One
+# discovery_crawl row per site per crawl marks which rows the latest complete
+# crawl saw; scanned_pdfs.txt is now only an export of those rows.
+create_discovered_pdf = """
+CREATE TABLE IF NOT EXISTS discovered_pdf (
+    site TEXT NOT NULL,
+    pdf_uri TEXT NOT NULL,
+    parent_uri TEXT NOT NULL,
+    first_seen_at TIMESTAMP NOT NULL,
+    last_seen_at TIMESTAMP NOT NULL,
+    PRIMARY KEY (site, pdf_uri, parent_uri)
+);
+
+CREATE INDEX IF NOT EXISTS idx_discovered_pdf_site_seen ON discovered_pdf(site, last_seen_at);
+CREATE INDEX IF NOT EXISTS idx_discovered_pdf_seen ON discovered_pdf(last_seen_at);
+
+CREATE TABLE IF NOT EXISTS discovery_crawl (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    site TEXT NOT NULL,
+    started_at TIMESTAMP NOT NULL,
+    finished_at TIMESTAMP,
+    finish_reason TEXT
+);
+
+CREATE INDEX IF NOT EXISTS idx_discovery_crawl_site ON discovery_crawl(site, started_at);
+"""
+
+
+def ensure_discovered_pdf(conn):
+    """Create the discovered_pdf / discovery_crawl tables if missing."""
+    conn.executescript(create_discovered_pdf)
+
+
+# Page aliases. SiteSpider fingerprints each page's main content (SimHash, see
+# crawlers/csula_pdf_scan/csula_pdf_scan/near_duplicates.py); a page that
+# repeats one already crawled on the host for the same subsites (/node/NNN,
+# /index.php/..., print views) is stored here against the URL kept for it.
+# Its PDF and Box links are still recorded, but its other links are not
+# followed. distance is the number of fingerprint bits that differ.
+create_page_alias = """
+CREATE TABLE IF NOT EXISTS page_alias (
+    alias_uri TEXT PRIMARY KEY,
+    canonical_uri TEXT NOT NULL,
+    host TEXT NOT NULL,
+    distance INTEGER NOT NULL,
+    first_seen_at TIMESTAMP NOT NULL,
+    last_seen_at TIMESTAMP NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_page_alias_canonical ON page_alias(canonical_uri);
+"""
+
+
+def ensure_page_alias(conn):
+    """Create the page_alias table if missing."""
+    conn.executescript(create_page_alias)
+
+
+# Link health. refresh_status() checks each distinct PDF / parent URL once and
+# keeps the answer here, so a rerun within config.LINK_CHECK_TTL reuses it
+# instead of asking the server again. status is the final HTTP status (after
+# redirects); Box shares are stored under their share URL.
+create_link_check = """
+CREATE TABLE IF NOT EXISTS link_check (
+    url TEXT PRIMARY KEY,
+    status INTEGER,
+    error TEXT,
+    checked_at REAL NOT NULL  -- time.time() of the check
+);
+"""
+
+
+def ensure_link_check(conn):
+    """Create the link_check table if missing."""
+    conn.executescript(create_link_check)
+
+
+def _snapshot_pointer(snapshot_path):
+    return str(snapshot_path) + ".current"
+
+
+def current_snapshot_path(snapshot_path=None):
+    """
+    The snapshot file readers should open: the version named in the pointer
+    file, else snapshot_path itself (published before snapshots were
+    versioned), else None if nothing has been published.
+    """
+    snapshot_path = str(snapshot_path or config.DATABASE_SNAPSHOT_PATH)
+    try:
+        with open(_snapshot_pointer(snapshot_path), encoding="utf-8") as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        name = None
+    if name:
+        path = os.path.join(os.path.dirname(snapshot_path), name)
+        if os.path.exists(path):
+            return path
+    return snapshot_path if os.path.exists(snapshot_path) else None
+
+
+def _replace(source, target, attempts=10):
+    """os.replace, retried while Windows reports the target open elsewhere."""
+    for attempt in range(attempts):
+        try:
+            os.replace(source, target)
+            return
+        except PermissionError:
+            if attempt == attempts - 1:
+                raise
+            time.sleep(0.1 * (attempt + 1))
+
+
+def publish_snapshot(snapshot_path=None):
+    """
+    Copy the live database to a read-only reporting snapshot.
+
+    Uses the SQLite online backup API, which copies a single consistent
+    version of the database even while scan workers are writing. Each copy
+    is a new file (<name>.<timestamp>.db) and the <name>.current pointer file
+    is then switched to it, so readers either see the previous snapshot or
+    the new one, never a partial file. No file a reader may have open is
+    overwritten (Windows refuses that); older versions are deleted once no
+    reader holds them.
+    """
+    snapshot_path = str(snapshot_path or config.DATABASE_SNAPSHOT_PATH)
+    base, ext = os.path.splitext(snapshot_path)
+    version_path = f"{base}.{datetime.now():%Y%m%d%H%M%S%f}{ext}"
+    tmp_path = version_path + ".tmp"
+
+    source = sqlite3.connect(config.DATABASE_PATH, timeout=30)
+    source.execute("PRAGMA journal_mode=WAL")
+    # Readers can't create schema on an immutable file, so do it here first.
+    ensure_site_summary(source)
+    ensure_scan_history(source)
+    source.commit()
+    refresh_site_summary(source)
+
+    target = sqlite3.connect(tmp_path)
+    source.backup(target)
+    source.close()
+    # A WAL-mode copy would need a -wal/-shm pair; immutable readers want one file.
+    target.execute("PRAGMA journal_mode=DELETE")
+    target.close()
+    os.replace(tmp_path, version_path)
+
+    pointer = _snapshot_pointer(snapshot_path)
+    with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+        f.write(os.path.basename(version_path))
+    _replace(pointer + ".tmp", pointer)
+
+    for old in glob.glob(glob.escape(base) + ".*" + ext) + [snapshot_path]:
+        if old != version_path and os.path.exists(old):
+            try:
+                os.remove(old)
+            except OSError:
+                pass  # still open in a report process; removed by a later publish
+    print(f"Published reporting snapshot: {version_path}")
+
+
+def connect_snapshot(snapshot_path=None):
+    """
+    Open the current reporting snapshot read-only (mode=ro&immutable=1).
+
+    immutable=1 tells SQLite the file cannot change, so it takes no locks and
+    never blocks on, or is blocked by, a running scan. A snapshot is published
+    first if none exists yet.
+    """
+    path = current_snapshot_path(snapshot_path)
+    if path is None:
+        publish_snapshot(snapshot_path)
+        path = current_snapshot_path(snapshot_path)
+    uri = Path(path).resolve().as_uri() + "?mode=ro&immutable=1"
+    return sqlite3.connect(uri, uri=True)
+
+
 # cursor.execute(create_pdf_table)
 # cursor.execute(create_pdf_report)
 # cursor.execute(create_site_table)
@@ -8,6 +8,18 @@ def check_for_node(parent_uri):
 
 
 
+def errors_per_page(failed_checks, page_count):
+    """Failed checks per page rounded to a whole number, halves rounded up (0 without pages).
+
+    Integer arithmetic, the same expression the site_summary and pdf_priority
+    SQL uses, so Python and SQLite always agree on the priority thresholds.
+    """
+    failed_checks, page_count = int(failed_checks), int(page_count)
+    if page_count <= 0:
+        return 0
+    return (2 * failed_checks + page_count) // (2 * page_count)
+
+
 def is_high_priority(data):
     """Return True if the PDF requires urgent attention for ADA Title II compliance.
 
@@ -37,7 +49,7 @@ def is_high_priority(data):
     if data['approved_pdf_exporter']:
         return False
 
-    epp = round(int(data['failed_checks']) / int(data['page_count'])) if int(data['page_count']) > 0 else 0
+    epp = errors_per_page(data['failed_checks'], data['page_count'])
     if epp > 9:
         return True
     if data['has_form'] == 1 and epp > 3:
@@ -60,7 +72,7 @@ def get_priority_level(data):
     if not isinstance(data, dict):
         data = dict(data._asdict())
 
-    epp = round(int(data['failed_checks']) / int(data['page_count'])) if int(data['page_count']) > 0 else 0
+    epp = errors_per_page(data['failed_checks'], data['page_count'])
 
     # High priority
     if data['tagged'] == 0:
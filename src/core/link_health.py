@@ -0,0 +1,148 @@
+"""
+Concurrent link-health checks for refresh_status().
+
+Many drupal_pdf_files rows share a parent page (and many share a PDF), so the
+rows are first reduced to the distinct URLs they point at and each URL is
+checked once:
+
+  * checks run on one asyncio event loop over an aiohttp session, at most
+    config.LINK_CHECK_CONCURRENCY in flight and config.LINK_CHECK_PER_HOST per
+    host, so one slow web server can't hold up the others and no server sees
+    more than a handful of requests at a time;
+  * each check is a HEAD request (following redirects). Servers that refuse
+    HEAD (405, 501, some 400/403 WAF answers) get a one-byte ranged GET
+    instead, so nothing is downloaded in full;
+  * answers are kept in the link_check table for config.LINK_CHECK_TTL
+    seconds, so a rerun within that window only checks what is new or stale.
+    Network errors are reported but not kept: they say nothing lasting about
+    the URL.
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+# Add project root to path for imports
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import aiohttp
+
+import config
+from src.core.database import ensure_link_check
+
+LinkStatus = namedtuple("LinkStatus", ["url", "status", "error"])
+
+GONE_STATUSES = (404, 410)
+
+# HEAD answers that mean "not like that" rather than "not there".
+_HEAD_REFUSED = frozenset({400, 403, 405, 406, 501})
+
+
+def is_gone(link_status):
+    """True if the URL is missing: a 404/410 answer or no answer at all."""
+    return link_status.status is None or link_status.status in GONE_STATUSES
+
+
+class LinkChecker:
+    """Checks a batch of URLs concurrently; check(urls) returns {url: LinkStatus}."""
+
+    def __init__(self, concurrency=32, per_host=4, timeout=15, progress_every=500):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.progress_every = progress_every
+
+    def check(self, urls):
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return {}
+        return asyncio.run(self._check_all(urls))
+
+    async def _check_all(self, urls):
+        overall = asyncio.Semaphore(self.concurrency)
+        host_limits = {}
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        results = {}
+
+        async def check_one(session, url):
+            host = urlsplit(url).netloc.lower()
+            host_limit = host_limits.setdefault(host, asyncio.Semaphore(self.per_host))
+            # Wait for the host first so a busy host doesn't hold overall slots.
+            async with host_limit, overall:
+                results[url] = await self._fetch_status(session, url)
+            if self.progress_every and len(results) % self.progress_every == 0:
+                print(f"Checked {len(results)}/{len(urls)} URLs")
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            await asyncio.gather(*(check_one(session, url) for url in urls))
+        return results
+
+    @staticmethod
+    async def _fetch_status(session, url):
+        try:
+            async with session.head(url, allow_redirects=True) as response:
+                status = response.status
+            if status not in _HEAD_REFUSED:
+                return LinkStatus(url, status, None)
+            async with session.get(url, allow_redirects=True, headers={"Range": "bytes=0-0"}) as response:
+                return LinkStatus(url, response.status, None)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            return LinkStatus(url, None, f"{type(e).__name__}: {str(e)[:100]}")
+
+
+def _connect():
+    conn = sqlite3.connect(config.DATABASE_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    ensure_link_check(conn)
+    return conn
+
+
+def load_fresh_checks(conn, ttl):
+    """{url: LinkStatus} for every link_check row younger than ttl seconds."""
+    rows = conn.execute(
+        "SELECT url, status, error FROM link_check WHERE checked_at >= ?",
+        (time.time() - ttl,),
+    ).fetchall()
+    return {row[0]: LinkStatus(*row) for row in rows}
+
+
+def store_checks(conn, results):
+    """Keep every answered check; network errors are left out."""
+    now = time.time()
+    conn.executemany(
+        "INSERT OR REPLACE INTO link_check (url, status, error, checked_at) VALUES (?, ?, ?, ?)",
+        [(each.url, each.status, each.error, now) for each in results if each.status is not None],
+    )
+    conn.commit()
+
+
+def check_links(urls, force=False):
+    """
+    {url: LinkStatus} for every distinct URL in urls. Answers younger than
+    config.LINK_CHECK_TTL are reused unless force is True; the rest are
+    checked concurrently and stored.
+    """
+    urls = set(urls)
+    conn = _connect()
+    fresh = {} if force else load_fresh_checks(conn, config.LINK_CHECK_TTL)
+    results = {url: fresh[url] for url in urls if url in fresh}
+    stale = sorted(urls - results.keys())
+    print(f"Link checks: {len(urls)} distinct URLs, {len(results)} fresh from cache, {len(stale)} to check")
+
+    checker = LinkChecker(
+        concurrency=config.LINK_CHECK_CONCURRENCY,
+        per_host=config.LINK_CHECK_PER_HOST,
+        timeout=config.LINK_CHECK_TIMEOUT,
+    )
+    checked = checker.check(stale)
+    store_checks(conn, checked.values())
+    conn.close()
+
+    results.update(checked)
+    return results
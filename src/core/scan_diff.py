@@ -0,0 +1,187 @@
+"""
+Scan-to-scan diff engine.
+
+Compares two scan runs (from the scan_run / scan_observation ledger) or two
+manifest CSV files and classifies every PDF that differs between them:
+
+    new        - linked in B but not in A
+    removed    - linked in A but not in B
+    fixed      - priority improved (e.g. high -> low)
+    regressed  - priority got worse (e.g. low -> high)
+    changed    - content hash changed with the same priority
+
+Both sides are loaded into temp tables and classified by one grouped query
+(sql/scan_diff.sql), so a diff across every site is a single pass over the
+two snapshots rather than a per-site comparison of Excel files.
+"""
+
+import csv
+import json
+import os
+import sqlite3
+import sys
+from collections import namedtuple
+from datetime import datetime
+
+# Add project root to path for imports
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from src.core.database import ensure_scan_history
+
+CHANGE_TYPES = ("new", "removed", "fixed", "regressed", "changed")
+MANIFEST_COLUMNS = ["site", "pdf_uri", "parent_uri", "file_hash", "priority"]
+
+SCAN_DIFFS_DIR = config.OUTPUT_REPORTS_DIR / "scan_diffs"
+
+_create_diff_tables = """
+CREATE TEMP TABLE IF NOT EXISTS diff_a (site TEXT, pdf_uri TEXT, parent_uri TEXT, file_hash TEXT, priority TEXT);
+CREATE TEMP TABLE IF NOT EXISTS diff_b (site TEXT, pdf_uri TEXT, parent_uri TEXT, file_hash TEXT, priority TEXT);
+DELETE FROM temp.diff_a;
+DELETE FROM temp.diff_b;
+"""
+
+
+def _connect():
+    conn = sqlite3.connect(config.DATABASE_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    ensure_scan_history(conn)
+    conn.executescript(_create_diff_tables)
+    return conn
+
+
+def _load_run(conn, side, run_id):
+    with open(config.SQL_DIR / "load_scan_run_for_diff.sql", "r") as file:
+        query = file.read()
+    conn.execute(query.format(side=side), {"run_id": run_id})
+
+
+def _load_manifest(conn, side, manifest_path):
+    with open(manifest_path, newline="", encoding="utf-8") as f:
+        rows = [
+            tuple((row.get(col) or None) for col in MANIFEST_COLUMNS)
+            for row in csv.DictReader(f)
+        ]
+    conn.executemany(f"INSERT INTO temp.{side} VALUES (?, ?, ?, ?, ?)", rows)
+
+
+def _run_diff(conn):
+    with open(config.SQL_DIR / "scan_diff.sql", "r") as file:
+        query = file.read()
+    cursor = conn.execute(query)
+    col_names = [desc[0] for desc in cursor.description]
+    Row = namedtuple('Row', col_names)
+    return [Row(*row) for row in cursor.fetchall()]
+
+
+def latest_run_ids(count=2):
+    """Return the ids of the most recent scan runs, oldest first."""
+    conn = _connect()
+    rows = conn.execute("SELECT id FROM scan_run ORDER BY id DESC LIMIT ?", (count,)).fetchall()
+    conn.close()
+    return [row[0] for row in reversed(rows)]
+
+
+def diff_scan_runs(run_a, run_b):
+    """Diff two scan runs by id. Returns a list of changed-PDF rows."""
+    conn = _connect()
+    _load_run(conn, "diff_a", run_a)
+    _load_run(conn, "diff_b", run_b)
+    changes = _run_diff(conn)
+    conn.close()
+    return changes
+
+
+def diff_manifests(manifest_a, manifest_b):
+    """Diff two manifest CSV files (columns: MANIFEST_COLUMNS). Returns changed-PDF rows."""
+    conn = _connect()
+    _load_manifest(conn, "diff_a", manifest_a)
+    _load_manifest(conn, "diff_b", manifest_b)
+    changes = _run_diff(conn)
+    conn.close()
+    return changes
+
+
+def export_run_manifest(run_id, manifest_path):
+    """Write a scan run's observations as a manifest CSV usable by diff_manifests()."""
+    conn = _connect()
+    _load_run(conn, "diff_a", run_id)
+    rows = conn.execute(f"SELECT {', '.join(MANIFEST_COLUMNS)} FROM temp.diff_a ORDER BY site, pdf_uri").fetchall()
+    conn.close()
+
+    with open(manifest_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(MANIFEST_COLUMNS)
+        writer.writerows(rows)
+    return len(rows)
+
+
+def summarize_by_site(changes):
+    """Count changes per site: {site: {change_type: n, ..., 'content_changed': n}}."""
+    summary = {}
+    for row in changes:
+        site = summary.setdefault(row.site, dict.fromkeys(CHANGE_TYPES + ("content_changed",), 0))
+        site[row.change_type] += 1
+        if row.content_changed:
+            site["content_changed"] += 1
+    return dict(sorted(summary.items()))
+
+
+def write_diff_summary(changes, label, output_dir=SCAN_DIFFS_DIR, excel=True):
+    """
+    Write a compact per-site JSON summary (and optionally an Excel workbook with
+    Summary and Changes sheets) for a diff. Returns the JSON path.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime(config.EXCEL_REPORT_TIMESTAMP_FORMAT)
+    base_name = f"scan-diff-{label}-{timestamp}"
+
+    summary = summarize_by_site(changes)
+    json_path = output_dir / f"{base_name}.json"
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "label": label,
+            "generated": timestamp,
+            "totals": {key: sum(site[key] for site in summary.values())
+                       for key in CHANGE_TYPES + ("content_changed",)},
+            "sites": summary,
+        }, f, indent=2)
+
+    if excel:
+        from openpyxl import Workbook
+        from openpyxl.styles import Font
+
+        wb = Workbook()
+        summary_ws = wb.active
+        summary_ws.title = "Summary"
+        summary_ws.append(["site", *CHANGE_TYPES, "content_changed"])
+        for site, counts in summary.items():
+            summary_ws.append([site, *(counts[key] for key in CHANGE_TYPES), counts["content_changed"]])
+
+        changes_ws = wb.create_sheet("Changes")
+        if changes:
+            changes_ws.append(list(changes[0]._fields))
+            for row in changes:
+                changes_ws.append(list(row))
+
+        for ws in (summary_ws, changes_ws):
+            for cell in ws[1]:
+                cell.font = Font(bold=True)
+
+        wb.save(output_dir / f"{base_name}.xlsx")
+
+    print(f"Scan diff summary saved to {json_path}")
+    return json_path
+
+
+def diff_latest_runs(excel=True):
+    """Diff the two most recent scan runs and write the summary, if two runs exist."""
+    run_ids = latest_run_ids()
+    if len(run_ids) < 2:
+        print("Fewer than two scan runs recorded; nothing to diff yet.")
+        return None
+    run_a, run_b = run_ids
+    changes = diff_scan_runs(run_a, run_b)
+    return write_diff_summary(changes, f"run{run_a}-run{run_b}", excel=excel)
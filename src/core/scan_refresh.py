@@ -1,7 +1,6 @@
 import sqlite3
 import sys
 import os
-import requests
 
 # Add project root to path for imports
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
@@ -10,12 +9,22 @@ if project_root not in sys.path:
 
 import config
 from src.data_management.data_export import get_pdfs_by_site_name
-from crawlers.csula_pdf_scan.csula_pdf_scan.box_handler import box_share_pattern_match, download_from_box
+from src.core.link_health import check_links, is_gone
+from crawlers.csula_pdf_scan.csula_pdf_scan.box_handler import box_share_pattern_match, download_from_box, \
+    resolve_box_shares
+
+# A Box download URL is only usable if it answers with the file (200, or 206
+# for the ranged fallback); anything else means the share can't be scanned.
+BOX_OK_STATUSES = (200, 206)
+
+# Flag updates are committed in batches so the write lock is held briefly.
+UPDATE_BATCH_SIZE = 500
+
 
 def check_box_pdf_status(pdf_uri):
     """
-    For a Box share link, obtain the direct download URL and check its status.
-    If the initial HEAD request returns 302, follow the 'Location' header and do another HEAD.
+    For a Box share link, obtain the direct download URL and check its status
+    (redirects are followed).
 
     Parameters:
         pdf_uri (str): The original Box share link.
@@ -29,120 +38,92 @@ def check_box_pdf_status(pdf_uri):
         print(f"Failed to obtain download link for Box share: {pdf_uri}")
         return False, None
 
-    try:
-        response = requests.head(download_url, timeout=10, allow_redirects=False)
-        print(f"Initial Box HEAD status for URL {download_url}: {response.status_code}")
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching Box PDF download URL ({download_url}): {e}")
-        return False, None
+    status = check_links([download_url])[download_url].status
+    return status in BOX_OK_STATUSES, status
 
-    if response.status_code == 302:
-        new_url = response.headers.get("Location")
-        if new_url:
-            print(f"Following redirect to: {new_url}")
-            try:
-                final_response = requests.head(new_url, timeout=10)
-                print(f"Final Box HEAD status for URL {new_url}: {final_response.status_code}")
-                return final_response.status_code == 200, final_response.status_code
-            except requests.exceptions.RequestException as e:
-                print(f"Error fetching final Box PDF URL ({new_url}): {e}")
-                return False, None
-        else:
-            print("Redirect response did not contain a Location header.")
-            return False, response.status_code
-    else:
-        # If the status is not a redirect, check if it is 200.
-        return response.status_code == 200, response.status_code
 
-def refresh_status(box_only=False, site=None):
+def _apply_flags(conn, column, flags):
+    """Set column to each (flag, pdf_id) pair's flag, UPDATE_BATCH_SIZE rows per transaction."""
+    for start in range(0, len(flags), UPDATE_BATCH_SIZE):
+        conn.executemany(
+            f"UPDATE drupal_pdf_files SET {column} = ? WHERE id = ?",
+            flags[start:start + UPDATE_BATCH_SIZE],
+        )
+        conn.commit()
+
+
+def refresh_status(box_only=False, site=None, force=False):
     """
-    Loop through all PDFs and their parent URIs, making HTTP HEAD requests to check their status.
-    If box_only is True, only PDF URIs that are Box share links are checked and no other URLs are processed.
-    For Box share links, obtain the direct download URL using download_from_box (head=True)
-    and perform the HEAD request on that URL. If a URL returns a 404 (or cannot be reached),
-    set the corresponding flag in the database.
+    Check every PDF and parent URI in drupal_pdf_files and set pdf_returns_404 /
+    parent_returns_404 for each row.
+
+    Rows are reduced to their distinct URLs first, and each URL is checked once
+    by link_health.check_links(): concurrently, bounded per host, HEAD with a
+    ranged-GET fallback, and reusing answers younger than config.LINK_CHECK_TTL
+    unless force is True. A URL is flagged when it answers 404/410 or can't be
+    reached. Box share links are checked through their direct download URL
+    and flagged unless the file downloads (200).
 
     Parameters:
         box_only (bool): If True, only check PDF URIs that are Box share links. Defaults to False.
+        site (str): Only check this site's PDFs (domain name).
+        force (bool): Re-check every URL even if it was checked within the TTL.
     """
-    conn = sqlite3.connect(config.DATABASE_PATH)
-    cursor = conn.cursor()
-    pdfs = cursor.execute("SELECT * FROM drupal_pdf_files").fetchall()
+    conn = sqlite3.connect(config.DATABASE_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    pdfs = conn.execute("SELECT id, pdf_uri, parent_uri FROM drupal_pdf_files").fetchall()
 
     if site:
         pdfs = get_pdfs_by_site_name(site)
 
+    print(f"Total records found: {len(pdfs)}")
 
-
-    total_records = len(pdfs)
-    print(f"Total records found: {total_records}")
-
-    for i, each in enumerate(pdfs, start=1):
-        pdf_id = each[0]
-        pdf_uri = each[1]
-        pdf_parent = each[2]
-
-        print(f"\nProcessing record {i}/{total_records}: ID {pdf_id}")
-
+    rows = []
+    for pdf_id, pdf_uri, pdf_parent in pdfs:
         # Skip problematic URIs if they contain spaces (indicating possible formatting issues)
         if len(pdf_uri.split(" ")) > 1 or len(pdf_parent.split(" ")) > 1:
             print(f"Skipping problematic URIs for ID {pdf_id}: '{pdf_uri}', '{pdf_parent}'")
             continue
-
-        if box_only:
-            # Only process Box share links in box_only mode.
-            if box_share_pattern_match(pdf_uri):
-                print(f"PDF URI is a Box share link: {pdf_uri}")
-                is_ok, status_code = check_box_pdf_status(pdf_uri)
-                if not is_ok:
-                    cursor.execute("UPDATE drupal_pdf_files SET pdf_returns_404 = ? WHERE id = ?", (1, pdf_id))
-                else:
-                    cursor.execute("UPDATE drupal_pdf_files SET pdf_returns_404 = ? WHERE id = ?", (0, pdf_id))
-            else:
-                print(f"Skipping non-Box PDF URI for ID {pdf_id}: {pdf_uri}")
-            # In box_only mode, skip parent URL checks.
+        is_box = box_share_pattern_match(pdf_uri)
+        # In box_only mode, only Box share links are checked, and no parents.
+        if box_only and not is_box:
+            continue
+        rows.append((pdf_id, pdf_uri, pdf_parent, is_box))
+
+    # Box shares resolve to a direct download URL (cached, fetched concurrently).
+    shares = resolve_box_shares(pdf_uri for _, pdf_uri, _, is_box in rows if is_box)
+
+    targets = set()
+    for _, pdf_uri, pdf_parent, is_box in rows:
+        if not is_box:
+            targets.add(pdf_uri)
+        elif shares[pdf_uri].downloadable:
+            targets.add(shares[pdf_uri].download_url)
+        if not box_only:
+            targets.add(pdf_parent)
+
+    results = check_links(targets, force=force)
+
+    pdf_flags, parent_flags = [], []
+    for pdf_id, pdf_uri, pdf_parent, is_box in rows:
+        if is_box:
+            share = shares[pdf_uri]
+            pdf_ok = share.downloadable and results[share.download_url].status in BOX_OK_STATUSES
         else:
-            # Process Box share links
-            if box_share_pattern_match(pdf_uri):
-                print(f"PDF URI is a Box share link: {pdf_uri}")
-                is_ok, status_code = check_box_pdf_status(pdf_uri)
-                if not is_ok:
-                    cursor.execute("UPDATE drupal_pdf_files SET pdf_returns_404 = ? WHERE id = ?", (1, pdf_id))
-                else:
-                    cursor.execute("UPDATE drupal_pdf_files SET pdf_returns_404 = ? WHERE id = ?", (0, pdf_id))
-            else:
-                # Regular PDF URI check
-                try:
-                    print(f"Checking PDF URL: {pdf_uri}")
-                    pdf_response = requests.head(pdf_uri, timeout=10)
-                    print(f"PDF URL status code: {pdf_response.status_code}")
-                    if pdf_response.status_code == 404:
-                        cursor.execute("UPDATE drupal_pdf_files SET pdf_returns_404 = ? WHERE id = ?", (1, pdf_id))
-                    else:
-                        cursor.execute("UPDATE drupal_pdf_files SET pdf_returns_404 = ? WHERE id = ?", (0, pdf_id))
-                except requests.exceptions.RequestException as e:
-                    print(f"Error fetching PDF URL ({pdf_uri}): {e}")
-                    cursor.execute("UPDATE drupal_pdf_files SET pdf_returns_404 = ? WHERE id = ?", (1, pdf_id))
-
-            # Check Parent URL status using HEAD request for non-box_only mode
-            try:
-                print(f"Checking Parent URL: {pdf_parent}")
-                parent_response = requests.head(pdf_parent, timeout=10)
-                print(f"Parent URL status code: {parent_response.status_code}")
-                if parent_response.status_code == 404:
-                    cursor.execute("UPDATE drupal_pdf_files SET parent_returns_404 = ? WHERE id = ?", (1, pdf_id))
-                else:
-                    cursor.execute("UPDATE drupal_pdf_files SET parent_returns_404 = ? WHERE id = ?", (0, pdf_id))
-            except requests.exceptions.RequestException as e:
-                print(f"Error fetching Parent URL ({pdf_parent}): {e}")
-                cursor.execute("UPDATE drupal_pdf_files SET parent_returns_404 = ? WHERE id = ?", (1, pdf_id))
-
-        print(f"Finished processing record ID {pdf_id}")
-
-    conn.commit()
-    print("\nAll records processed. Changes committed to the database.")
+            pdf_ok = not is_gone(results[pdf_uri])
+        pdf_flags.append((0 if pdf_ok else 1, pdf_id))
+        if not box_only:
+            parent_flags.append((1 if is_gone(results[pdf_parent]) else 0, pdf_id))
+
+    _apply_flags(conn, "pdf_returns_404", pdf_flags)
+    _apply_flags(conn, "parent_returns_404", parent_flags)
     conn.close()
-    print("Database connection closed.")
+
+    print(
+        f"\nAll records processed: {len(rows)} rows, {len(targets)} distinct URLs. "
+        f"{sum(flag for flag, _ in pdf_flags)} PDFs and "
+        f"{sum(flag for flag, _ in parent_flags)} parent pages flagged as missing."
+    )
 
 
 if __name__== "__main__":
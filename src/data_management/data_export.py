@@ -15,16 +15,28 @@ if project_root not in sys.path:
 
 import config
 from src.data_management.data_import import get_site_id_from_domain_name
+from src.core.database import connect_snapshot, ensure_discovered_pdf, ensure_site_summary, refresh_site_summary
 from src.core.filters import check_for_node, is_high_priority
 from openpyxl.worksheet.datavalidation import DataValidation
 
-def get_all_sites():
 
+def _connect(snapshot):
+    """
+    Reporting reads go to the published read-only snapshot; scan-time callers
+    (refresh, removal checks) pass snapshot=False to read the live database.
+    """
+    if snapshot:
+        return connect_snapshot()
+    conn = sqlite3.connect(config.DATABASE_PATH)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def get_all_sites(snapshot=False):
 
     with open(config.SQL_DIR / "get_all_sites.sql", 'r') as file:
         sql_query = file.read()
-        conn = sqlite3.connect(config.DATABASE_PATH)
-        conn.execute("PRAGMA journal_mode=WAL")
+        conn = _connect(snapshot)
         cursor = conn.cursor()
         cursor.execute(sql_query)
         results = cursor.fetchall()
@@ -36,14 +48,13 @@ def get_all_sites():
 
 
 
-def get_pdf_reports_by_site_name(site_name):
+def get_pdf_reports_by_site_name(site_name, snapshot=False):
 
     with open(config.SQL_DIR / "get_pdf_reports_by_site_name.sql", 'r') as file:
         sql_query = file.read()
         formatted_query = sql_query.format(site_name=site_name)
 
-        conn = sqlite3.connect(config.DATABASE_PATH)
-        conn.execute("PRAGMA journal_mode=WAL")
+        conn = _connect(snapshot)
         cursor = conn.cursor()
 
         # Execute the SQL query
@@ -68,13 +79,12 @@ def get_pdf_reports_by_site_name(site_name):
         return results
 
 
-def get_pdfs_by_site_name(site_name):
+def get_pdfs_by_site_name(site_name, snapshot=False):
 
     with open(config.SQL_DIR / "get_pdfs_by_domain_name.sql", 'r') as file:
         sql_query = file.read()
         formatted_query = sql_query.format(site_name=site_name)
-        conn = sqlite3.connect(config.DATABASE_PATH)
-        conn.execute("PRAGMA journal_mode=WAL")
+        conn = _connect(snapshot)
         cursor = conn.cursor()
         cursor.execute(formatted_query)
         results = cursor.fetchall()
@@ -85,12 +95,128 @@ def get_pdfs_by_site_name(site_name):
 # print(get_pdfs_by_site_name('creativewriting.sfsu.edu'))
 
 
+def get_discovered_pdfs(site):
+    """
+    (pdf_uri, parent_uri, last_seen_at) rows the crawler streamed into
+    discovered_pdf for one site folder (e.g. 'calstatela-edu_ecst') during its
+    latest complete crawl. Always reads the live database.
+    """
+    with open(config.SQL_DIR / "get_discovered_pdfs.sql", 'r') as file:
+        sql_query = file.read()
+    conn = _connect(False)
+    ensure_discovered_pdf(conn)
+    cursor = conn.cursor()
+    cursor.execute(sql_query, {"site": site})
+
+    col_names = [desc[0] for desc in cursor.description]
+    Row = namedtuple('Row', col_names)
+    results = [Row(*row) for row in cursor.fetchall()]
+
+    conn.close()
+    return results
+
+
+def get_latest_discovery_crawl(site):
+    """
+    (started_at, finished_at, finish_reason) of the latest crawl of one site
+    folder, or None if it has never been crawled into discovered_pdf.
+    Always reads the live database.
+    """
+    with open(config.SQL_DIR / "get_latest_discovery_crawl.sql", 'r') as file:
+        sql_query = file.read()
+    conn = _connect(False)
+    ensure_discovered_pdf(conn)
+    cursor = conn.cursor()
+    cursor.execute(sql_query, {"site": site})
+
+    col_names = [desc[0] for desc in cursor.description]
+    Row = namedtuple('Row', col_names)
+    row = cursor.fetchone()
+
+    conn.close()
+    return Row(*row) if row else None
+
+
+def get_discovered_pdfs_since(since):
+    """
+    (site, pdf_uri, parent_uri, last_seen_at) rows for every PDF link the
+    crawler has found or re-found since `since` ('%Y-%m-%d %H:%M:%S.%f',
+    local time), oldest first. Always reads the live database.
+    """
+    with open(config.SQL_DIR / "get_discovered_pdfs_since.sql", 'r') as file:
+        sql_query = file.read()
+    conn = _connect(False)
+    ensure_discovered_pdf(conn)
+    cursor = conn.cursor()
+    cursor.execute(sql_query, {"since": since})
+
+    col_names = [desc[0] for desc in cursor.description]
+    Row = namedtuple('Row', col_names)
+    results = [Row(*row) for row in cursor.fetchall()]
+
+    conn.close()
+    return results
+
+
+def get_site_summary(snapshot=False):
+    """
+    Per-site PDF counts (instances, unique, high priority, last scanned) read
+    from the site_summary table, one row per site. On the live database the
+    sites written to since the last refresh are recomputed first, so the
+    counts are current; the snapshot's are as of its publish_snapshot().
+    """
+    with open(config.SQL_DIR / "all_pdf_stats.sql", 'r') as file:
+        sql_query = file.read()
+        conn = _connect(snapshot)
+        if not snapshot:
+            ensure_site_summary(conn)
+            refresh_site_summary(conn)
+        cursor = conn.cursor()
+        cursor.execute(sql_query)
+        results = cursor.fetchall()
+
+        col_names = [desc[0] for desc in cursor.description]
+        Row = namedtuple('Row', col_names)
+        results = [Row(*row) for row in results]
+
+        conn.close()
+
+        return results
+
+
+
+def get_scan_history():
+    """
+    Per-run, per-site aggregates from the scan_run / scan_observation ledger,
+    ordered by site then run start time.
+
+    Returns (history_rows, failure_rows) as lists of namedtuples; failure rows
+    are error-message counts for failures logged during each run.
+    """
+    with open(config.SQL_DIR / "get_scan_history.sql", 'r') as file:
+        history_query = file.read()
+    with open(config.SQL_DIR / "get_scan_run_failures.sql", 'r') as file:
+        failure_query = file.read()
+
+    conn = connect_snapshot()
+    cursor = conn.cursor()
+
+    results = []
+    for query in (history_query, failure_query):
+        cursor.execute(query)
+        col_names = [desc[0] for desc in cursor.description]
+        Row = namedtuple('Row', col_names)
+        results.append([Row(*row) for row in cursor.fetchall()])
+
+    conn.close()
+
+    return results[0], results[1]
+
 
 def get_all_users_with_pdfs():
     with open(config.SQL_DIR / "get_all_users_with_pdf_files.sql", 'r') as file:
         sql_query = file.read()
-        conn = sqlite3.connect(config.DATABASE_PATH)
-        conn.execute("PRAGMA journal_mode=WAL")
+        conn = connect_snapshot()
         cursor = conn.cursor()
         cursor.execute(sql_query)
         results = cursor.fetchall()
@@ -110,8 +236,7 @@ def get_site_failures(site_name):
 
         site_id = get_site_id_from_domain_name(site_name.replace("-", "."))
         formatted_query = sql_query.format(site_id=site_id)
-        conn = sqlite3.connect(config.DATABASE_PATH)
-        conn.execute("PRAGMA journal_mode=WAL")
+        conn = connect_snapshot()
         cursor = conn.cursor()
 
         cursor.execute(formatted_query)
@@ -2,12 +2,15 @@ import csv
 import os
 import sqlite3
 import sys
+from collections import Counter
+from datetime import timezone
 
 _project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
 if _project_root not in sys.path:
     sys.path.insert(0, _project_root)
 
 import config
+from src.core.database import ensure_scan_history
 
 
 def add_employees_from_csv_file(file_path):
@@ -492,6 +495,102 @@ def mark_pdf_as_removed(pdf_uri, parent_uri):
     conn.close()
 
 
+def mark_pdf_pairs_as_removed(pairs):
+    """
+    Batch form of mark_pdf_as_removed(): marks every (pdf_uri, parent_uri)
+    pair in `pairs` as removed in one transaction. Returns the number of rows
+    that changed.
+    """
+    conn = sqlite3.connect(config.DATABASE_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    cursor = conn.cursor()
+    cursor.executemany(
+        "UPDATE drupal_pdf_files SET removed = 1 WHERE pdf_uri = ? AND parent_uri = ? AND removed IS NOT TRUE",
+        list(pairs),
+    )
+    changed = cursor.rowcount
+    conn.commit()
+    conn.close()
+    return changed
+
+
+_create_current_discovery = """
+CREATE TEMP TABLE IF NOT EXISTS current_discovery (
+    site_id INTEGER NOT NULL,
+    pdf_uri TEXT NOT NULL,
+    parent_uri TEXT NOT NULL,
+    PRIMARY KEY (site_id, pdf_uri, parent_uri)
+) WITHOUT ROWID;
+DELETE FROM temp.current_discovery;
+"""
+
+
+def _removed_per_site(conn, site_ids):
+    """{domain_name: count} for the drupal_site_id of every row an UPDATE ... RETURNING changed."""
+    counts = Counter(site_ids)
+    names = dict(conn.execute("SELECT id, domain_name FROM drupal_site").fetchall())
+    return {names.get(site_id, str(site_id)): count for site_id, count in sorted(counts.items())}
+
+
+def mark_undiscovered_pdfs_as_removed(discovered):
+    """
+    Set-based removal after a crawl. `discovered` maps drupal_site_id to the
+    (pdf_uri, parent_uri) pairs the site's latest crawl found. They are loaded
+    into a temp table once, and one anti-join UPDATE marks every other row of
+    those sites removed, in a single transaction. Sites with no pairs are not
+    touched (no crawl says nothing about what is still linked).
+
+    Returns {domain_name: number of rows newly marked removed}.
+    """
+    with open(config.SQL_DIR / "mark_undiscovered_pdfs_removed.sql", "r") as file:
+        query = file.read()
+
+    conn = sqlite3.connect(config.DATABASE_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_create_current_discovery)
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO temp.current_discovery (site_id, pdf_uri, parent_uri) VALUES (?, ?, ?)",
+            ((site_id, pdf_uri, parent_uri) for site_id, pairs in discovered.items() for pdf_uri, parent_uri in pairs),
+        )
+        removed = [row[0] for row in conn.execute(query).fetchall()]
+    counts = _removed_per_site(conn, removed)
+    conn.close()
+    return counts
+
+
+def mark_replaced_pdf_rows_as_removed(site_name=None):
+    """
+    Marks all but the newest drupal_pdf_files row per (site, pdf_uri,
+    parent_uri) as removed, for one site or (site_name=None) every site in one
+    statement. Returns {domain_name: number of rows newly marked removed}.
+    """
+    with open(config.SQL_DIR / "update_scan_by_removing_old_duplicates.sql", "r") as file:
+        query = file.read()
+
+    conn = sqlite3.connect(config.DATABASE_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    with conn:
+        removed = [row[0] for row in conn.execute(query, {"site_name": site_name}).fetchall()]
+    counts = _removed_per_site(conn, removed)
+    conn.close()
+    return counts
+
+
+def get_known_pdf_parents():
+    """
+    (domain_name, parent_uri, pdf_uri) rows for every PDF link in
+    drupal_pdf_files that isn't marked removed, ordered by parent page.
+    """
+    with open(config.SQL_DIR / "get_known_pdf_parents.sql", "r") as file:
+        query = file.read()
+
+    conn = sqlite3.connect(config.DATABASE_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    rows = conn.execute(query).fetchall()
+    conn.close()
+    return rows
+
 
 def import_box_folders():
 
@@ -516,3 +615,50 @@ def import_box_folders():
     conn.commit()
     conn.close()
 
+
+def record_scan_run(started_at, finished_at, observed_pdfs):
+    """
+    Record a completed scan in the scan_run ledger and snapshot every observed
+    PDF (pdf_file_id, report_id, priority, scanned date and 404 flags) into
+    scan_observation.
+
+    Parameters:
+        started_at (datetime): Local time the scan started.
+        finished_at (datetime): Local time the scan finished.
+        observed_pdfs (iterable): (pdf_uri, parent_uri) pairs seen during this run.
+
+    Returns:
+        int: The new scan_run id.
+    """
+    def _utc(value):
+        # Stored in UTC to compare directly with CURRENT_TIMESTAMP columns.
+        return value.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+    with open(config.SQL_DIR / "record_scan_observations.sql", "r") as file:
+        observation_query = file.read()
+
+    conn = sqlite3.connect(config.DATABASE_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    ensure_scan_history(conn)
+    cursor = conn.cursor()
+
+    cursor.execute("CREATE TEMP TABLE IF NOT EXISTS run_pdfs (pdf_uri TEXT, parent_uri TEXT)")
+    cursor.execute("DELETE FROM temp.run_pdfs")
+    cursor.executemany("INSERT INTO temp.run_pdfs (pdf_uri, parent_uri) VALUES (?, ?)", observed_pdfs)
+
+    cursor.execute(
+        "INSERT INTO scan_run (started_at, finished_at) VALUES (?, ?)",
+        (_utc(started_at), _utc(finished_at)),
+    )
+    run_id = cursor.lastrowid
+
+    cursor.execute(observation_query, {"run_id": run_id})
+    cursor.execute(
+        "UPDATE scan_run SET pdf_count = (SELECT COUNT(*) FROM scan_observation WHERE run_id = ?) WHERE id = ?",
+        (run_id, run_id),
+    )
+    conn.commit()
+    conn.close()
+
+    print(f"Recorded scan run {run_id}")
+    return run_id
@@ -0,0 +1,200 @@
+"""Columnar Parquet snapshots of each scan for analytics.
+
+Every scan run recorded in scan_run / scan_observation is exported as the
+joined drupal_pdf_files × pdf_report × drupal_site view into a Hive-partitioned
+Parquet dataset under config.ANALYTICS_DIR:
+
+    run_date=2026-03-20/site=calstatela.edu_ecst/run12-0.parquet
+
+Questions across every historical scan then read a few columns from the
+relevant partitions instead of opening one workbook per domain per run.
+
+pyarrow is an optional dependency; everything else in the pipeline works
+without it and export_scan_snapshot() just reports that it was skipped.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+import config
+from src.core.database import ensure_scan_history
+
+PARTITION_COLUMNS = ["run_date", "site"]
+
+# Column types for get_scan_snapshot.sql. Declared up front so a column that
+# happens to be all NULL in one run doesn't infer a conflicting type.
+SNAPSHOT_COLUMNS = {
+    "run_id": "int64",
+    "run_date": "string",
+    "site": "string",
+    "security_group_name": "string",
+    "pdf_uri": "string",
+    "parent_uri": "string",
+    "scanned_date": "string",
+    "file_hash": "string",
+    "priority": "string",
+    "violations": "int64",
+    "failed_checks": "int64",
+    "tagged": "bool",
+    "check_for_image_only": "bool",
+    "pdf_text_type": "string",
+    "title_set": "bool",
+    "language_set": "bool",
+    "page_count": "int64",
+    "has_form": "bool",
+    "approved_pdf_exporter": "bool",
+    "pdf_returns_404": "bool",
+    "parent_returns_404": "bool",
+}
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.dataset  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            "pyarrow is required for the Parquet analytics export. "
+            f"Install with: pip install pyarrow. Import error: {e}"
+        ) from e
+    return pyarrow
+
+
+def _scan_run_ids(conn) -> list[int]:
+    return [row[0] for row in conn.execute("SELECT id FROM scan_run ORDER BY id").fetchall()]
+
+
+def export_scan_snapshot(run_id: int | None = None, output_dir: Path | None = None) -> int:
+    """Write one scan run (default: the latest) to the Parquet dataset.
+
+    Re-exporting a run overwrites its own files only, so several runs on the
+    same day share a run_date partition without clobbering each other.
+    Returns the number of rows written (0 if pyarrow is missing or no run exists).
+    """
+    try:
+        pa = _require_pyarrow()
+    except ImportError as e:
+        print(f"Skipping Parquet export: {e}")
+        return 0
+    import pyarrow.dataset as ds
+
+    output_dir = Path(output_dir or config.ANALYTICS_DIR)
+
+    with open(config.SQL_DIR / "get_scan_snapshot.sql", "r") as file:
+        query = file.read()
+
+    conn = sqlite3.connect(config.DATABASE_PATH, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    ensure_scan_history(conn)
+
+    if run_id is None:
+        run_ids = _scan_run_ids(conn)
+        if not run_ids:
+            conn.close()
+            print("No scan runs recorded; nothing to export.")
+            return 0
+        run_id = run_ids[-1]
+
+    cursor = conn.execute(query, {"run_id": run_id})
+    col_names = [desc[0] for desc in cursor.description]
+    rows = cursor.fetchall()
+    conn.close()
+
+    if not rows:
+        print(f"Scan run {run_id} has no observations; nothing to export.")
+        return 0
+
+    schema = pa.schema([(name, pa.type_for_alias(SNAPSHOT_COLUMNS[name])) for name in col_names])
+    columns = {}
+    for i, name in enumerate(col_names):
+        values = [row[i] for row in rows]
+        if SNAPSHOT_COLUMNS[name] == "bool":
+            values = [None if v is None else bool(v) for v in values]
+        columns[name] = values
+    table = pa.Table.from_pydict(columns, schema=schema)
+    ds.write_dataset(
+        table,
+        output_dir,
+        format="parquet",
+        partitioning=PARTITION_COLUMNS,
+        partitioning_flavor="hive",
+        basename_template=f"run{run_id}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+    )
+
+    print(f"Exported scan run {run_id}: {len(rows)} rows → {output_dir}")
+    return len(rows)
+
+
+def export_all_scan_snapshots(output_dir: Path | None = None) -> int:
+    """Backfill the Parquet dataset with every recorded scan run."""
+    conn = sqlite3.connect(config.DATABASE_PATH, timeout=30)
+    ensure_scan_history(conn)
+    run_ids = _scan_run_ids(conn)
+    conn.close()
+    return sum(export_scan_snapshot(run_id, output_dir) for run_id in run_ids)
+
+
+def load_snapshots(
+    sites: list[str] | None = None,
+    since: str | None = None,
+    columns: list[str] | None = None,
+    source_dir: Path | None = None,
+):
+    """Load scan snapshots as a pandas DataFrame.
+
+    Filters are pushed down to the partition layout, so only matching
+    run_date / site directories are read.
+
+    Parameters:
+        sites:   Limit to these domain names (drupal_site.domain_name).
+        since:   Earliest run date to include, 'YYYY-MM-DD'.
+        columns: Columns to read (default: all).
+    """
+    _require_pyarrow()
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(Path(source_dir or config.ANALYTICS_DIR), format="parquet", partitioning="hive")
+
+    expression = None
+    if sites:
+        expression = ds.field("site").isin(sites)
+    if since:
+        since_filter = ds.field("run_date") >= since
+        expression = since_filter if expression is None else expression & since_filter
+
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+def compliance_by_run(sites: list[str] | None = None, since: str | None = None):
+    """Unique PDFs, high-priority count and compliance % per run and site.
+
+    Uses the same fingerprint-deduplicated definition as
+    report_reader.parse_domain_excel(), excluding /node/ and /index.php/ parents.
+    """
+    df = load_snapshots(
+        sites=sites,
+        since=since,
+        columns=["run_id", "run_date", "site", "parent_uri", "file_hash", "priority"],
+    )
+    df = df[df["file_hash"].notna()]
+    df = df[~df["parent_uri"].str.contains(r"./node/|./index\.php/", regex=True)]
+    df = df.assign(is_high=df["priority"] == "high")
+
+    unique = df.groupby(["run_id", "run_date", "site", "file_hash"], as_index=False)["is_high"].max()
+    summary = unique.groupby(["run_id", "run_date", "site"], as_index=False).agg(
+        unique_pdfs=("file_hash", "size"),
+        high_priority=("is_high", "sum"),
+    )
+    summary["compliance_pct"] = (
+        (summary["unique_pdfs"] - summary["high_priority"]) / summary["unique_pdfs"] * 100
+    ).round(1)
+    return summary.sort_values(["site", "run_date", "run_id"]).reset_index(drop=True)
@@ -14,7 +14,7 @@ Sections
 4. Excel row reader               (read_pdf_rows)
 5. Row-level priority helper      (row_to_priority_data)
 6. Aggregate Excel parser         (parse_domain_excel)  ← counts are computed here
-7. Domain scan collector          (collect_from_local)
+7. Domain scan collector          (collect_from_local, collect_from_database)
 8. HTML / template utilities      (_js)
 
 Priority source of truth
@@ -410,6 +410,60 @@ def collect_from_local(
     return data
 
 
+def collect_from_database(
+    domains: list[str] | None,
+) -> dict[str, list[dict]]:
+    """Build the same ``{display_key: [scan_dict, ...]}`` structure as
+    collect_from_local() from the scan_run / scan_observation ledger.
+
+    One indexed aggregate query replaces opening every historical workbook.
+    Keys are domain folder names (config.get_domain_folder_name); *domains*
+    filters to the given domain keys, None returns every site with history.
+    """
+    from src.data_management.data_export import get_scan_history
+
+    history, failures = get_scan_history()
+
+    wanted = None
+    if domains is not None:
+        wanted = {config.get_domain_folder_name(d).lower() for d in domains}
+
+    top_errors: dict[tuple[int, str], dict[str, int]] = {}
+    for row in failures:
+        errors = top_errors.setdefault((row.run_id, row.domain_name), {})
+        if len(errors) < 10:
+            errors[row.error_message] = row.occurrences
+
+    data: dict[str, list[dict]] = {}
+    for row in history:
+        display_key = config.get_domain_folder_name(row.domain_name)
+        if wanted is not None and display_key.lower() not in wanted:
+            continue
+
+        unique_pdfs       = row.unique_pdfs
+        high_priority     = row.high_priority or 0
+        compliant_scanned = unique_pdfs - high_priority
+        violations_total  = row.violations_total or 0
+        data.setdefault(display_key, []).append(dict(
+            unique_pdfs=unique_pdfs,
+            high_priority=high_priority,
+            compliant_scanned=compliant_scanned,
+            compliance_pct=round(compliant_scanned / unique_pdfs * 100, 1) if unique_pdfs else 0.0,
+            violations_total=violations_total,
+            violations_avg=round(violations_total / unique_pdfs, 1) if unique_pdfs else 0.0,
+            errors_per_page_avg=round(row.errors_per_page_avg or 0.0, 2),
+            total_scanned=unique_pdfs,   # backwards compat alias
+            top_errors=top_errors.get((row.run_id, row.domain_name), {}),
+            timestamp=datetime.strptime(row.started_at, "%Y-%m-%d %H:%M:%S"),
+            filename=f"scan run {row.run_id}",
+        ))
+
+    for scans in data.values():
+        scans.sort(key=lambda s: s["timestamp"])
+
+    return data
+
+
 # =============================================================================
 # 8. HTML / template utilities
 # =============================================================================
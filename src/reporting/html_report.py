@@ -8,9 +8,9 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '../..'))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from src.data_management.data_export import get_all_sites, get_pdf_reports_by_site_name
+from src.data_management.data_export import get_all_sites, get_pdf_reports_by_site_name, get_site_summary
 from src.core.filters import is_high_priority
-import sqlite3
+from src.core.database import connect_snapshot
 import config
 
 # Setup Jinja2 Environment (Global)
@@ -18,18 +18,21 @@ env = Environment(loader=FileSystemLoader('.'))
 
 def get_all_pdf_stats():
     """
-    Reads the SQL query from 'sql/all_pdf_stats.sql' and executes it against the 'drupal_pdfs.db' database.
+    Reads the SQL query from 'sql/sum_all_pdf_stats.sql' and executes it against the 'drupal_pdfs.db' database.
+    The totals are summed from the site_summary table (one row per site), so no
+    per-PDF joins happen at report time.
     Returns a dictionary containing overall PDF statistics:
       - total_pdf_instances
       - total_unique_pdfs
       - total_high_priority
+      - last_scanned
     """
     # Open and read the SQL query from file.
     with open(config.SQL_DIR / "sum_all_pdf_stats.sql", "r") as file:
         query = file.read()
 
-    # Connect to the SQLite database.
-    conn = sqlite3.connect(config.DATABASE_PATH)
+    # Connect to the read-only reporting snapshot.
+    conn = connect_snapshot()
     cursor = conn.cursor()
 
     # Execute the SQL query.
@@ -58,7 +61,7 @@ def get_all_sites_with_pdfs():
     with open(config.SQL_DIR / "get_all_sites_with_pdfs.sql", "r") as file:
         query = file.read()
 
-    conn = sqlite3.connect(config.DATABASE_PATH)
+    conn = connect_snapshot()
     cursor = conn.cursor()
     cursor.execute(query)
     rows = cursor.fetchall()
@@ -75,7 +78,7 @@ def get_all_sites_with_pdfs():
 
 def fetch_sites():
     """Fetch and return the list of sites."""
-    return get_all_sites()
+    return get_all_sites(snapshot=True)
 
 def fetch_pdf_reports():
     """Fetch all PDF accessibility reports for each site."""
@@ -83,7 +86,7 @@ def fetch_pdf_reports():
 
     all_sites = fetch_sites()
     for site in all_sites:
-        site_pdf_reports[site] = get_pdf_reports_by_site_name(site)
+        site_pdf_reports[site] = get_pdf_reports_by_site_name(site, snapshot=True)
 
     return site_pdf_reports
 
@@ -130,32 +133,15 @@ def generate_site_details():
 
     return site_details
 
-def compute_metrics(site_details):
-    """Compute various metrics for the report."""
-    total_pdfs = 0
-    total_failing = 0
-    site_failures = {}
-
-    for site, details in site_details.items():
-        print(site)
-
-        pdfs = details["pdf_reports"]
-
-        total_pdfs += len(pdfs)
-        print(total_pdfs)
-        failing_count = 0
-        for pdf in pdfs:
-            # Count a PDF as failing if errors_per_page is an integer and > 0.
-            if is_high_priority(pdf):
-                failing_count += 1
-        total_failing += failing_count
-        site_failures[site] = failing_count
+def compute_metrics(site_summary):
+    """Compute various metrics for the report from the per-site summary rows."""
+    total_pdfs = sum(site.total_pdf_instances for site in site_summary)
+    total_failing = sum(site.total_high_priority for site in site_summary)
+    site_failures = {site.domain_name: site.total_high_priority for site in site_summary}
 
     # Sort sites by the number of failing PDFs and take the top 20.
     top_20_sites = sorted(site_failures.items(), key=lambda x: x[1], reverse=True)[:20]
 
-
-
     return {
         "total_pdfs": total_pdfs,
         "total_failing": total_failing,
@@ -181,7 +167,7 @@ def main():
     site_details = generate_site_details()
 
 
-    metrics = compute_metrics(site_details)
+    metrics = compute_metrics(get_site_summary(snapshot=True))
     stats = get_all_pdf_stats()  # Get overall PDF statistics from the SQL query
     site_pdf_counts = get_all_sites_with_pdfs()  # Get sites with their respective PDF counts
 
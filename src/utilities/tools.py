@@ -19,10 +19,10 @@ if project_root not in sys.path:
 
 import config
 
-from src.core.conformance_checker import loop_through_files_in_folder
-from src.data_management.data_export import get_pdf_reports_by_site_name
-from src.data_management.data_import import get_site_id_by_domain_name, mark_pdf_as_removed
-from crawlers.csula_pdf_scan.csula_pdf_scan.box_handler import download_from_box, box_share_pattern_match
+from src.core.conformance_checker import load_discovered_pdfs
+from src.data_management.data_export import get_latest_discovery_crawl
+from src.data_management.data_import import get_site_id_by_domain_name, mark_undiscovered_pdfs_as_removed
+from crawlers.csula_pdf_scan.csula_pdf_scan.box_handler import box_share_pattern_match, get_resolver
 
 
 pdf_sites_folder = "C:\\Users\\913678186\\Box\\ATI\\PDF Accessibility\\CSULA Website PDF Scans"
@@ -169,7 +169,10 @@ def download_all_dprc_will_remediate_pdfs_by_site(site_name):
 
             if box_share_pattern_match(first_url):
                 print("Downloading file from box…")
-                download_from_box(first_url, box_temp_folder)
+                ok, content, share = get_resolver().download(first_url)
+                if ok:
+                    with open(os.path.join(box_temp_folder, share.file_name), "wb") as file:
+                        file.write(content)
             else:
                 print("Downloading file from URL…")
                 response = requests.get(first_url, stream=True)
@@ -247,41 +250,35 @@ def get_all_folders_by_date_modified(folder_path, date_modified):
 
 def mark_pdfs_as_removed(site_folders):
     """
-    Compare the raw pdf scrape URLS and Parent with current PDFS and mark current PDFS as removed if they are not in the raw scrape.
-    :return:
-    """
-    raw_pdf_scan_set = set()
+    Mark every PDF link the latest crawl of its site no longer found as removed.
 
-    for folder in os.listdir(site_folders):
+    Each site folder's discovery set (see load_discovered_pdfs) is collected
+    once and handed to mark_undiscovered_pdfs_as_removed(), which does the
+    comparison for all sites in one anti-join UPDATE. Folders without a site
+    row or without any discovered PDFs are skipped, and so are sites whose
+    latest crawl stopped at a page or time budget: PDFs on the pages it never
+    reached are not gone.
 
+    :return: {domain_name: number of PDF links newly marked removed}
+    """
+    discovered = {}
+    for folder in os.listdir(site_folders):
         domain_id = get_site_id_by_domain_name(folder)
-
-        site_pdfs = get_pdf_reports_by_site_name(folder.replace("-", "."))
-
-        existing_pdfs_set = set((pdf.pdf_uri, pdf.parent_uri) for pdf in site_pdfs)
-
-        if domain_id is not None:
-            pdf_locations = loop_through_files_in_folder(os.path.join(site_folders, folder))
-
-            if pdf_locations:
-
-                for file in pdf_locations:
-
-                    file_split = file.split(' ', 1)  # Splits at the last space
-
-                    file_url = file_split[0]
-                    loc = file_split[1].split(" ")[0]
-                    raw_pdf_scan_set.add((file_url, loc))
-
-        missing_pdfs = existing_pdfs_set.difference(raw_pdf_scan_set)
-        if missing_pdfs:
-            for pdf_uri, parent_uri in missing_pdfs:
-
-                mark_pdf_as_removed(pdf_uri, parent_uri)
-
-
-        raw_pdf_scan_set.clear()
-        existing_pdfs_set.clear()
+        if domain_id is None:
+            continue
+        latest = get_latest_discovery_crawl(folder)
+        if latest is not None and latest.finish_reason == "budget":
+            print(f"{folder}: latest crawl stopped at its budget, not checking for removed PDFs")
+            continue
+        pdf_locations = load_discovered_pdfs(os.path.join(site_folders, folder))
+        if pdf_locations:
+            discovered.setdefault(domain_id, set()).update(pdf_locations)
+
+    removed = mark_undiscovered_pdfs_as_removed(discovered)
+    for site, count in removed.items():
+        print(f"{site}: {count} PDF links marked removed")
+    print(f"Checked {len(discovered)} sites, {sum(removed.values())} PDF links marked removed")
+    return removed
 
 
 if __name__ == "__main__":